@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+
+from benchmarks.corpus import load_article, corpus_titles, synthetic_article
+from benchmarks.legacy import extract_sections_two_pass, resolve_citations_by_search
+from scraper.extract import extract_sections, extract_references
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main_content_of(html, parser):
+    soup = BeautifulSoup(html, parser)
+    return soup.find('div', {'class': 'mw-parser-output'})
+
+
+def main(repeat=3):
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+
+    for title in corpus_titles():
+        html = load_article(title)
+        print(f"{title}: {len(html) / 1e6:.2f} MB of HTML")
+        for parser in parsers:
+            parse_time, main_content = best_of(lambda: main_content_of(html, parser), repeat)
+            legacy_time, legacy = best_of(lambda: extract_sections_two_pass(main_content), repeat)
+            single_time, single = best_of(lambda: extract_sections(main_content), repeat)
+            print(f"  {parser:12s} parse {parse_time * 1000:8.1f} ms | "
+                  f"two-pass {legacy_time * 1000:8.1f} ms ({len(legacy)} sections) | "
+                  f"single-pass {single_time * 1000:8.1f} ms ({len(single)} sections)")
+
+    # Citation resolution on a page without div.reflist (the fallback path)
+    soup = BeautifulSoup(synthetic_article(reflist=False), 'html.parser')
+    content_div = soup.find('div', {'id': 'mw-content-text'})
+    capped_time, (capped, _) = best_of(lambda: resolve_citations_by_search(soup, content_div), 1)
+    indexed_time, (indexed, _) = best_of(lambda: extract_references(soup, content_div), repeat)
+    print(f"Citations without reflist: search capped at 30 {capped_time * 1000:8.1f} ms ({len(capped)} refs) | "
+          f"indexed {indexed_time * 1000:8.1f} ms ({len(indexed)} refs)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
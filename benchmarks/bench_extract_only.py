@@ -0,0 +1,81 @@
+import sys
+import os
+import io
+import time
+import tempfile
+import subprocess
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import load_article
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_CODE = '''
+import sys, time
+start = time.perf_counter()
+import enhanced_wikipedia_scraper
+elapsed = time.perf_counter() - start
+loaded = sorted(m for m in ('reportlab', 'PIL') if m in sys.modules)
+print(elapsed, ','.join(loaded) or '-')
+'''
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+
+def fake_get(html):
+    # Serve the article for page URLs and a generated JPEG for everything else
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (90, 140, 200)).save(buffer, format='JPEG')
+    image = buffer.getvalue()
+
+    def get(url, **kwargs):
+        return FakeResponse(html if '/wiki/' in url else image)
+    return get
+
+
+def import_time(repeat):
+    # Fresh interpreter per run so nothing is already imported
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_CODE], cwd=PROJECT_ROOT)
+        seconds, loaded = output.decode().split()
+        timings.append(float(seconds))
+    return min(timings), loaded
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(repeat=3):
+    seconds, loaded = import_time(repeat)
+    print(f"import enhanced_wikipedia_scraper: {seconds * 1000:7.1f} ms (rendering modules loaded: {loaded})")
+
+    from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
+
+    html = load_article('India')
+    get = fake_get(html)
+    with tempfile.TemporaryDirectory() as tmp:
+        def run(extract_only):
+            return lambda: scrape_enhanced_wikipedia('India', get=get, output_dir=tmp, verbose=False,
+                                                     image_cache=False, page_cache=False,
+                                                     extract_only=extract_only)
+        text_time = best_of(run(True), repeat)
+        full_time = best_of(run(False), repeat)
+    print(f"per article: extract-only {text_time * 1000:8.1f} ms | full (images, PDF, CSV) {full_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,99 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import subprocess
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+
+def _status_kb(field):
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def write_gallery(directory, count):
+    # Distinct camera-sized JPEGs plus large PNG diagrams (which cannot be
+    # drafted down while decoding), like a gallery or list article
+    from PIL import Image
+
+    for i in range(count):
+        if i % 5 == 4:
+            image = Image.effect_noise((1500, 1500), 20 + i % 60).convert('RGBA')
+            name = f'Gallery_{i}.png'
+        else:
+            image = Image.effect_noise((3000, 2000), 20 + i % 60).convert('RGB')
+            name = f'Gallery_{i}.jpg'
+        image.save(os.path.join(directory, name), quality=90)
+
+
+def gallery_get(directory):
+    # Serve the gallery from disk, so the originals are not held by the benchmark
+    def get(url, **kwargs):
+        with open(os.path.join(directory, url.rsplit('/', 1)[-1]), 'rb') as file:
+            return FakeResponse(file.read())
+
+    urls = [f'https://upload.wikimedia.org/wikipedia/commons/{name}' for name in sorted(os.listdir(directory))]
+    return urls, get
+
+
+def run_mode(gallery, image_memory, output_dir):
+    # Runs in a fresh interpreter: report wall time and peak RSS growth of one
+    # render (decoded pixels and reportlab buffers live outside tracemalloc)
+    from enhanced_wikipedia_scraper import generate_enhanced_pdf
+    from scraper.metrics import Metrics
+
+    urls, get = gallery_get(gallery)
+    sections = [{'heading': ('h1', 'Gallery'), 'level': 1, 'content': 'A gallery of photographs.'}]
+    metrics = Metrics()
+    before = _status_kb('VmRSS')
+    start = time.perf_counter()
+    pdf_file = generate_enhanced_pdf('Gallery', 'Gallery', sections, [], urls, 'https://en.wikipedia.org/wiki/Gallery',
+                                     get=get, output_dir=output_dir, verbose=False, image_cache=False,
+                                     process_workers=1, image_memory=image_memory, metrics=metrics)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'peak_bytes': (_status_kb('VmHWM') - before) * 1024,
+                      'pdf_bytes': os.path.getsize(pdf_file),
+                      'images_reduced': metrics.report()['counts'].get('images_reduced', 0),
+                      'images_over_memory': metrics.report()['counts'].get('images_over_memory', 0)}))
+
+
+def measure(gallery, image_memory, output_dir):
+    output = subprocess.check_output([sys.executable, __file__, '--run', gallery, str(image_memory or 0),
+                                      output_dir])
+    return json.loads(output)
+
+
+def main(counts=(50, 200), image_memory=32 * 1024 * 1024):
+    # Peak RSS growth of a gallery render with every image in memory against
+    # images spooled to disk under an image_memory ceiling
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            gallery = os.path.join(tmp, f'gallery-{count}')
+            os.makedirs(gallery)
+            write_gallery(gallery, count)
+            line = [f"{count:4d} images"]
+            for memory, label in ((None, 'in memory'), (image_memory, f'spooled ({image_memory / 1e6:.0f} MB)')):
+                result = measure(gallery, memory, tmp)
+                line.append(f"{label} {result['seconds']:6.2f} s +{result['peak_bytes'] / 1e6:6.1f} MB "
+                            f"({result['pdf_bytes'] / 1e6:.1f} MB PDF, {result['images_reduced']} reduced, "
+                            f"{result['images_over_memory']} over memory)")
+            print(' | '.join(line))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--run':
+        run_mode(sys.argv[2], int(sys.argv[3]) or None, sys.argv[4])
+    else:
+        main()
@@ -0,0 +1,57 @@
+import sys
+import os
+import io
+import time
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from benchmarks.legacy import prepare_image_inline
+from scraper.images import process_image, process_images, get_pool
+
+
+def sample_images(count=24):
+    # Camera-sized JPEGs plus transparent PNG icons, like a typical article
+    images = []
+    for i in range(count):
+        if i % 4 == 3:
+            image = Image.new('RGBA', (600, 600), (20 * (i % 12), 80, 160, 128))
+            format = 'PNG'
+        else:
+            image = Image.effect_noise((3000, 2000), 40 + i).convert('RGB')
+            format = 'JPEG'
+        buffer = io.BytesIO()
+        image.save(buffer, format=format, quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(width=250):
+    images = sample_images()
+    print(f"{len(images)} images, {sum(map(len, images)) / 1e6:.1f} MB encoded, shrunk to {width}px")
+
+    inline = timed(lambda: [prepare_image_inline(data, width) for data in images])
+    print(f"  inline (original)        {inline * 1000:8.1f} ms")
+    staged = timed(lambda: [process_image(data, width) for data in images])
+    print(f"  draft + thumbnail        {staged * 1000:8.1f} ms")
+
+    # workers=1 is the inline draft + thumbnail row above
+    counts = sorted({2, 4, os.cpu_count() or 1} - {1})
+    # Start the pool outside the timing, sized for the most workers; it lives
+    # for the whole process, and fewer workers keep fewer images in it at once
+    get_pool(counts[-1]).submit(int).result()
+    for workers in counts:
+        pooled = timed(lambda: process_images(images, width, workers=workers))
+        print(f"  process pool x{workers:<2d}       {pooled * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 250)
@@ -0,0 +1,40 @@
+import sys
+import os
+import time
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import load_article
+from enhanced_wikipedia_scraper import parse_article
+from scraper.metrics import Metrics, NULL_METRICS
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(repeat=5, calls=100000):
+    # Raw cost of one instrumented stage, then on a real parse
+    for label, metrics in (('disabled', NULL_METRICS), ('enabled', Metrics())):
+        def stages():
+            for _ in range(calls):
+                with metrics.stage('fetch'):
+                    pass
+                metrics.count('images_fetched')
+        per_call = best_of(stages, repeat) / calls
+        print(f"  {label:8s} stage + count: {per_call * 1e6:6.2f} us per call")
+
+    html = load_article('India')
+    plain = best_of(lambda: parse_article(html), repeat)
+    instrumented = best_of(lambda: parse_article(html, metrics=Metrics()), repeat)
+    print(f"  parse_article India: {plain * 1000:8.1f} ms plain | {instrumented * 1000:8.1f} ms with metrics")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+import tempfile
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import synthetic_article
+from enhanced_wikipedia_scraper import parse_article
+from scraper.article import Article
+from scraper.render import RenderFarm
+
+
+def cached_articles(count, sections=30):
+    # Extracted article dicts, as the page cache would hand them over.
+    # Images are left out so the benchmark measures layout only.
+    articles = []
+    for i in range(count):
+        title = f'Article_{i}'
+        data = parse_article(synthetic_article(title=title, sections=sections, seed=i))
+        data['images'] = []
+        articles.append((title, Article.from_dict(data, url=f'https://en.wikipedia.org/wiki/{title}').to_dict()))
+    return articles
+
+
+def main(count=16):
+    articles = cached_articles(count)
+    print(f"Rendering {count} cached articles (os.cpu_count() = {os.cpu_count()})")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        with tempfile.TemporaryDirectory() as tmp, RenderFarm(workers) as farm:
+            # Start every worker (imports and styles) before timing
+            for future in [farm.submit(*articles[0], tmp) for _ in range(workers)]:
+                future.result()
+            start = time.perf_counter()
+            for future in [farm.submit(title, data, tmp) for title, data in articles]:
+                future.result()
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"  {workers} workers: {elapsed:7.2f} s  {count / elapsed:6.2f} articles/s  x{baseline / elapsed:4.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
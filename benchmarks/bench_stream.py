@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import subprocess
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import synthetic_article
+
+
+def _status_kb(field):
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def run_mode(mode, path):
+    # Runs in a fresh interpreter: report wall time and peak RSS growth
+    # (libxml2 allocates outside the Python heap, so tracemalloc would miss it)
+    from enhanced_wikipedia_scraper import parse_article
+    from scraper.stream import collect_article, iter_article_events
+
+    def chunks():
+        with open(path, 'rb') as file:
+            while True:
+                chunk = file.read(64 * 1024)
+                if not chunk:
+                    return
+                yield chunk
+
+    before = _status_kb('VmRSS')
+    start = time.perf_counter()
+    if mode == 'full':
+        with open(path, 'rb') as file:
+            parse_article(file.read())
+    elif mode == 'collect':
+        collect_article(iter_article_events(chunks()))
+    else:
+        for _ in iter_article_events(chunks()):
+            pass
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'peak_bytes': (_status_kb('VmHWM') - before) * 1024}))
+
+
+def measure(mode, path):
+    output = subprocess.check_output([sys.executable, __file__, '--run', mode, path])
+    result = json.loads(output)
+    return result['seconds'], result['peak_bytes']
+
+
+def main():
+    # Peak RSS growth of the full-tree parse against the streaming extractor
+    with tempfile.TemporaryDirectory() as tmp:
+        for sections in (70, 280, 1120):
+            path = os.path.join(tmp, f'article-{sections}.html')
+            with open(path, 'wb') as file:
+                file.write(synthetic_article(sections=sections, images=sections // 2))
+            mb = os.path.getsize(path) / 1e6
+            line = [f"{mb:6.1f} MB HTML"]
+            for mode, label in (('full', 'full parse'), ('collect', 'stream+collect'), ('events', 'stream only')):
+                seconds, peak = measure(mode, path)
+                line.append(f"{label} {seconds:6.2f} s +{peak / 1e6:6.1f} MB")
+            print(' | '.join(line))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--run':
+        run_mode(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,36 @@
+import sys
+import os
+import time
+import tempfile
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import load_article
+from enhanced_wikipedia_scraper import parse_article, generate_enhanced_pdf
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(repeat=3):
+    # Layout cost only: images are left out
+    article = parse_article(load_article('India'))
+    print(f"India: {len(article['sections'])} sections")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, label in (('none', 'no TOC'), ('forms', 'one pass + page forms'), ('multibuild', 'multiBuild')):
+            seconds = best_of(lambda: generate_enhanced_pdf(
+                'India', article['title'], article['sections'], article['references'], [],
+                'https://en.wikipedia.org/wiki/India', article['ref_urls'],
+                output_dir=tmp, verbose=False, toc_mode=mode), repeat)
+            print(f"  {label:24s} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,227 @@
+import io
+import os
+import bz2
+import glob
+import gzip
+import random
+import re
+import zlib
+from xml.sax.saxutils import escape, quoteattr
+
+# Saved article HTML goes in benchmarks/corpus/<Title>.html (or .html.gz).
+# When a title is not saved there, a deterministic synthetic article of the
+# same shape as a large Wikipedia page (India: ~70 sections, well over 1,000 citations)
+# is generated instead, so the benchmarks always run offline.
+# Images are looked up by file name in benchmarks/corpus/images/, then in the
+# repository's images/ folder; any other image is generated.
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'corpus')
+IMAGE_DIRS = (os.path.join(CORPUS_DIR, 'images'), os.path.join(os.path.dirname(__file__), '..', 'images'))
+
+WORDS = ('india south asia country population subcontinent republic river empire trade language '
+         'culture monsoon himalaya ocean state federal parliament economy growth history ancient '
+         'dynasty kingdom temple script literature music cinema cricket festival railway').split()
+
+
+def _sentence(rng, citations, next_cite):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 24))]
+    words[0] = words[0].capitalize()
+    if rng.random() < 0.3:
+        title = rng.choice(WORDS).capitalize()
+        words[rng.randrange(len(words))] = f'<a href="/wiki/{title}" title="{title}">{title.lower()}</a>'
+    text = ' '.join(words) + '.'
+    if citations and rng.random() < 0.5:
+        cite = next_cite()
+        text += f'<sup id="cite_ref-{cite}" class="reference"><a href="#cite_note-{cite}">[{cite}]</a></sup>'
+    return text
+
+
+def _paragraph(rng, citations, next_cite):
+    return '<p>' + ' '.join(_sentence(rng, citations, next_cite) for _ in range(rng.randint(3, 7))) + '</p>\n'
+
+
+def _heading(tag, text, layout):
+    anchor = text.replace(' ', '_')
+    if layout == 'modern':
+        return (f'<div class="mw-heading mw-heading{tag[1]}"><{tag} id="{anchor}">{text}</{tag}>'
+                f'<span class="mw-editsection">[<a href="/w/index.php?action=edit">edit</a>]</span></div>\n')
+    return (f'<{tag}><span class="mw-headline" id="{anchor}">{text}</span>'
+            f'<span class="mw-editsection">[<a href="/w/index.php?action=edit">edit</a>]</span></{tag}>\n')
+
+
+def synthetic_article(title='India', sections=70, paragraphs=10, images=30, layout='modern',
+                      reflist=True, seed=1, revision=1234567):
+    rng = random.Random(seed)
+    counter = [0]
+
+    def next_cite():
+        counter[0] += 1
+        # Roughly one in five citations reuses an earlier note, as named refs do
+        if counter[0] > 5 and rng.random() < 0.2:
+            return rng.randint(1, counter[0] - 1)
+        return counter[0]
+
+    image_urls = [f'//upload.wikimedia.org/wikipedia/commons/thumb/{i % 10}/{i:02d}/Image_{i}.jpg/'
+                  f'250px-Image_{i}.jpg' for i in range(images)]
+
+    parts = ['<!DOCTYPE html><html><head><title>', title, ' - Wikipedia</title>',
+             f'<script>RLCONF={{"wgPageName":"{title}","wgRevisionId":{revision}}};</script></head><body>',
+             f'<h1 id="firstHeading" class="firstHeading">{title}</h1>',
+             '<div id="mw-content-text"><div class="mw-parser-output">\n',
+             '<table class="infobox"><tr><td>',
+             '<img src="//upload.wikimedia.org/wikipedia/en/thumb/4/41/Flag_of_India.svg/125px-Flag_of_India.svg.png" width="125" height="83">',
+             '<img src="//upload.wikimedia.org/wikipedia/commons/thumb/5/55/Emblem_of_India.svg/60px-Emblem_of_India.svg.png" width="60" height="95">',
+             '</td></tr></table>\n']
+    for _ in range(3):
+        parts.append(_paragraph(rng, True, next_cite))
+
+    image_iter = iter(image_urls)
+    for s in range(sections):
+        tag = 'h2' if s % 3 == 0 else rng.choice(['h3', 'h3', 'h4'])
+        parts.append(_heading(tag, f'{rng.choice(WORDS).capitalize()} section {s}', layout))
+        img = next(image_iter, None)
+        if img:
+            if layout == 'modern':
+                parts.append(f'<figure class="mw-default-size"><a href="/wiki/File:x.jpg" class="mw-file-description">'
+                             f'<img src="{img}" class="mw-file-element" width="250" height="180"></a>'
+                             f'<figcaption>Caption {s}</figcaption></figure>\n')
+            else:
+                parts.append(f'<div class="thumb tright"><div class="thumbinner"><a href="/wiki/File:x.jpg">'
+                             f'<img src="{img}" class="thumbimage" width="250" height="180"></a></div></div>\n')
+        for _ in range(rng.randint(max(1, paragraphs - 2), paragraphs + 2)):
+            parts.append(_paragraph(rng, True, next_cite))
+        if rng.random() < 0.3:
+            parts.append('<ul>' + ''.join(f'<li>{rng.choice(WORDS)} item {i}</li>' for i in range(rng.randint(3, 12))) + '</ul>\n')
+        if rng.random() < 0.1:
+            rows = ''.join(f'<tr><td>{rng.choice(WORDS)}</td><td>{rng.randint(1, 10 ** 6)}</td></tr>' for _ in range(10))
+            parts.append(f'<table class="wikitable">{rows}</table>\n')
+
+    parts.append('<div class="navbox">' + ''.join(f'<a href="/wiki/{w.capitalize()}">{w}</a> ' for w in WORDS * 20) + '</div>\n')
+
+    notes = ''.join(
+        f'<li id="cite_note-{n}"><span class="reference-text">{rng.choice(WORDS).capitalize()} reference {n}. '
+        f'<a rel="nofollow" class="external text" href="https://example.org/ref/{n}">Source {n}</a></span></li>\n'
+        for n in range(1, counter[0] + 1))
+    if reflist:
+        parts.append(f'<div class="reflist"><div class="mw-references-wrap"><ol class="references">{notes}</ol></div></div>\n')
+    else:
+        parts.append(f'<div class="mw-references-wrap"><ol class="references">{notes}</ol></div>\n')
+
+    parts.append('</div></div></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def synthetic_wikitext(title='India', sections=20, paragraphs=4, images=5, seed=1):
+    # Wikitext with the markup dumps are full of: an infobox, links, named
+    # and repeated <ref>s with cite templates, files, lists and tables
+    rng = random.Random(seed)
+    counter = [0]
+
+    def sentence():
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 24))]
+        words[0] = words[0].capitalize()
+        if rng.random() < 0.3:
+            link = rng.choice(WORDS).capitalize()
+            words[rng.randrange(len(words))] = f'[[{link}|{link.lower()}]]'
+        text = ' '.join(words) + '.'
+        if rng.random() < 0.5:
+            counter[0] += 1
+            n = counter[0]
+            if n > 5 and rng.random() < 0.2:
+                text += f'<ref name="r{rng.randint(1, n - 1)}" />'
+            else:
+                text += (f'<ref name="r{n}">{{{{cite web |url=https://example.org/ref/{n} '
+                         f'|title={rng.choice(WORDS).capitalize()} reference {n} |website=Source {n}}}}}</ref>')
+        return text
+
+    def paragraph():
+        return ' '.join(sentence() for _ in range(rng.randint(3, 7))) + '\n\n'
+
+    parts = ['{{Short description|Synthetic article}}\n',
+             f'{{{{Infobox country\n| conventional_long_name = {title}\n| image_flag = Flag of {title}.svg\n'
+             f'| image_coat = Emblem of {title}.svg\n}}}}\n',
+             f"'''{title}''' " + paragraph()]
+    for _ in range(2):
+        parts.append(paragraph())
+    for s in range(sections):
+        marks = '==' if s % 3 == 0 else rng.choice(['===', '===', '===='])
+        parts.append(f'{marks} {rng.choice(WORDS).capitalize()} section {s} {marks}\n')
+        if s < images:
+            parts.append(f'[[File:Image {s}.jpg|thumb|Caption with [[{rng.choice(WORDS).capitalize()}]]]]\n')
+        for _ in range(rng.randint(max(1, paragraphs - 2), paragraphs + 2)):
+            parts.append(paragraph())
+        if rng.random() < 0.3:
+            parts.append(''.join(f'* {rng.choice(WORDS)} item {i}\n' for i in range(rng.randint(3, 12))) + '\n')
+        if rng.random() < 0.1:
+            rows = ''.join(f'|-\n| {rng.choice(WORDS)} || {rng.randint(1, 10 ** 6)}\n' for _ in range(10))
+            parts.append(f'{{| class="wikitable"\n{rows}|}}\n\n')
+    parts.append('== References ==\n{{Reflist}}\n\n[[Category:Synthetic articles]]\n')
+    return ''.join(parts)
+
+
+def _page_xml(page_id, page):
+    redirect = f'    <redirect title={quoteattr(page["redirect"])} />\n' if page.get('redirect') else ''
+    return (f'  <page>\n    <title>{escape(page["title"])}</title>\n    <ns>{page.get("ns", 0)}</ns>\n'
+            f'    <id>{page_id}</id>\n{redirect}    <revision>\n      <id>{page.get("revision", page_id * 10)}</id>\n'
+            f'      <text bytes="{len(page["text"])}" xml:space="preserve">{escape(page["text"])}</text>\n'
+            f'    </revision>\n  </page>\n')
+
+
+def write_multistream_dump(dump_path, index_path, pages, pages_per_stream=100):
+    # Write pages ({'title', 'text'} and optionally 'ns', 'redirect',
+    # 'revision') in the layout of pages-articles-multistream.xml.bz2: a
+    # header stream, one bz2 stream per `pages_per_stream` pages, a footer
+    # stream, and an index of "offset:page_id:title" lines
+    pages = list(pages)
+    index = []
+    with open(dump_path, 'wb') as dump:
+        dump.write(bz2.compress(b'<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" '
+                                b'version="0.11" xml:lang="en">\n  <siteinfo>\n    <sitename>Wikipedia</sitename>\n'
+                                b'  </siteinfo>\n'))
+        for start in range(0, len(pages), pages_per_stream):
+            offset = dump.tell()
+            chunk = []
+            for page_id, page in enumerate(pages[start:start + pages_per_stream], start + 1):
+                chunk.append(_page_xml(page_id, page))
+                index.append(f'{offset}:{page_id}:{page["title"]}\n')
+            dump.write(bz2.compress(''.join(chunk).encode('utf-8')))
+        dump.write(bz2.compress(b'</mediawiki>\n'))
+    with bz2.open(index_path, 'wt', encoding='utf-8') as file:
+        file.writelines(index)
+
+
+def load_article(title='India', **kwargs):
+    # Prefer a saved copy of the real page; fall back to the synthetic article
+    for path in (os.path.join(CORPUS_DIR, f'{title}.html'), os.path.join(CORPUS_DIR, f'{title}.html.gz')):
+        if os.path.exists(path):
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rb') as file:
+                return file.read()
+    return synthetic_article(title, **kwargs)
+
+
+def corpus_titles():
+    names = glob.glob(os.path.join(CORPUS_DIR, '*.html')) + glob.glob(os.path.join(CORPUS_DIR, '*.html.gz'))
+    titles = sorted({os.path.basename(name).split('.html')[0] for name in names})
+    return titles or ['India']
+
+
+def synthetic_image(name):
+    # Deterministic photo-like JPEG. Thumbnail names ("250px-...") get that
+    # width, anything else the size of a full camera image.
+    from PIL import Image
+    match = re.match(r'(\d+)px-', name)
+    width = int(match.group(1)) if match else 3000
+    size = (width, max(1, width * 2 // 3))
+    image = Image.effect_noise(size, 20 + zlib.crc32(name.encode()) % 40).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def load_image(name):
+    for directory in IMAGE_DIRS:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                return file.read()
+    return synthetic_image(name)
@@ -0,0 +1,114 @@
+# Reference copies of the original implementations, kept so the benchmarks
+# and equivalence tests can compare the current code against them.
+
+from scraper.utils import clean_text
+
+
+def extract_sections_two_pass(main_content):
+    # Original section extraction: a pass over the children, then a second pass
+    # over every div.mw-heading that scans find_next_siblings() for content
+    sections = []
+    current_heading = None
+    current_content = []
+
+    for element in main_content.children:
+        if element.name in ['h2', 'h3', 'h4']:
+            if current_heading and current_content:
+                sections.append({
+                    'heading': current_heading,
+                    'level': int(current_heading[0][1]),
+                    'content': '\n\n'.join(current_content)
+                })
+            heading_text = element.get_text().replace('[edit]', '').strip()
+            current_heading = (element.name, heading_text)
+            current_content = []
+        elif element.name == 'p' and element.text.strip():
+            if current_heading:
+                current_content.append(clean_text(element.text))
+            else:
+                if not sections:
+                    sections.append({
+                        'heading': ('h1', 'Introduction'),
+                        'level': 1,
+                        'content': clean_text(element.text)
+                    })
+                else:
+                    sections[0]['content'] += '\n\n' + clean_text(element.text)
+        elif element.name in ['ul', 'ol', 'table'] and current_heading:
+            list_content = clean_text(element.get_text().strip())
+            if list_content:
+                current_content.append(list_content)
+
+    if current_heading and current_content:
+        sections.append({
+            'heading': current_heading,
+            'level': int(current_heading[0][1]),
+            'content': '\n\n'.join(current_content)
+        })
+
+    for div in main_content.find_all('div', {'class': 'mw-heading'}):
+        heading_element = div.find(['h2', 'h3', 'h4'])
+        if heading_element:
+            heading_text = heading_element.get_text().replace('[edit]', '').strip()
+            heading_level = int(heading_element.name[1])
+            content_elements = []
+            for sibling in div.find_next_siblings():
+                if sibling.name in ['h2', 'h3', 'h4'] or sibling.find(['h2', 'h3', 'h4']):
+                    break
+                if sibling.name == 'p' and sibling.text.strip():
+                    content_elements.append(clean_text(sibling.text))
+            if content_elements:
+                sections.append({
+                    'heading': (heading_element.name, heading_text),
+                    'level': heading_level,
+                    'content': '\n\n'.join(content_elements)
+                })
+
+    return sections
+
+
+def resolve_citations_by_search(soup, content_div, limit=30):
+    # Original fallback when there is no div.reflist: one full-tree
+    # soup.find() per citation, capped at the first `limit` citations
+    references = []
+    ref_urls = []
+    citations = content_div.find_all('sup', {'class': 'reference'})
+    for citation in citations[:limit]:
+        cite_id = citation.find('a').get('href', '').replace('#', '')
+        if cite_id:
+            cite_note = soup.find('li', {'id': cite_id})
+            if cite_note:
+                ref_text = cite_note.get_text()
+                references.append(ref_text)
+                ref_link = cite_note.find('a', {'class': 'external'})
+                if ref_link and 'href' in ref_link.attrs:
+                    ref_urls.append({'text': ref_text[:50] + '...', 'url': ref_link['href']})
+    return references, ref_urls
+
+
+def prepare_image_inline(data, max_width):
+    # Original inline image handling from generate_enhanced_pdf: full decode,
+    # default-filter resize, RGBA pasted onto a new image, re-encoded on the
+    # calling thread
+    import io
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    if width > max_width:
+        ratio = max_width / width
+        new_width = max_width
+        new_height = int(height * ratio)
+        img = img.resize((new_width, new_height))
+    else:
+        new_width, new_height = width, height
+
+    img_byte_arr = io.BytesIO()
+    if img.mode == 'RGBA':
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[3])
+        rgb_img.save(img_byte_arr, format='JPEG')
+    else:
+        img.save(img_byte_arr, format=img.format or 'JPEG')
+    img_byte_arr.seek(0)
+    return img_byte_arr, new_width, new_height
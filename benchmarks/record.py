@@ -0,0 +1,39 @@
+import sys
+import os
+import gzip
+from urllib.parse import unquote
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.corpus import CORPUS_DIR, IMAGE_DIRS
+from enhanced_wikipedia_scraper import parse_article
+from scraper import http_client
+from scraper.images import prefetch_images
+
+
+def record(title, get=None):
+    # Save the live article (gzipped) and every image it uses into the corpus
+    get = get or http_client.get
+    response = get(f'https://en.wikipedia.org/wiki/{title}')
+    if response.status_code != 200:
+        raise ValueError(f'Failed to fetch page: {response.status_code}')
+    os.makedirs(IMAGE_DIRS[0], exist_ok=True)
+    with gzip.open(os.path.join(CORPUS_DIR, f'{title}.html.gz'), 'wb') as file:
+        file.write(response.content)
+
+    images = parse_article(response.content)['images']
+    saved = 0
+    for url, data in prefetch_images(images, get=get).items():
+        if data is not None:
+            with open(os.path.join(IMAGE_DIRS[0], unquote(url.rsplit('/', 1)[-1])), 'wb') as file:
+                file.write(data)
+            saved += 1
+    return len(response.content), saved
+
+
+if __name__ == "__main__":
+    # Usage: record.py India Web_scraping ...
+    for title in sys.argv[1:]:
+        size, saved = record(title)
+        print(f"{title}: {size / 1e6:.2f} MB of HTML, {saved} images")
@@ -0,0 +1,151 @@
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+
+from benchmarks.corpus import corpus_titles
+from benchmarks.standin import StandinServer
+from enhanced_wikipedia_scraper import parse_article, generate_enhanced_pdf, generate_summarized_csv
+from scraper.extract import extract_sections, extract_references
+from scraper.image_cache import ImageCache
+from scraper.images import prefetch_images, process_images, get_pool
+
+# Offline, per-stage benchmark of the whole pipeline. Articles come from the
+# corpus (benchmarks/corpus, see record.py) through a local HTTP stand-in.
+# Results are written as JSON; --compare flags stages slower than a baseline.
+
+STAGES = ('fetch', 'parse', 'extract', 'references', 'image_fetch', 'image_process', 'pdf', 'csv')
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_article(title, get, work_dir, repeat, parser='html.parser'):
+    url = f'https://en.wikipedia.org/wiki/{title}'
+    stages = {}
+
+    stages['fetch'], content = best_of(lambda: get(url).content, repeat)
+    stages['parse'], soup = best_of(lambda: BeautifulSoup(content, parser), repeat)
+    main_content = soup.find('div', {'class': 'mw-parser-output'})
+    content_div = soup.find('div', {'id': 'mw-content-text'})
+    stages['extract'], _ = best_of(lambda: extract_sections(main_content), repeat)
+    stages['references'], _ = best_of(lambda: extract_references(soup, content_div), repeat)
+
+    article = parse_article(content, parser=parser)
+    stages['image_fetch'], fetched = best_of(lambda: prefetch_images(article['images'], get=get), repeat)
+    images = [data for data in fetched.values() if data is not None]
+    stages['image_process'], _ = best_of(lambda: process_images(images, 250, workers=os.cpu_count()), repeat)
+
+    # PDF build measures layout: the images it embeds are already cached
+    cache = ImageCache(root=os.path.join(work_dir, 'image-cache'))
+    prefetch_images(article['images'], get=get, cache=cache)
+    for width in (250, 450):
+        process_images(images, width, cache=cache)
+    stages['pdf'], _ = best_of(lambda: generate_enhanced_pdf(
+        title, article['title'], article['sections'], article['references'], article['images'], url,
+        article['ref_urls'], get=get, output_dir=work_dir, verbose=False, image_cache=cache), repeat)
+    stages['csv'], _ = best_of(lambda: generate_summarized_csv(
+        title, article['title'], article['sections'], url, output_dir=work_dir, verbose=False), repeat)
+    cache.close()
+
+    return {
+        'html_bytes': len(content),
+        'sections': len(article['sections']),
+        'references': len(article['references']),
+        'images': len(images),
+        'stages': stages
+    }
+
+
+def run_suite(titles=None, repeat=3, parser='html.parser'):
+    titles = titles or corpus_titles()
+    # Start the image process pool before anything is timed
+    get_pool().submit(int).result()
+    results = {}
+    with StandinServer() as server, tempfile.TemporaryDirectory() as work_dir:
+        get = server.client_get()
+        for title in titles:
+            results[title] = bench_article(title, get, work_dir, repeat, parser)
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parser': parser,
+        'repeat': repeat,
+        'articles': results
+    }
+
+
+def compare(report, baseline, threshold=1.2):
+    # Return (title, stage, old, new) for every stage more than `threshold` times slower
+    regressions = []
+    for title, article in report['articles'].items():
+        old_stages = baseline.get('articles', {}).get(title, {}).get('stages', {})
+        for stage, seconds in article['stages'].items():
+            old = old_stages.get(stage)
+            if old and seconds > old * threshold:
+                regressions.append((title, stage, old, seconds))
+    return regressions
+
+
+def print_report(report):
+    for title, article in report['articles'].items():
+        print(f"{title}: {article['html_bytes'] / 1e6:.2f} MB HTML, {article['sections']} sections, "
+              f"{article['references']} references, {article['images']} images")
+        for stage in STAGES:
+            print(f"  {stage:14s} {article['stages'][stage] * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline per-stage benchmark suite')
+    parser.add_argument('titles', nargs='*', help='corpus titles (default: all)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--parser', default='html.parser')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='baseline results file to check against')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    report = run_suite(args.titles, repeat=args.repeat, parser=args.parser)
+    print_report(report)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        for title, stage, old, new in regressions:
+            print(f"REGRESSION {title} {stage}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
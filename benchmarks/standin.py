@@ -0,0 +1,168 @@
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote, parse_qs
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+
+from benchmarks.corpus import load_article, load_image
+from scraper.extract import heading_of
+from scraper.http_client import HttpClient
+from scraper.page_cache import parse_revision
+
+# Hosts whose URLs are redirected to the stand-in
+WIKI_HOSTS = ('en.wikipedia.org', 'upload.wikimedia.org')
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    # Keep-alive handler serving corpus articles under /wiki/ and images by file name
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+        self.server.requests.append(path)
+        if path == '/w/api.php':
+            body = self.server.api({name: values[0] for name, values in parse_qs(parts.query).items()})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        elif (body := self.server.lookup(path)) is None:
+            self.send_response(404)
+            body = b'not found'
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=UTF-8' if path.startswith('/wiki/') else 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def split_sections(html):
+    # An article page cut up the way action=parse serves it: the outline, and
+    # per section its HTML (with subsections and the notes it cites), without
+    # the navbox and the page-wide reference list
+    soup = BeautifulSoup(html, 'html.parser')
+    main_content = soup.find('div', {'class': 'mw-parser-output'})
+    notes = {li['id']: li for li in soup.find_all('li', id=True)}
+    outline = []
+    parts = [[]]
+    stack = []
+    for element in main_content.children:
+        if element.name is None:
+            continue
+        if {'navbox', 'reflist', 'mw-references-wrap'} & set(element.get('class') or []):
+            continue
+        heading = heading_of(element)
+        if heading is not None:
+            level = int(heading.name[1])
+            while stack and stack[-1] >= level:
+                stack.pop()
+            stack.append(level)
+            outline.append({'toclevel': len(stack), 'level': str(level), 'line': heading.get_text().strip(),
+                            'number': str(len(outline) + 1), 'index': str(len(outline) + 1),
+                            'anchor': heading.get('id', '')})
+            parts.append([])
+        parts[-1].append(element)
+
+    def section_html(index):
+        elements = list(parts[index])
+        if index:
+            level = int(outline[index - 1]['level'])
+            for following in range(index + 1, len(parts)):
+                if int(outline[following - 1]['level']) <= level:
+                    break
+                elements.extend(parts[following])
+        cited = {}
+        for element in elements:
+            for sup in element.find_all('sup', {'class': 'reference'}):
+                link = sup.find('a')
+                note = notes.get(link.get('href', '').lstrip('#')) if link else None
+                if note is not None:
+                    cited.setdefault(note['id'], str(note))
+        references = ('<div class="mw-references-wrap"><ol class="references">' + ''.join(cited.values())
+                      + '</ol></div>') if cited else ''
+        return ('<div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">'
+                + ''.join(str(element) for element in elements) + references + '</div>')
+
+    return {'title': soup.find('h1', {'id': 'firstHeading'}).get_text(), 'revid': parse_revision(html),
+            'sections': outline, 'section_html': section_html}
+
+
+class StandinServer(ThreadingHTTPServer):
+    # Local, offline stand-in for en.wikipedia.org and upload.wikimedia.org.
+    # Responses are built once and kept, so serving costs the same every run.
+    daemon_threads = True
+
+    def __init__(self, articles=None):
+        super().__init__(('127.0.0.1', 0), StandinHandler)
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+        # articles: optional {title: html} served instead of the corpus
+        self._bodies = {f'/wiki/{title}': html for title, html in (articles or {}).items()}
+        self.requests = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._split = {}
+
+    def lookup(self, path):
+        with self._lock:
+            if path not in self._bodies:
+                if path.startswith('/wiki/'):
+                    self._bodies[path] = load_article(path[len('/wiki/'):])
+                elif path.rsplit('.', 1)[-1].lower() in ('jpg', 'jpeg', 'png', 'gif', 'svg'):
+                    self._bodies[path] = load_image(path.rsplit('/', 1)[-1])
+                else:
+                    self._bodies[path] = None
+            return self._bodies[path]
+
+    def api(self, params):
+        # Minimal action=parse: prop=sections for the outline, section=N for one section's HTML
+        page = params.get('page', '').replace(' ', '_')
+        html = self.lookup(f'/wiki/{page}') if params.get('action') == 'parse' else None
+        if html is None:
+            return json.dumps({'error': {'code': 'missingtitle',
+                                         'info': "The page you specified doesn't exist."}}).encode('utf-8')
+        with self._lock:
+            if page not in self._split:
+                self._split[page] = split_sections(html)
+            split = self._split[page]
+        parse = {'title': split['title'], 'pageid': 1, 'revid': split['revid']}
+        if 'section' in params:
+            parse['text'] = split['section_html'](int(params['section']))
+        else:
+            parse['sections'] = split['sections']
+        return json.dumps({'parse': parse}).encode('utf-8')
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def client_get(self, client=None):
+        # A `get` for the scraper that sends Wikipedia URLs here instead,
+        # through a real keep-alive HTTP client
+        client = client or HttpClient()
+
+        def get(url, **kwargs):
+            parts = urlsplit(url)
+            if parts.netloc in WIKI_HOSTS:
+                url = self.url + parts.path + (f'?{parts.query}' if parts.query else '')
+            return client.get(url, **kwargs)
+        return get
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -5,6 +5,119 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
+from scraper.batch import scrape_batch
+from scraper.crawl import crawl
+from scraper.dump import dump_batch
+from scraper.metrics import Metrics
+from scraper.store import ArticleStore, render_stored
+from scraper.summary import SummaryWriter
+from scraper.search import SearchIndex
+from scraper.service import serve, DEFAULT_ADDRESS
+
+def write_metrics(metrics, path):
+    # Prometheus text format for .prom files, JSON otherwise
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(metrics.to_prometheus() if path.endswith('.prom') else metrics.to_json())
+    print(f"Metrics saved to {path}")
+
+def pop_option(args, name):
+    # Remove "--name value" from args; returns (value or None, remaining args)
+    if name not in args:
+        return None, args
+    position = args.index(name)
+    return args[position + 1], args[:position] + args[position + 2:]
+
+def run_batch(args):
+    # Usage: main_enhanced.py --batch topics.txt [output_dir] [options] (or a single topic)
+    #    or: main_enhanced.py Topic_One Topic_Two ... [options]
+    # Options: --metrics report.json|report.prom, --store articles.sqlite,
+    #          --summary summaries.csv|.jsonl|.parquet (one file for the whole batch),
+    #          --index search_index/ (full-text index of the sections),
+    #          --image-memory MB (spool images to disk, holding at most MB per render)
+    metrics_file, args = pop_option(args, '--metrics')
+    store_file, args = pop_option(args, '--store')
+    summary_file, args = pop_option(args, '--summary')
+    index_dir, args = pop_option(args, '--index')
+    image_memory, args = pop_option(args, '--image-memory')
+    metrics = Metrics() if metrics_file else None
+    store = ArticleStore(store_file) if store_file else None
+    search_index = SearchIndex(index_dir) if index_dir else None
+    
+    if args[0] == '--batch':
+        topics = args[1]
+        output_dir = args[2] if len(args) > 2 else None
+    else:
+        topics = args
+        output_dir = None
+    
+    # PDFs are laid out in worker processes, one per core
+    # Section summaries of every topic go to one file
+    summary_writer = SummaryWriter(summary_file or os.path.join(output_dir or '', 'wikipedia_summaries.csv'))
+    results = scrape_batch(topics, output_dir=output_dir, render_workers=os.cpu_count(), metrics=metrics,
+                           store=store, summary_writer=summary_writer, search_index=search_index,
+                           image_memory=int(float(image_memory) * 1024 * 1024) if image_memory else None)
+    summary_writer.close()
+    failed = [r for r in results if 'error' in r]
+    
+    print(f"\nBatch completed: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    for r in failed:
+        print(f"  {r['topic']}: {r['error']}")
+    print(f"Summaries saved to {summary_writer.path}")
+    if metrics_file:
+        write_metrics(metrics, metrics_file)
+    if store is not None:
+        store.close()
+    if search_index is not None:
+        search_index.close()
+
+def run_crawl(args):
+    # Usage: main_enhanced.py --crawl Seed_Topic [max_depth] [frontier.db]
+    # Running the same command again resumes an interrupted crawl
+    seed = args[1]
+    max_depth = int(args[2]) if len(args) > 2 else 2
+    db_path = args[3] if len(args) > 3 else f'{seed}_crawl.db'
+    stats = crawl([seed], db_path, max_depth=max_depth, render=True)
+    print(f"\nCrawl finished: {stats['crawled']} pages this run, {stats['done']} in total, "
+          f"{stats['failed']} failed, {stats['pending']} still pending")
+
+def run_dump(args):
+    # Usage: main_enhanced.py --dump pages-articles-multistream.xml.bz2 multistream-index.txt.bz2 [Topic ...]
+    # Without topics every article in the dump is rendered, one dump stream per core
+    titles = args[3:] or None
+    succeeded = failed = 0
+    for result in dump_batch(args[1], args[2], titles=titles):
+        if 'error' in result:
+            failed += 1
+            print(f"  {result['topic']}: {result['error']}")
+        else:
+            succeeded += 1
+    print(f"\nDump run completed: {succeeded} succeeded, {failed} failed")
+
+def run_from_store(args):
+    # Usage: main_enhanced.py --from-store articles.sqlite [Topic ...]
+    # Rebuilds the PDFs and CSVs of stored articles (all of them without topics), offline
+    with ArticleStore(args[1]) as store:
+        results = render_stored(store, titles=args[2:] or None, process_workers=os.cpu_count())
+    failed = [r for r in results if 'error' in r]
+    print(f"\nRendered {len(results) - len(failed)} stored articles, {len(failed)} failed")
+    for r in failed:
+        print(f"  {r['topic']}: {r['error']}")
+
+def run_search(args):
+    # Usage: main_enhanced.py --search search_index/ words to look for
+    with SearchIndex(args[1]) as search_index:
+        results = search_index.search(' '.join(args[2:]))
+    if not results:
+        print("No matching sections")
+    for r in results:
+        print(f"{r['score']:6.2f}  {r['title']} > {r['heading']}  {r['url'] or ''}")
+
+def run_service(args):
+    # Usage: main_enhanced.py --serve [host:port | unix:/path/to.sock] [output_dir]
+    # Keeps pools, connections and caches warm between jobs; see the readme for the API
+    address = args[1] if len(args) > 1 else DEFAULT_ADDRESS
+    options = {'output_dir': args[2]} if len(args) > 2 else {}
+    serve(address, render_workers=os.cpu_count(), **options)
 
 def main():
     print("Enhanced Wikipedia Scraper")
@@ -12,14 +125,40 @@ def main():
     print("This tool scrapes Wikipedia articles and generates comprehensive PDF files")
     print("with table of contents, all sections, images, and references.\n")
     
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        run_service(sys.argv[1:])
+        return
+    
+    if len(sys.argv) > 2 and sys.argv[1] == '--crawl':
+        run_crawl(sys.argv[1:])
+        return
+    
+    if len(sys.argv) > 2 and sys.argv[1] == '--search':
+        run_search(sys.argv[1:])
+        return
+    
+    if len(sys.argv) > 2 and sys.argv[1] == '--from-store':
+        run_from_store(sys.argv[1:])
+        return
+    
+    if len(sys.argv) > 3 and sys.argv[1] == '--dump':
+        run_dump(sys.argv[1:])
+        return
+    
+    # Several topics (or a topics file) run as a concurrent batch
+    if len(sys.argv) > 2 or (len(sys.argv) > 1 and sys.argv[1].startswith('--')):
+        run_batch(sys.argv[1:])
+        return
+    
     # Option to provide topic as command line argument
+    # Images are decoded in a process pool, one worker per core
     if len(sys.argv) > 1:
         topic = sys.argv[1]
         print(f"Scraping topic: {topic}")
-        result = scrape_enhanced_wikipedia(topic)
+        result = scrape_enhanced_wikipedia(topic, process_workers=os.cpu_count())
     else:
         # Otherwise prompt the user
-        result = scrape_enhanced_wikipedia()
+        result = scrape_enhanced_wikipedia(process_workers=os.cpu_count())
     
     if 'error' in result:
         print(f"Error: {result['error']}")
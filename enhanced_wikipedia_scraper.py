@@ -1,209 +1,247 @@
 import sys
 import os
-import requests
 from bs4 import BeautifulSoup
 import io
-from PIL import Image
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table
-from reportlab.platypus.tableofcontents import TableOfContents
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.platypus.tables import TableStyle
-from reportlab.lib.units import inch
+import threading
 
 # Add the project root to sys.path for proper imports
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from scraper.utils import clean_text
+from scraper.extract import extract_sections, extract_references, extract_links, image_candidates, select_images
+from scraper import http_client
+from scraper.images import prefetch_images, process_images, iter_image_batches, ImageSpool
+from scraper.images import decoded_size, fitting_width
+from scraper.image_cache import content_hash, get_default_cache
+from scraper.page_cache import get_default_page_cache, parse_revision
+from scraper.stream import stream_article, collect_article
+from scraper.parse_api import ParseApiClient, SectionedArticle
+from scraper.article import Article
+from scraper.metrics import NULL_METRICS
+from scraper.summary import first_sentence, first_paragraph
 
-def scrape_enhanced_wikipedia(topic=None):
+# reportlab and Pillow are imported inside the rendering functions, so
+# extract-only callers never pay for loading them
+
+# Paragraph styles, built on first render (see get_styles)
+_styles = None
+_styles_lock = threading.Lock()
+
+def parse_article(content, parser='html.parser', metrics=None):
+    metrics = metrics or NULL_METRICS
+    
+    # Parse the HTML content ('lxml' is a faster drop-in when installed)
+    with metrics.stage('parse'):
+        soup = BeautifulSoup(content, parser)
+        metrics.add_bytes('parse', len(content))
+    
+    # Get the page title
+    title = soup.find('h1', {'id': 'firstHeading'}).text
+    
+    # Find the main content
+    content_div = soup.find('div', {'id': 'mw-content-text'})
+    
+    # Get the main content area
+    main_content = content_div.find('div', {'class': 'mw-parser-output'})
+    if not main_content:
+        main_content = content_div
+    
+    # Extract all sections with headings, for both the bare and the mw-heading layouts
+    with metrics.stage('extract'):
+        sections = extract_sections(main_content)
+    
+    # Extract references with URLs
+    with metrics.stage('references'):
+        references, ref_urls = extract_references(soup, content_div)
+    
+    # Internal links, for crawling
+    links = extract_links(main_content)
+    
+    # Extract images from various sources: thumbnails, the infobox and the main content area
+    images = select_images(*image_candidates(content_div))
+    
+    return {
+        'title': title,
+        'sections': sections,
+        'references': references,
+        'ref_urls': ref_urls,
+        'images': images,
+        'links': links
+    }
+
+def extract_article(topic, get=None, page_cache=None, cache_only=False, parser='html.parser', streaming=False,
+                    metrics=None, dump=None, parse_api=False, headings=None):
+    # Fetch and extract one article as a compact Article, with no image
+    # downloads and no rendering. Raises ValueError if the page can't be fetched.
+    # With parse_api, headings limits the article to the top-level sections
+    # holding those headings, and only those are fetched.
+    get = get or http_client.get
+    metrics = metrics or NULL_METRICS
+    # page_cache=None uses the shared on-disk cache, False disables caching
+    pages = get_default_page_cache() if page_cache is None else (page_cache or None)
+    if headings is not None and not parse_api:
+        raise ValueError('Fetching only some sections needs parse_api=True')
+    if streaming and cache_only:
+        raise ValueError('Streaming mode always fetches the page, so it cannot be cache_only')
+    
+    # A DumpReader (scraper.dump) serves the article from a local dump, with no network
+    if dump is not None:
+        with metrics.stage('dump'):
+            article = dump.article(topic)
+        count_article(article, metrics)
+        return article
+    
+    # The parse API sends section HTML only, without the page's navboxes and chrome
+    if parse_api:
+        with metrics.stage('fetch'):
+            sectioned = SectionedArticle(ParseApiClient(get=get, parser=parser, metrics=metrics), topic)
+            article = sectioned.to_article(sectioned.parts_of(headings) if headings is not None else None)
+        count_article(article, metrics)
+        return article
+    
+    # Wikipedia URL
+    url = f'https://en.wikipedia.org/wiki/{topic}'
+    
+    # Streaming mode extracts while downloading and keeps no tree or HTML
+    # copy, so it bypasses the page cache, which stores whole pages
+    if streaming:
+        with metrics.stage('stream'):
+            article = Article.from_dict(collect_article(stream_article(url, get=get)), url=url)
+        count_article(article, metrics)
+        return article
+    
+    # Send a request to the Wikipedia page, revalidating any cached copy
+    with metrics.stage('fetch'):
+        if pages is not None:
+            page = pages.fetch(url, get=get, cache_only=cache_only)
+        else:
+            response = get(url)
+            page = {'status': response.status_code, 'content': response.content, 'extracted': None,
+                    'revision': parse_revision(response.content) if response.status_code == 200 else None,
+                    'error': f'Failed to fetch page: {response.status_code}'}
+        if page.get('content'):
+            metrics.add_bytes('fetch', len(page['content']))
+    
+    # Check if the page was fetched successfully
+    if page['status'] != 200:
+        raise ValueError(page['error'])
+    
+    # An unchanged page (304) reuses the extraction from the previous run
+    extracted = page['extracted']
+    if extracted is None:
+        extracted = parse_article(page['content'], parser=parser, metrics=metrics)
+        if pages is not None:
+            pages.store_extracted(url, extracted)
+    else:
+        metrics.count('page_cache_hits')
+    article = Article.from_dict(extracted, url=url, revision=page['revision'])
+    count_article(article, metrics)
+    return article
+
+def count_article(article, metrics):
+    metrics.count('sections', len(article.sections))
+    metrics.count('references', len(article.references))
+    metrics.count('images', len(article.images))
+
+def scrape_enhanced_wikipedia(topic=None, get=None, output_dir=None, verbose=True, image_workers=8,
+                              image_cache=None, page_cache=None, cache_only=False, parser='html.parser',
+                              streaming=False, extract_only=False, metrics=None, dump=None, store=None,
+                              summary_writer=None, search_index=None, parse_api=False, image_memory=None,
+                              process_workers=None, headings=None):
     # Get the topic from the user if not provided
     if not topic:
         topic = input("Enter a topic to scrape from Wikipedia: ")
     
-    # Wikipedia URL
-    url = f'https://en.wikipedia.org/wiki/{topic}'
+    # Network calls go through `get` so batch runs can throttle them per host
+    get = get or http_client.get
     
     try:
-        # Send a request to the Wikipedia page
-        response = requests.get(url)
+        article = extract_article(topic, get=get, page_cache=page_cache, cache_only=cache_only,
+                                  parser=parser, streaming=streaming, metrics=metrics, dump=dump,
+                                  parse_api=parse_api, headings=headings)
         
-        # Check if the page was fetched successfully
-        if response.status_code == 200:
-            # Parse the HTML content
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Get the page title
-            title = soup.find('h1', {'id': 'firstHeading'}).text
-            
-            # Find the main content
-            content_div = soup.find('div', {'id': 'mw-content-text'})
-            
-            # Extract all sections with headings
-            sections = []
-            current_heading = None
-            current_content = []
-            
-            # Get the main content area
-            main_content = content_div.find('div', {'class': 'mw-parser-output'})
-            if not main_content:
-                main_content = content_div
-            
-            # Process all elements in the main content - improved to capture all sections
-            for element in main_content.children:
-                if element.name in ['h2', 'h3', 'h4']:
-                    # Save previous section if exists
-                    if current_heading and current_content:
-                        sections.append({
-                            'heading': current_heading,
-                            'level': int(current_heading[0][1]),  # h2 -> 2, h3 -> 3, etc.
-                            'content': '\n\n'.join(current_content)
-                        })
-                    
-                    # Start new section
-                    heading_text = element.get_text().replace('[edit]', '').strip()
-                    current_heading = (element.name, heading_text)
-                    current_content = []
-                elif element.name == 'p' and element.text.strip():
-                    if current_heading:
-                        current_content.append(clean_text(element.text))
-                    else:
-                        # This is intro paragraph before any heading
-                        if not sections:
-                            sections.append({
-                                'heading': ('h1', 'Introduction'),
-                                'level': 1,
-                                'content': clean_text(element.text)
-                            })
-                        else:
-                            # Append to introduction
-                            sections[0]['content'] += '\n\n' + clean_text(element.text)
-                # Also capture lists and tables within sections
-                elif element.name in ['ul', 'ol', 'table'] and current_heading:
-                    list_content = clean_text(element.get_text().strip())
-                    if list_content:
-                        current_content.append(list_content)
-            
-            # Add the last section if exists
-            if current_heading and current_content:
-                sections.append({
-                    'heading': current_heading,
-                    'level': int(current_heading[0][1]),
-                    'content': '\n\n'.join(current_content)
-                })
-                
-            # Also check for any sections that might be in divs (sometimes Wikipedia uses this structure)
-            for div in main_content.find_all('div', {'class': 'mw-heading'}):
-                heading_element = div.find(['h2', 'h3', 'h4'])
-                if heading_element:
-                    heading_text = heading_element.get_text().replace('[edit]', '').strip()
-                    heading_level = int(heading_element.name[1])
-                    content_elements = []
-                    
-                    # Get all paragraph siblings until next heading
-                    for sibling in div.find_next_siblings():
-                        if sibling.name in ['h2', 'h3', 'h4'] or sibling.find(['h2', 'h3', 'h4']):
-                            break
-                        if sibling.name == 'p' and sibling.text.strip():
-                            content_elements.append(clean_text(sibling.text))
-                    
-                    if content_elements:
-                        sections.append({
-                            'heading': (heading_element.name, heading_text),
-                            'level': heading_level,
-                            'content': '\n\n'.join(content_elements)
-                        })
-            
-            # Extract references with URLs
-            references = []
-            ref_urls = []
-            ref_section = soup.find('div', {'class': 'reflist'})
-            if ref_section:
-                for ref in ref_section.find_all('li'):
-                    ref_text = ref.get_text()
-                    references.append(ref_text)
-                    
-                    # Try to extract URLs from references
-                    ref_link = ref.find('a', {'class': 'external'})
-                    if ref_link and 'href' in ref_link.attrs:
-                        ref_urls.append({'text': ref_text[:50] + '...', 'url': ref_link['href']})
-            
-            # If no references found in reflist, try to find citations
-            if not references:
-                citations = content_div.find_all('sup', {'class': 'reference'})
-                for citation in citations[:30]:  # Increased limit to 30 citations
-                    cite_id = citation.find('a').get('href', '').replace('#', '')
-                    if cite_id:
-                        cite_note = soup.find('li', {'id': cite_id})
-                        if cite_note:
-                            ref_text = cite_note.get_text()
-                            references.append(ref_text)
-                            
-                            # Try to extract URL
-                            ref_link = cite_note.find('a', {'class': 'external'})
-                            if ref_link and 'href' in ref_link.attrs:
-                                ref_urls.append({'text': ref_text[:50] + '...', 'url': ref_link['href']})
-            
-            # Extract images from various sources
-            images = []
-            
-            # Get thumbnail images
-            for img in content_div.find_all('img', {'class': 'thumbimage'})[:15]:
-                if 'src' in img.attrs:
-                    img_src = img['src']
-                    if not img_src.startswith('http'):
-                        img_src = 'https:' + img_src
-                    images.append(img_src)
-            
-            # Get images from infobox
-            infobox = content_div.find('table', {'class': 'infobox'})
-            if infobox:
-                for img in infobox.find_all('img')[:5]:
-                    if 'src' in img.attrs:
-                        img_src = img['src']
-                        if not img_src.startswith('http'):
-                            img_src = 'https:' + img_src
-                        if img_src not in images:  # Avoid duplicates
-                            images.append(img_src)
-            
-            # Get images from the main content area
-            for img in content_div.find_all('img')[:20]:
-                if 'src' in img.attrs and img.get('width') and int(img.get('width', 0)) > 100:
-                    img_src = img['src']
-                    if not img_src.startswith('http'):
-                        img_src = 'https:' + img_src
-                    if img_src not in images:  # Avoid duplicates
-                        images.append(img_src)
-            
-            # Generate enhanced PDF with table of contents
-            generate_enhanced_pdf(topic, title, sections, references, images, url, ref_urls)
-            
-            # Generate summarized CSV
-            generate_summarized_csv(topic, title, sections, url)
-            
-            print(f"\nEnhanced PDF for {title} has been generated successfully!")
-            print(f"File saved as: {topic}_enhanced_wikipedia.pdf")
-            print(f"Summarized CSV saved as: {topic}_wikipedia_summary.csv")
-            
-            return {
-                'title': title,
-                'sections': sections,
-                'references': references,
-                'images': images,
-                'url': url
-            }
-        else:
-            print(f"Error: Unable to fetch page for {topic}. HTTP Status Code: {response.status_code}")
-            return {'error': f'Failed to fetch page: {response.status_code}'}
+        # Keep a structured copy (scraper.store.ArticleStore); unchanged
+        # revisions are skipped, and so are partial articles
+        if store is not None and headings is None:
+            store.upsert([article])
+        # Make the sections searchable (scraper.search.SearchIndex)
+        if search_index is not None and headings is None:
+            search_index.add_article(article.title, article.url, article.sections, article.revision)
+        
+        # Text-only callers get the Article itself: no images, PDF or CSV
+        if extract_only:
+            return article
+        
+        return render_article(topic, article.to_dict(), get=get, output_dir=output_dir, verbose=verbose,
+                              image_workers=image_workers, image_cache=image_cache, metrics=metrics,
+                              summary_writer=summary_writer, image_memory=image_memory,
+                              process_workers=process_workers)
     
     except Exception as e:
-        print(f"An error occurred: {e}")
+        if verbose:
+            print(f"An error occurred: {e}")
         return {'error': str(e)}
 
-def generate_enhanced_pdf(topic, title, sections, references, images, url, ref_urls=None):
-    pdf_file = f'{topic}_enhanced_wikipedia.pdf'
-    doc = SimpleDocTemplate(pdf_file, pagesize=letter, topMargin=20, bottomMargin=20, leftMargin=30, rightMargin=30)
+def render_article(topic, data, get=None, output_dir=None, verbose=True, image_workers=8, image_cache=None,
+                   process_workers=None, metrics=None, summary_writer=None, image_memory=None):
+    # Write the PDF and CSV for an extracted article (the dict Article.to_dict returns).
+    # With a summary_writer (scraper.summary.SummaryWriter) the summary rows go
+    # there instead of a CSV of their own; summary_writer=False writes no summary.
+    # image_memory (bytes) bounds the images held in memory while rendering.
+    title = data['title']
+    sections = data['sections']
+    references = data['references']
+    images = data['images']
+    url = data['url']
+    
+    # Generate enhanced PDF with table of contents
+    pdf_file = generate_enhanced_pdf(topic, title, sections, references, images, url, data['ref_urls'],
+                                     get=get, output_dir=output_dir, verbose=verbose,
+                                     image_workers=image_workers, image_cache=image_cache,
+                                     process_workers=process_workers, metrics=metrics, image_memory=image_memory)
+    
+    # Generate summarized CSV
+    if summary_writer is None:
+        csv_file = generate_summarized_csv(topic, title, sections, url, output_dir=output_dir, verbose=verbose,
+                                           metrics=metrics)
+    elif summary_writer:
+        with (metrics or NULL_METRICS).stage('csv'):
+            summary_writer.write_article(topic, title, url, sections)
+        csv_file = summary_writer.path
+    else:
+        csv_file = None
+    
+    if verbose:
+        print(f"\nEnhanced PDF for {title} has been generated successfully!")
+        print(f"File saved as: {pdf_file}")
+        if csv_file:
+            print(f"Summarized CSV saved as: {csv_file}")
+    
+    return {
+        'title': title,
+        'sections': sections,
+        'references': references,
+        'images': images,
+        'url': url,
+        'pdf_file': pdf_file,
+        'csv_file': csv_file
+    }
+
+def file_stem(topic):
+    # Topics name the output files; path separators ("AC/DC", "../x") are
+    # replaced so a topic can only ever name a file inside output_dir
+    return topic.replace('/', '_').replace('\\', '_').replace('\0', '')
+
+def output_path(filename, output_dir=None):
+    # Outputs land in the working directory unless a batch run asks otherwise
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, filename)
+    return filename
+
+def build_styles():
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    
     styles = getSampleStyleSheet()
     
     # Create enhanced custom styles
@@ -270,13 +308,145 @@ def generate_enhanced_pdf(topic, title, sections, references, images, url, ref_u
         alignment=1  # Center alignment
     )
     
-    toc_style = ParagraphStyle(
-        'TOC',
-        parent=styles['Normal'],
-        fontSize=12,
-        leading=16,
-        spaceBefore=6
-    )
+    # Table of contents lines, by heading level
+    toc_levels = [
+        ParagraphStyle(name='TOC1', fontSize=14, leading=16, leftIndent=20, textColor=colors.darkblue),
+        ParagraphStyle(name='TOC2', fontSize=12, leading=14, leftIndent=40),
+        ParagraphStyle(name='TOC3', fontSize=10, leading=12, leftIndent=60)
+    ]
+    
+    return {
+        'title': title_style,
+        'h1': h1_style,
+        'h2': h2_style,
+        'h3': h3_style,
+        'normal': normal_style,
+        'url': url_style,
+        'caption': caption_style,
+        'toc_levels': toc_levels
+    }
+
+def get_styles():
+    # Paragraph styles are built once per process and shared by every render
+    global _styles
+    with _styles_lock:
+        if _styles is None:
+            _styles = build_styles()
+        return _styles
+
+def embeddable(image):
+    # reportlab takes a spooled image by path and processed bytes as a file object
+    return image if isinstance(image, str) else io.BytesIO(image)
+
+def spool_images(images, max_bytes, spool, get=None, image_workers=8, cache=None, process_workers=None,
+                 metrics=None, verbose=True):
+    # The image pipeline of generate_enhanced_pdf under a memory ceiling of
+    # max_bytes: half of it for downloads, held or in flight (see
+    # iter_image_batches), and half for decoding. Each batch is processed and
+    # written to the spool (scraper.images.ImageSpool) before more is fetched.
+    # An image that needs more than the decoding half at 250px is processed
+    # on its own at a smaller width that fits, and counted as images_reduced;
+    # one that fits at no width is left out and counted as images_over_memory.
+    # Returns (ready, single) for layout, with file paths in place of JPEG bytes.
+    metrics = metrics or NULL_METRICS
+    fetch_budget = max_bytes // 2
+    decode_budget = max_bytes - fetch_budget
+    ready = []
+    # Original bytes of the latest ready image, redone at 450px if it ends up the odd one out
+    last = None
+    batches = iter_image_batches(images, fetch_budget, get=get, max_workers=image_workers, cache=cache,
+                                 metrics=metrics)
+    while True:
+        with metrics.stage('image_fetch'):
+            batch = next(batches, None)
+            if batch is not None:
+                metrics.add_bytes('image_fetch', sum(len(data) for _, data in batch if data is not None))
+        if batch is None:
+            break
+        loaded = []
+        for img_url, data in batch:
+            if data is None:
+                if verbose:
+                    print(f"Error processing image {img_url}: download failed")
+                continue
+            loaded.append((img_url, data, decoded_size(data, 250)))
+        del batch
+        fits = [i for i, (_, _, size) in enumerate(loaded) if size is None or size <= decode_budget]
+        # Only as many images are decoded at once as fit the budget together
+        workers = process_workers
+        largest = max((loaded[i][2] or 0 for i in fits), default=0)
+        if workers and largest:
+            workers = min(workers, max(1, decode_budget // largest))
+        results = [None] * len(loaded)
+        widths = [250] * len(loaded)
+        left_out = set()
+        with metrics.stage('image_process'):
+            processed = process_images([loaded[i][1] for i in fits], 250, cache, workers=workers, metrics=metrics)
+            for i, result in zip(fits, processed):
+                results[i] = result
+            for i, (img_url, data, size) in enumerate(loaded):
+                if size is None or size <= decode_budget:
+                    continue
+                # Decoded alone, drafted down far enough to fit, or not at all
+                width = fitting_width(data, 250, decode_budget)
+                if width is None:
+                    metrics.count('images_over_memory')
+                    left_out.add(i)
+                    if verbose:
+                        print(f"Error processing image {img_url}: too large to decode within {decode_budget} bytes")
+                    continue
+                metrics.count('images_reduced')
+                widths[i] = width
+                results[i] = process_images([data], width, cache, workers=1, metrics=metrics)[0]
+        for i, ((img_url, data, _), result) in enumerate(zip(loaded, results)):
+            if i in left_out:
+                continue
+            if result is None:
+                metrics.count('images_failed')
+                if verbose:
+                    print(f"Error processing image {img_url}: cannot decode image")
+                continue
+            key = content_hash(data) if cache is not None else None
+            ready.append((img_url, None, spool.add(result, key, widths[i])))
+            last = data
+        # Let go of this batch before the next one is downloaded
+        del loaded, processed, results
+    single = None
+    if len(ready) % 2:
+        img_url, _, _ = ready.pop()
+        # It fitted at 250px or less, so a width up to 450px fits as well
+        width = fitting_width(last, 450, decode_budget)
+        with metrics.stage('image_process'):
+            result = process_images([last], width, cache, workers=1, metrics=metrics)[0]
+        key = content_hash(last) if cache is not None else None
+        single = (img_url, spool.add(result, key, width) if result is not None else None)
+    return ready, single
+
+def generate_enhanced_pdf(topic, title, sections, references, images, url, ref_urls=None,
+                          get=None, output_dir=None, verbose=True, image_workers=8, image_cache=None,
+                          process_workers=None, toc_mode='forms', metrics=None, image_memory=None):
+    metrics = metrics or NULL_METRICS
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table
+    from reportlab.platypus.tables import TableStyle
+    from scraper.toc import SectionIndex
+    
+    get = get or http_client.get
+    # image_cache=None uses the shared on-disk cache, False disables caching
+    cache = get_default_cache() if image_cache is None else (image_cache or None)
+    pdf_file = output_path(f'{file_stem(topic)}_enhanced_wikipedia.pdf', output_dir)
+    # Lay out into a temporary file and move it into place when complete,
+    # so a crashed or concurrent render never leaves a truncated PDF behind
+    tmp_file = f'{pdf_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+    doc = SimpleDocTemplate(tmp_file, pagesize=letter, topMargin=20, bottomMargin=20, leftMargin=30, rightMargin=30)
+    styles = get_styles()
+    title_style = styles['title']
+    h1_style = styles['h1']
+    h2_style = styles['h2']
+    h3_style = styles['h3']
+    normal_style = styles['normal']
+    url_style = styles['url']
+    caption_style = styles['caption']
     
     # Create the PDF content
     elements = []
@@ -289,21 +459,10 @@ def generate_enhanced_pdf(topic, title, sections, references, images, url, ref_u
     elements.append(Paragraph(f"<b>Source URL:</b> <a href='{url}' color='blue'>{url}</a>", url_style))
     elements.append(Spacer(1, 20))
     
-    # Create and add Table of Contents
-    toc = TableOfContents()
-    toc.levelStyles = [
-        ParagraphStyle(name='TOC1', fontSize=14, leading=16, leftIndent=20, textColor=colors.darkblue),
-        ParagraphStyle(name='TOC2', fontSize=12, leading=14, leftIndent=40),
-        ParagraphStyle(name='TOC3', fontSize=10, leading=12, leftIndent=60)
-    ]
-    
-    # Add TOC header
-    elements.append(Paragraph("<b>Table of Contents</b>", h1_style))
-    elements.append(Spacer(1, 10))
-    elements.append(toc)
-    elements.append(Spacer(1, 30))
-    
-    # Add content sections with proper headings for TOC
+    # Add content sections with proper headings for TOC. The section index
+    # gives every heading a named destination and tracks its page.
+    index = SectionIndex(toc_mode, styles['toc_levels'])
+    section_elements = []
     for section in sections:
         heading_level = section['level']
         heading_text = section['heading'][1]
@@ -312,156 +471,118 @@ def generate_enhanced_pdf(topic, title, sections, references, images, url, ref_u
         # Select appropriate heading style based on level
         if heading_level == 1:
             heading_style = h1_style
-            bookmark_name = f"h1-{heading_text.lower().replace(' ', '-')}"
         elif heading_level == 2:
             heading_style = h2_style
-            bookmark_name = f"h2-{heading_text.lower().replace(' ', '-')}"
         else:  # level 3 or higher
             heading_style = h3_style
-            bookmark_name = f"h3-{heading_text.lower().replace(' ', '-')}"
         
         # Add heading with bookmark for TOC
-        heading_para = Paragraph(f"<a name='{bookmark_name}'/>{heading_text}", heading_style)
-        elements.append(heading_para)
-        elements.append(Spacer(1, 8))
+        section_elements.append(index.heading(heading_text, heading_level, heading_style))
+        section_elements.append(Spacer(1, 8))
         
         # Add content paragraphs
         for paragraph in content_text.split('\n\n'):
             if paragraph.strip():
-                elements.append(Paragraph(paragraph, normal_style))
-                elements.append(Spacer(1, 8))
+                section_elements.append(Paragraph(paragraph, normal_style))
+                section_elements.append(Spacer(1, 8))
+    
+    # Add Table of Contents ahead of the sections
+    if toc_mode != 'none':
+        elements.append(Paragraph("<b>Table of Contents</b>", h1_style))
+        elements.append(Spacer(1, 10))
+        elements.extend(index.flowables())
+        elements.append(Spacer(1, 30))
+    elements.extend(section_elements)
     
     # Add images section
+    spool = None
     if images:
         elements.append(Paragraph("<b>Images</b>", h1_style))
         elements.append(Spacer(1, 10))
         
-        # Process images in pairs when possible
-        i = 0
-        while i < len(images):
+        # With image_memory, images are processed a batch at a time and spooled
+        # to files; otherwise they are all downloaded and kept in memory
+        spool = ImageSpool(cache) if image_memory else None
+        if spool is not None:
             try:
-                # First image in the pair
-                img1_url = images[i]
-                img1_response = requests.get(img1_url)
-                
-                if img1_response.status_code == 200:
-                    img1 = Image.open(io.BytesIO(img1_response.content))
-                    
-                    # Check if we have a second image to pair
-                    if i + 1 < len(images):
-                        # Try to get second image
-                        img2_url = images[i + 1]
-                        img2_response = requests.get(img2_url)
-                        
-                        if img2_response.status_code == 200:
-                            # We have two images to display side by side
-                            img2 = Image.open(io.BytesIO(img2_response.content))
-                            
-                            # Calculate sizes for side-by-side display
-                            max_width = 250  # Max width for each image when side by side
-                            
-                            # Resize first image
-                            width1, height1 = img1.size
-                            if width1 > max_width:
-                                ratio = max_width / width1
-                                new_width1 = max_width
-                                new_height1 = int(height1 * ratio)
-                                img1 = img1.resize((new_width1, new_height1))
-                            else:
-                                new_width1, new_height1 = width1, height1
-                                
-                            # Resize second image
-                            width2, height2 = img2.size
-                            if width2 > max_width:
-                                ratio = max_width / width2
-                                new_width2 = max_width
-                                new_height2 = int(height2 * ratio)
-                                img2 = img2.resize((new_width2, new_height2))
-                            else:
-                                new_width2, new_height2 = width2, height2
-                            
-                            # Save images to memory - convert RGBA to RGB if needed
-                            img1_byte_arr = io.BytesIO()
-                            if img1.mode == 'RGBA':
-                                rgb_img1 = Image.new('RGB', img1.size, (255, 255, 255))
-                                rgb_img1.paste(img1, mask=img1.split()[3])  # Use alpha channel as mask
-                                rgb_img1.save(img1_byte_arr, format='JPEG')
-                            else:
-                                img1.save(img1_byte_arr, format=img1.format or 'JPEG')
-                            img1_byte_arr.seek(0)
-                            
-                            img2_byte_arr = io.BytesIO()
-                            if img2.mode == 'RGBA':
-                                rgb_img2 = Image.new('RGB', img2.size, (255, 255, 255))
-                                rgb_img2.paste(img2, mask=img2.split()[3])  # Use alpha channel as mask
-                                rgb_img2.save(img2_byte_arr, format='JPEG')
-                            else:
-                                img2.save(img2_byte_arr, format=img2.format or 'JPEG')
-                            img2_byte_arr.seek(0)
-                            
-                            # Create image objects for PDF
-                            img1_for_pdf = RLImage(img1_byte_arr, width=new_width1, height=new_height1)
-                            img2_for_pdf = RLImage(img2_byte_arr, width=new_width2, height=new_height2)
-                            
-                            # Create a table to hold the images side by side
-                            image_table = [[img1_for_pdf, img2_for_pdf]]
-                            t = Table(image_table, colWidths=[260, 260])
-                            t.setStyle(TableStyle([('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                                  ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                                                  ('LEFTPADDING', (0, 0), (-1, -1), 5),
-                                                  ('RIGHTPADDING', (0, 0), (-1, -1), 5)]))
-                            elements.append(t)
-                            elements.append(Spacer(1, 6))
-                            
-                            # Add captions in a table too
-                            caption_table = [[Paragraph(f"<i>Image source: {img1_url}</i>", caption_style),
-                                             Paragraph(f"<i>Image source: {img2_url}</i>", caption_style)]]
-                            c = Table(caption_table, colWidths=[260, 260])
-                            c.setStyle(TableStyle([('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                                  ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                                                  ('LEFTPADDING', (0, 0), (-1, -1), 5),
-                                                  ('RIGHTPADDING', (0, 0), (-1, -1), 5)]))
-                            elements.append(c)
-                            elements.append(Spacer(1, 15))
-                            
-                            # Increment by 2 since we processed two images
-                            i += 2
-                            continue
-                    
-                    # If we're here, we're processing a single image
-                    # Resize image if needed
-                    width, height = img1.size
-                    max_width = 450  # Max width for single image
-                    if width > max_width:
-                        ratio = max_width / width
-                        new_width = max_width
-                        new_height = int(height * ratio)
-                        img1 = img1.resize((new_width, new_height))
-                    else:
-                        new_width, new_height = width, height
-                    
-                    # Save image to memory - convert RGBA to RGB if needed
-                    img1_byte_arr = io.BytesIO()
-                    if img1.mode == 'RGBA':
-                        rgb_img = Image.new('RGB', img1.size, (255, 255, 255))
-                        rgb_img.paste(img1, mask=img1.split()[3])  # Use alpha channel as mask
-                        rgb_img.save(img1_byte_arr, format='JPEG')
-                    else:
-                        img1.save(img1_byte_arr, format=img1.format or 'JPEG')
-                    img1_byte_arr.seek(0)
-                    
-                    # Add image to PDF
-                    img_for_pdf = RLImage(img1_byte_arr, width=new_width, height=new_height)
-                    elements.append(img_for_pdf)
-                    elements.append(Spacer(1, 6))
-                    elements.append(Paragraph(f"<i>Image source: {img1_url}</i>", caption_style))
-                    elements.append(Spacer(1, 15))
-                    
-                    # Increment by 1 since we processed one image
-                    i += 1
-            except Exception as e:
-                print(f"Error processing image {images[i]}: {e}")
-                i += 1  # Move to next image even if there's an error
+                ready, single = spool_images(images, image_memory, spool, get=get, image_workers=image_workers,
+                                             cache=cache, process_workers=process_workers, metrics=metrics,
+                                             verbose=verbose)
+            except Exception:
+                spool.close()
+                raise
+        else:
+            # Download all unique images up front; layout below only uses these bytes
+            with metrics.stage('image_fetch'):
+                fetched = prefetch_images(images, get=get, max_workers=image_workers, cache=cache,
+                                          metrics=metrics)
+                loaded = [(img_url, data) for img_url, data in fetched.items() if data is not None]
+                metrics.add_bytes('image_fetch', sum(len(data) for _, data in loaded))
+            if verbose:
+                for img_url, data in fetched.items():
+                    if data is None:
+                        print(f"Error processing image {img_url}: download failed")
+        
+            # Decode and shrink every image (in process_workers processes) before layout.
+            # Images are laid out in pairs at 250px, so that is the width they
+            # are all processed at; an odd one out is redone at the 450px single width.
+            with metrics.stage('image_process'):
+                processed = process_images([data for _, data in loaded], 250, cache,
+                                           workers=process_workers, metrics=metrics)
+            ready = []
+            for (img_url, data), result in zip(loaded, processed):
+                if result is None:
+                    metrics.count('images_failed')
+                    if verbose:
+                        print(f"Error processing image {img_url}: cannot decode image")
+                else:
+                    ready.append((img_url, data, result))
+            single = None
+            if len(ready) % 2:
+                img_url, data, _ = ready.pop()
+                with metrics.stage('image_process'):
+                    single = (img_url, process_images([data], 450, cache, workers=1, metrics=metrics)[0])
+        
+        # Process images in pairs
+        for (img1_url, _, img1), (img2_url, _, img2) in zip(ready[::2], ready[1::2]):
+            # Create image objects for PDF
+            img1_for_pdf = RLImage(embeddable(img1[0]), width=img1[1], height=img1[2])
+            img2_for_pdf = RLImage(embeddable(img2[0]), width=img2[1], height=img2[2])
+            
+            # Create a table to hold the images side by side
+            image_table = [[img1_for_pdf, img2_for_pdf]]
+            t = Table(image_table, colWidths=[260, 260])
+            t.setStyle(TableStyle([('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                                  ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                                  ('LEFTPADDING', (0, 0), (-1, -1), 5),
+                                  ('RIGHTPADDING', (0, 0), (-1, -1), 5)]))
+            elements.append(t)
+            elements.append(Spacer(1, 6))
+            
+            # Add captions in a table too
+            caption_table = [[Paragraph(f"<i>Image source: {img1_url}</i>", caption_style),
+                             Paragraph(f"<i>Image source: {img2_url}</i>", caption_style)]]
+            c = Table(caption_table, colWidths=[260, 260])
+            c.setStyle(TableStyle([('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                                  ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                                  ('LEFTPADDING', (0, 0), (-1, -1), 5),
+                                  ('RIGHTPADDING', (0, 0), (-1, -1), 5)]))
+            elements.append(c)
+            elements.append(Spacer(1, 15))
+        
+        # A single image at the end gets the full width
+        if single is not None:
+            img1_url, img1 = single
+        if single is not None and img1 is None:
+            metrics.count('images_failed')
+            if verbose:
+                print(f"Error processing image {img1_url}: cannot decode image")
+        elif single is not None:
+            img_for_pdf = RLImage(embeddable(img1[0]), width=img1[1], height=img1[2])
+            elements.append(img_for_pdf)
+            elements.append(Spacer(1, 6))
+            elements.append(Paragraph(f"<i>Image source: {img1_url}</i>", caption_style))
+            elements.append(Spacer(1, 15))
     
     # Add references with URLs when available
     if references:
@@ -483,14 +604,26 @@ def generate_enhanced_pdf(topic, title, sections, references, images, url, ref_u
                 elements.append(Spacer(1, 5))
     
     # Build the PDF
-    doc.build(elements)
-    print(f"Enhanced PDF with table of contents saved to '{pdf_file}'")
+    try:
+        with metrics.stage('layout'):
+            index.build(doc, elements)
+            metrics.add_bytes('layout', os.path.getsize(tmp_file))
+        os.replace(tmp_file, pdf_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        if spool is not None:
+            spool.close()
+    if verbose:
+        print(f"Enhanced PDF with table of contents saved to '{pdf_file}'")
+    return pdf_file
 
-def generate_summarized_csv(topic, title, sections, url):
+def generate_summarized_csv(topic, title, sections, url, output_dir=None, verbose=True, metrics=None):
     import csv
+    metrics = metrics or NULL_METRICS
     
     # Create CSV file name
-    csv_file = f'{topic}_wikipedia_summary.csv'
+    csv_file = output_path(f'{file_stem(topic)}_wikipedia_summary.csv', output_dir)
     
     # Prepare data for CSV
     # For the summarized version, we'll include:
@@ -498,43 +631,44 @@ def generate_summarized_csv(topic, title, sections, url):
     # 2. Introduction (first section)
     # 3. Section headings with brief summaries
     
-    with open(csv_file, mode='w', newline='', encoding='utf-8') as file:
+    with metrics.stage('csv'), open(csv_file, mode='w', newline='', encoding='utf-8') as file:
         writer = csv.writer(file)
         
         # Write header
         writer.writerow(["Topic", "Content"])
         
-        # Write title and introduction
+        # Sections are read in a single pass, so a section stream works as well as a list
         intro_content = ""
-        if sections and sections[0]['heading'][1] == 'Introduction':
-            intro_content = sections[0]['content']
-            # Limit to first paragraph for summary
-            if '\n\n' in intro_content:
-                intro_content = intro_content.split('\n\n')[0]
+        section_lines = []
+        for index, section in enumerate(sections):
+            if section['heading'][1] == 'Introduction':
+                if index == 0:
+                    # Limit to first paragraph for summary
+                    intro_content = first_paragraph(section['content'])
+                continue
+            
+            # Add section headings to the summary
+            level = section['level']
+            heading = section['heading'][1]
+            indent = '  ' * (level - 1)
+            section_lines.append(f"{indent}- {heading}\n")
+            
+            # Add a brief excerpt from each section (first sentence or limited characters)
+            content = section['content']
+            if content:
+                section_lines.append(f"{indent}  {first_sentence(content)}\n")
         
         # Create a summary that includes the title, URL, and introduction
-        summary = f"Title: {title}\n\nURL: {url}\n\n{intro_content}\n\nSections:\n"
-        
-        # Add section headings to the summary
-        for section in sections:
-            if section['heading'][1] != 'Introduction':
-                level = section['level']
-                heading = section['heading'][1]
-                indent = '  ' * (level - 1)
-                summary += f"{indent}- {heading}\n"
-                
-                # Add a brief excerpt from each section (first sentence or limited characters)
-                content = section['content']
-                if content:
-                    first_sentence = content.split('.')[0] + '.'
-                    if len(first_sentence) > 100:
-                        first_sentence = first_sentence[:97] + '...'
-                    summary += f"{indent}  {first_sentence}\n"
+        summary = f"Title: {title}\n\nURL: {url}\n\n{intro_content}\n\nSections:\n" + ''.join(section_lines)
         
         # Write the summary to CSV
         writer.writerow([topic, summary])
+        file.flush()
+        metrics.add_bytes('csv', os.path.getsize(csv_file))
     
-    print(f"Summarized CSV saved to '{csv_file}'")
+    if verbose:
+        print(f"Summarized CSV saved to '{csv_file}'")
+    return csv_file
 
 # Main execution
 if __name__ == "__main__":
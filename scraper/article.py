@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+
+
+# Compact records for extracted articles. __slots__ keeps per-object overhead
+# low when thousands of sections and references are held at once.
+
+@dataclass
+class Section:
+    __slots__ = ('heading', 'level', 'content')
+    heading: tuple  # (tag, text), e.g. ('h2', 'History')
+    level: int
+    content: str
+
+    def to_dict(self):
+        return {'heading': self.heading, 'level': self.level, 'content': self.content}
+
+
+@dataclass
+class Reference:
+    __slots__ = ('text', 'url')
+    text: str
+    url: str  # first external link, or None
+
+
+@dataclass
+class ImageRef:
+    __slots__ = ('url',)
+    url: str
+
+
+@dataclass
+class Article:
+    __slots__ = ('title', 'url', 'revision', 'sections', 'references', 'images', 'links')
+    title: str
+    url: str
+    revision: int  # None when the page did not say
+    sections: list
+    references: list
+    images: list
+    links: list  # internal link titles; empty from the streaming extractor
+
+    @classmethod
+    def from_dict(cls, data, url=None, revision=None):
+        # Build from the dict parse_article and collect_article produce
+        # (also what the page cache stores as JSON). ref_urls lists the
+        # links of the references that have one, each with the 'index' of
+        # its reference.
+        urls = {ref_url['index']: ref_url['url'] for ref_url in data.get('ref_urls', [])}
+        references = [Reference(text, urls.get(i)) for i, text in enumerate(data['references'])]
+        return cls(
+            title=data['title'],
+            url=url or data.get('url'),
+            revision=revision if revision is not None else data.get('revision'),
+            sections=[Section(tuple(s['heading']), s['level'], s['content']) for s in data['sections']],
+            references=references,
+            images=[ImageRef(image) for image in data['images']],
+            links=list(data.get('links', []))
+        )
+
+    def to_dict(self):
+        # The title/sections/references/ref_urls/images dict the writers take
+        return {
+            'title': self.title,
+            'url': self.url,
+            'revision': self.revision,
+            'sections': [section.to_dict() for section in self.sections],
+            'references': [reference.text for reference in self.references],
+            'ref_urls': [{'text': reference.text[:50] + '...', 'url': reference.url, 'index': i}
+                         for i, reference in enumerate(self.references) if reference.url],
+            'images': [image.url for image in self.images],
+            'links': list(self.links)
+        }
@@ -0,0 +1,116 @@
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
+from scraper import http_client
+from scraper.metrics import Metrics
+from scraper.render import RenderFarm
+
+
+class HostLimiter:
+    # Caps the number of in-flight requests per host, shared by all batch workers
+    def __init__(self, per_host_limit=4):
+        self.per_host_limit = per_host_limit
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def semaphore(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._semaphores[host]
+
+    def wrap(self, get):
+        # Return a drop-in replacement for `get` that waits for a free slot on the host
+        def limited_get(url, *args, **kwargs):
+            with self.semaphore(url):
+                return get(url, *args, **kwargs)
+        return limited_get
+
+
+def load_topics(path):
+    # One topic per line; blank lines and '#' comments are ignored
+    topics = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                topics.append(line)
+    return topics
+
+
+def scrape_batch(topics, max_workers=8, per_host_limit=4, output_dir=None, get=None, scrape=None,
+                 render_workers=None, metrics=None, store=None, summary_writer=None, search_index=None,
+                 image_memory=None):
+    # Accept a list of topics, the path of a topics file, or a single topic
+    if isinstance(topics, str):
+        topics = load_topics(topics) if os.path.isfile(topics) else [topics]
+
+    scrape = scrape or scrape_enhanced_wikipedia
+    get = get or http_client.get
+    limited_get = HostLimiter(per_host_limit).wrap(get)
+
+    # With render_workers, threads only fetch and extract; PDF layout is
+    # handed to a pool of worker processes so it can use every core
+    farm = RenderFarm(render_workers, image_memory) if render_workers else None
+
+    def run(topic):
+        # With batch metrics, every topic gets its own recorder (sharing the
+        # batch hooks); its report goes into the entry and the batch total
+        topic_metrics = Metrics(metrics.hooks) if metrics is not None else None
+        options = {'metrics': topic_metrics} if topic_metrics is not None else {}
+        if store is not None:
+            options['store'] = store
+        if summary_writer is not None:
+            options['summary_writer'] = summary_writer
+        if search_index is not None:
+            options['search_index'] = search_index
+        if image_memory is not None and farm is None:
+            options['image_memory'] = image_memory
+        try:
+            if farm is None:
+                result = scrape(topic, get=limited_get, output_dir=output_dir, verbose=False, **options)
+            else:
+                article = scrape(topic, get=limited_get, output_dir=output_dir, verbose=False, extract_only=True,
+                                 **options)
+                if isinstance(article, dict):
+                    result = article  # {'error': ...} when the page could not be fetched
+                else:
+                    data = article.to_dict()
+                    # Worker processes can't share the open summary file, so
+                    # its rows are written here while the PDF is laid out there
+                    future = farm.submit(topic, data, output_dir, with_metrics=topic_metrics is not None,
+                                         summary=summary_writer is None)
+                    if summary_writer is not None:
+                        summary_writer.write_article(topic, data['title'], data['url'], data['sections'])
+                    result = future.result()
+                    if summary_writer is not None:
+                        result['csv_file'] = summary_writer.path
+                    if topic_metrics is not None:
+                        topic_metrics.merge(result.pop('metrics'))
+        except Exception as e:
+            entry = {'topic': topic, 'error': str(e)}
+        else:
+            if 'error' in result:
+                entry = {'topic': topic, 'error': result['error']}
+            else:
+                entry = {'topic': topic, 'result': result}
+        if topic_metrics is not None:
+            entry['metrics'] = topic_metrics.report()
+            metrics.merge(entry['metrics'])
+        return entry
+
+    # Results come back in the same order as the topics were given
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(run, topics))
+    finally:
+        if farm is not None:
+            farm.close()
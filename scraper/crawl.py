@@ -0,0 +1,202 @@
+import sys
+import os
+import math
+import sqlite3
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from enhanced_wikipedia_scraper import extract_article, render_article
+from scraper import http_client
+
+# Namespace prefixes of non-article pages (Wikipedia:, File:, Talk: and so on).
+# Links are only followed into the namespaces a crawl allows; '' is articles.
+NAMESPACES = {
+    'Talk', 'User', 'User talk', 'Wikipedia', 'Wikipedia talk', 'File', 'File talk', 'MediaWiki',
+    'MediaWiki talk', 'Template', 'Template talk', 'Help', 'Help talk', 'Category', 'Category talk',
+    'Portal', 'Portal talk', 'Draft', 'Draft talk', 'TimedText', 'TimedText talk', 'Module',
+    'Module talk', 'Special', 'Media',
+}
+
+
+def canonical_title(title):
+    # "india#History", "India" and "India_(country)" written as
+    # "India%20%28country%29" all map to one key: underscores, decoded,
+    # first letter upper-cased
+    title = unquote(title).split('#')[0].replace(' ', '_').strip('_')
+    return title[:1].upper() + title[1:]
+
+
+def namespace_of(title):
+    prefix, colon, _ = title.partition(':')
+    prefix = prefix.replace('_', ' ')
+    return prefix if colon and prefix in NAMESPACES else ''
+
+
+class SeenSet:
+    # Bloom filter over canonical titles: about 1.2 MB for a million titles at
+    # a 1% false-positive rate. A false positive only means a page is skipped.
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        # Returns True if the item was (probably) not there before
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+
+class Frontier:
+    # Crawl state on disk (SQLite): every discovered title with its depth and
+    # state, so an interrupted crawl picks up where it stopped
+    def __init__(self, path):
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS frontier (
+            title TEXT PRIMARY KEY,
+            depth INTEGER NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            parent TEXT,
+            detail TEXT
+        )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (state, depth)')
+        # Pages that were being fetched when the last run stopped go back in the queue
+        self._db.execute("UPDATE frontier SET state = 'pending' WHERE state = 'fetching'")
+        self._db.commit()
+
+    def titles(self):
+        for (title,) in self._db.execute('SELECT title FROM frontier'):
+            yield title
+
+    def add(self, entries):
+        # entries: (title, depth, parent) tuples; titles already known are kept as they are
+        self._db.executemany('INSERT OR IGNORE INTO frontier (title, depth, parent) VALUES (?, ?, ?)', entries)
+
+    def claim(self, limit):
+        # Next pending titles, shallowest first (breadth-first)
+        rows = self._db.execute("SELECT title, depth FROM frontier WHERE state = 'pending' "
+                                "ORDER BY depth, rowid LIMIT ?", (limit,)).fetchall()
+        self._db.executemany("UPDATE frontier SET state = 'fetching' WHERE title = ?", [(t,) for t, _ in rows])
+        self._db.commit()
+        return rows
+
+    def state(self, title):
+        # The title's state, or None if the frontier does not have it
+        row = self._db.execute('SELECT state FROM frontier WHERE title = ?', (title,)).fetchone()
+        return row[0] if row else None
+
+    def mark(self, title, state, detail=None):
+        # detail: the error for 'failed', the canonical title for 'redirect'
+        self._db.execute('UPDATE frontier SET state = ?, detail = ? WHERE title = ?', (state, detail, title))
+
+    def commit(self):
+        self._db.commit()
+
+    def counts(self):
+        return dict(self._db.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state'))
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+
+def crawl(seeds, db_path, max_depth=2, namespaces=('',), max_pages=None, workers=8, get=None,
+          page_cache=None, render=False, output_dir=None, on_article=None, capacity=1000000, verbose=True,
+          store=None):
+    # Breadth-first crawl from `seeds`, following internal links up to
+    # max_depth hops. Each page is extracted with extract_article (and, with
+    # render=True, written out as PDF/CSV); on_article(article, depth) is
+    # called for every new page, and with a store (scraper.store.ArticleStore)
+    # each batch of pages is upserted in one transaction. Running again with
+    # the same db_path resumes.
+    get = get or http_client.get
+    frontier = Frontier(db_path)
+    seen = SeenSet(capacity)
+    for title in frontier.titles():
+        seen.add(title)
+
+    seeds = [canonical_title(seed) for seed in seeds]
+    frontier.add([(seed, 0, None) for seed in seeds if seen.add(seed)])
+    frontier.commit()
+
+    def fetch(title):
+        try:
+            article = extract_article(title, get=get, page_cache=page_cache)
+            if render:
+                render_article(title, article.to_dict(), get=get, output_dir=output_dir, verbose=False)
+            return title, article, None
+        except Exception as e:
+            return title, None, str(e)
+
+    crawled = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while max_pages is None or crawled < max_pages:
+            limit = workers * 4 if max_pages is None else min(workers * 4, max_pages - crawled)
+            batch = frontier.claim(limit)
+            if not batch:
+                break
+            depths = dict(batch)
+            fetched = []
+            for title, article, error in executor.map(fetch, depths):
+                depth = depths[title]
+                if article is None:
+                    frontier.mark(title, 'failed', error)
+                    if verbose:
+                        print(f"Failed {title}: {error}")
+                    continue
+
+                # A redirect lands on a page that may already be known under
+                # its canonical title. If that title is still pending, this
+                # fetch stands in for it; if it was fetched, there is nothing new here.
+                canonical = canonical_title(article.title)
+                if canonical != title:
+                    frontier.mark(title, 'redirect', canonical)
+                    state = frontier.state(canonical)
+                    if state is None:
+                        seen.add(canonical)
+                        frontier.add([(canonical, depth, title)])
+                    elif state != 'pending':
+                        continue
+                frontier.mark(canonical, 'done')
+
+                crawled += 1
+                fetched.append(article)
+                if on_article is not None:
+                    on_article(article, depth)
+                if verbose:
+                    print(f"[{depth}] {article.title}")
+
+                if depth < max_depth:
+                    new = []
+                    for link in article.links:
+                        link = canonical_title(link)
+                        if namespace_of(link) in namespaces and seen.add(link):
+                            new.append((link, depth + 1, canonical))
+                    frontier.add(new)
+            if store is not None:
+                store.upsert(fetched)
+            frontier.commit()
+
+    counts = frontier.counts()
+    frontier.close()
+    return {'crawled': crawled, 'pending': counts.get('pending', 0), 'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0), 'redirects': counts.get('redirect', 0)}
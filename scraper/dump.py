@@ -0,0 +1,266 @@
+import sys
+import os
+import bz2
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scraper.article import Article
+from scraper.wikitext import parse_wikitext
+
+# Offline input from a pages-articles-multistream.xml.bz2 dump. The dump is a
+# series of independent bz2 streams of about 100 pages each, and the
+# companion index (multistream-index.txt.bz2) maps every title to the byte
+# offset of its stream, so one page is read by seeking there and
+# decompressing a single stream.
+
+ARTICLE_URL = 'https://en.wikipedia.org/wiki/{}'
+READ_SIZE = 256 * 1024
+PAGE_END = b'</page>'
+
+
+def dump_title(topic):
+    # Dumps and their index use spaces ("New Delhi"); topics may use underscores
+    title = topic.replace('_', ' ').strip()
+    return title[:1].upper() + title[1:]
+
+
+def _local(tag):
+    # "{http://www.mediawiki.org/xml/export-0.11/}title" -> "title"
+    return tag.rpartition('}')[2]
+
+
+def _page(element):
+    fields = {_local(child.tag): child for child in element}
+    revision = {_local(child.tag): child for child in fields['revision']} if 'revision' in fields else {}
+    redirect = fields.get('redirect')
+    return {
+        'title': fields['title'].text,
+        'ns': int(fields['ns'].text),
+        'id': int(fields['id'].text),
+        'revision': int(revision['id'].text) if 'id' in revision else None,
+        'redirect': redirect.get('title') if redirect is not None else None,
+        'text': (revision['text'].text or '') if 'text' in revision else ''
+    }
+
+
+def _iter_page_elements(chunks):
+    # Feed decompressed chunks to a pull parser and yield each finished <page>.
+    # A stream holds a run of <page> elements with no common root (the first
+    # and last streams also carry the <mediawiki> header and footer), so the
+    # pages are wrapped in a root of their own and anything after the last
+    # </page> is never parsed.
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    parser.feed(b'<pages>')
+    # The elements still open, so a finished page can be detached from
+    # whichever holds it (<pages>, or <mediawiki> in the first stream)
+    open_elements = []
+    pending = b''
+    for chunk in chunks:
+        pending += chunk
+        end = pending.rfind(PAGE_END)
+        if end < 0:
+            continue
+        end += len(PAGE_END)
+        parser.feed(pending[:end])
+        pending = pending[end:]
+        for event, element in parser.read_events():
+            if event == 'start':
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if _local(element.tag) == 'page':
+                yield _page(element)
+                # Finished pages are dropped so memory stays flat across the stream
+                element.clear()
+                open_elements[-1].remove(element)
+
+
+def _stream_chunks(file, offset):
+    # Decompress the single bz2 stream starting at `offset`, chunk by chunk
+    file.seek(offset)
+    decompressor = bz2.BZ2Decompressor()
+    while not decompressor.eof:
+        data = file.read(READ_SIZE)
+        if not data:
+            break
+        yield decompressor.decompress(data)
+
+
+def iter_stream_pages(file, offset):
+    # Pages of the one stream at `offset` in an open dump file
+    return _iter_page_elements(_stream_chunks(file, offset))
+
+
+def iter_pages(dump_path):
+    # Every page of the dump, in order, without an index. bz2.open reads
+    # across the stream boundaries of a multistream file.
+    with bz2.open(dump_path, 'rb') as file:
+        yield from _iter_page_elements(iter(lambda: file.read(READ_SIZE), b''))
+
+
+def read_index(index_path):
+    # (offset, page id, title) per line of "offset:page_id:title"; titles may contain colons
+    opener = bz2.open if index_path.endswith('.bz2') else open
+    with opener(index_path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            offset, page_id, title = line.rstrip('\n').split(':', 2)
+            yield int(offset), int(page_id), title
+
+
+class DumpIndex:
+    # Title -> stream offset. The full English index has millions of titles,
+    # so a caller that only needs some of them can pass `titles` to keep just
+    # those; other titles are then looked up by rescanning the index file.
+    def __init__(self, index_path, titles=None):
+        self.index_path = index_path
+        self.partial = titles is not None
+        wanted = {dump_title(title) for title in titles} if self.partial else None
+        self.offsets = {}
+        blocks = set()
+        for offset, _, title in read_index(index_path):
+            blocks.add(offset)
+            if wanted is None or title in wanted:
+                self.offsets[title] = offset
+        self.blocks = sorted(blocks)
+
+    def lookup(self, title):
+        # Stream offset of a title, or None if the dump does not have it
+        title = dump_title(title)
+        if title not in self.offsets and self.partial:
+            self.offsets[title] = next((offset for offset, _, indexed in read_index(self.index_path)
+                                        if indexed == title), None)
+        return self.offsets.get(title)
+
+
+def article_from_page(page):
+    url = ARTICLE_URL.format(page['title'].replace(' ', '_'))
+    return Article.from_dict(parse_wikitext(page['title'], page['text']), url=url, revision=page['revision'])
+
+
+class DumpReader:
+    # Random access to the articles of one dump through its index
+    def __init__(self, dump_path, index_path, titles=None):
+        self.dump_path = dump_path
+        self.index = DumpIndex(index_path, titles)
+
+    def page(self, title, follow_redirects=True):
+        # Raw page dict; raises ValueError when the dump does not have the title
+        title = dump_title(title)
+        offset = self.index.lookup(title)
+        if offset is not None:
+            with open(self.dump_path, 'rb') as file:
+                for page in iter_stream_pages(file, offset):
+                    if page['title'] == title:
+                        if page['redirect'] and follow_redirects:
+                            return self.page(page['redirect'], follow_redirects=False)
+                        return page
+        raise ValueError(f'Page not found in dump: {title}')
+
+    def article(self, title):
+        return article_from_page(self.page(title))
+
+
+def file_topic(title):
+    # Output file stem for a title; "/" would be read as a directory
+    return title.replace(' ', '_').replace('/', '_').replace(os.sep, '_')
+
+
+def _process_page(page, output_dir, render, images):
+    topic = file_topic(page['title'])
+    try:
+        article = article_from_page(page)
+        data = article.to_dict()
+        if not render:
+            return {'topic': topic, 'result': data}
+        from enhanced_wikipedia_scraper import render_article
+        if not images:
+            data['images'] = []
+        # Blocks already run one per core, so images are processed inline
+        return {'topic': topic, 'result': render_article(topic, data, output_dir=output_dir, verbose=False,
+                                                           process_workers=1)}
+    except Exception as e:
+        return {'topic': topic, 'error': str(e)}
+
+
+def _process_block(dump_path, offset, titles, namespaces, output_dir, render, images):
+    # Extract (and render) the wanted pages of one stream. titles=None means
+    # every non-redirect page in `namespaces`; requested titles that turn out
+    # to be redirects come back as {'topic', 'redirect'} for the caller.
+    wanted = set(titles) if titles is not None else None
+    results = []
+    with open(dump_path, 'rb') as file:
+        for page in iter_stream_pages(file, offset):
+            if wanted is not None:
+                if page['title'] not in wanted:
+                    continue
+            elif page['ns'] not in namespaces:
+                continue
+            if page['redirect']:
+                if wanted is not None:
+                    results.append({'topic': page['title'], 'redirect': page['redirect']})
+                continue
+            results.append(_process_page(page, output_dir, render, images))
+    return results
+
+
+def dump_batch(dump_path, index_path, titles=None, workers=None, output_dir=None, render=True, images=True,
+               namespaces=(0,)):
+    # Process a dump without the network (bar image downloads when rendering
+    # with images=True). Streams are independent, so each one is a unit of
+    # work for a pool of processes. With `titles`, only the streams holding
+    # them are read; otherwise every article in the dump is.
+    # Yields {'topic', 'result'} or {'topic', 'error'} per page, stream by stream.
+    index = DumpIndex(index_path, titles)
+    if titles is None:
+        groups = {offset: None for offset in index.blocks}
+    else:
+        groups = {}
+        for title in dict.fromkeys(dump_title(title) for title in titles):
+            offset = index.lookup(title)
+            if offset is None:
+                yield {'topic': file_topic(title), 'error': f'Page not found in dump: {title}'}
+            else:
+                groups.setdefault(offset, []).append(title)
+
+    workers = workers or os.cpu_count() or 1
+    # Spawned rather than forked, like the render farm
+    pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+
+    def run(groups):
+        jobs = [(dump_path, offset, group, namespaces, output_dir, render, images)
+                for offset, group in groups.items()]
+        if pool is None:
+            return (_process_block(*job) for job in jobs)
+        return pool.map(_process_block, *zip(*jobs))
+
+    try:
+        # Requested redirects are resolved in a second round, since the
+        # target usually lives in another stream. Each title is read once,
+        # so redirect loops end.
+        requested = {title for group in groups.values() if group for title in group}
+        while groups:
+            redirects = []
+            for results in run(groups):
+                for result in results:
+                    if 'redirect' in result:
+                        redirects.append(dump_title(result['redirect']))
+                    else:
+                        yield result
+            groups = {}
+            for target in dict.fromkeys(redirects):
+                if target in requested:
+                    continue
+                requested.add(target)
+                offset = index.lookup(target)
+                if offset is None:
+                    yield {'topic': file_topic(target), 'error': f'Page not found in dump: {target}'}
+                else:
+                    groups.setdefault(offset, []).append(target)
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,167 @@
+from urllib.parse import unquote
+
+from scraper.utils import clean_text
+
+HEADING_TAGS = ('h2', 'h3', 'h4')
+
+
+def heading_of(element):
+    # Return the heading tag for either layout: a bare <h2>-<h4>, or the
+    # <div class="mw-heading"> wrapper current Wikipedia markup puts around it
+    if element.name in HEADING_TAGS:
+        return element
+    if element.name == 'div' and 'mw-heading' in (element.get('class') or []):
+        return element.find(HEADING_TAGS)
+    return None
+
+
+def extract_sections(main_content):
+    # Single pass over the top-level children of mw-parser-output.
+    # Each element is visited once, so the cost is linear in the page size.
+    sections = []
+    current_heading = None
+    current_content = []
+
+    for element in main_content.children:
+        if element.name is None:
+            continue
+
+        heading = heading_of(element)
+        if heading is not None:
+            # Save previous section if exists
+            if current_heading and current_content:
+                sections.append({
+                    'heading': current_heading,
+                    'level': int(current_heading[0][1]),  # h2 -> 2, h3 -> 3, etc.
+                    'content': '\n\n'.join(current_content)
+                })
+
+            # Start new section
+            heading_text = heading.get_text().replace('[edit]', '').strip()
+            current_heading = (heading.name, heading_text)
+            current_content = []
+        elif element.name == 'p':
+            text = element.get_text()
+            if not text.strip():
+                continue
+            if current_heading:
+                current_content.append(clean_text(text))
+            elif not sections:
+                # This is intro paragraph before any heading
+                sections.append({
+                    'heading': ('h1', 'Introduction'),
+                    'level': 1,
+                    'content': clean_text(text)
+                })
+            else:
+                # Append to introduction
+                sections[0]['content'] += '\n\n' + clean_text(text)
+        # Also capture lists and tables within sections
+        elif element.name in ('ul', 'ol', 'table') and current_heading:
+            list_content = clean_text(element.get_text().strip())
+            if list_content:
+                current_content.append(list_content)
+
+    # Add the last section if exists
+    if current_heading and current_content:
+        sections.append({
+            'heading': current_heading,
+            'level': int(current_heading[0][1]),
+            'content': '\n\n'.join(current_content)
+        })
+
+    return sections
+
+
+def extract_links(main_content):
+    # Titles of the internal /wiki/ links in the article body, first-seen order
+    links = {}
+    for link in main_content.find_all('a', href=True):
+        href = link['href']
+        if href.startswith('/wiki/'):
+            title = unquote(href[len('/wiki/'):].split('#')[0])
+            if title:
+                links.setdefault(title, None)
+    return list(links)
+
+
+def image_candidates(content_div):
+    # Attributes of the <img> tags images are chosen from: thumbnails, the
+    # first infobox's images and every image, each in document order
+    infobox = content_div.find('table', {'class': 'infobox'})
+    return ([img.attrs for img in content_div.find_all('img', {'class': 'thumbimage'})],
+            [img.attrs for img in infobox.find_all('img')] if infobox else [],
+            [img.attrs for img in content_div.find_all('img')])
+
+
+def _image_src(attrs):
+    img_src = attrs['src']
+    if not img_src.startswith('http'):
+        img_src = 'https:' + img_src
+    return img_src
+
+
+def select_images(thumbnails, infobox, images):
+    # Up to 15 thumbnails, 5 infobox images, and whichever of the first 20
+    # images are wider than 100px
+    selected = []
+    for attrs in thumbnails[:15]:
+        if 'src' in attrs:
+            selected.append(_image_src(attrs))
+    for attrs in infobox[:5]:
+        if 'src' in attrs:
+            img_src = _image_src(attrs)
+            if img_src not in selected:  # Avoid duplicates
+                selected.append(img_src)
+    for attrs in images[:20]:
+        if 'src' in attrs and attrs.get('width') and int(attrs.get('width', 0)) > 100:
+            img_src = _image_src(attrs)
+            if img_src not in selected:  # Avoid duplicates
+                selected.append(img_src)
+    return selected
+
+
+def reference_entry(note):
+    # Text of a reference plus its first external link, if it has one.
+    # extract_references adds the reference's position as the link's 'index'.
+    ref_text = note.get_text()
+    ref_link = note.find('a', {'class': 'external'})
+    if ref_link and 'href' in ref_link.attrs:
+        return ref_text, {'text': ref_text[:50] + '...', 'url': ref_link['href']}
+    return ref_text, None
+
+
+def extract_references(soup, content_div):
+    # Extract references with URLs
+    references = []
+    ref_urls = []
+    ref_section = soup.find('div', {'class': 'reflist'})
+    if ref_section:
+        for ref in ref_section.find_all('li'):
+            ref_text, ref_url = reference_entry(ref)
+            if ref_url:
+                ref_urls.append(dict(ref_url, index=len(references)))
+            references.append(ref_text)
+        return references, ref_urls
+
+    # No reflist: resolve each citation through an id -> <li> index built in
+    # one pass, instead of a full-tree search per citation
+    notes_by_id = {}
+    for li in soup.find_all('li', id=True):
+        notes_by_id.setdefault(li['id'], li)
+    seen = set()
+    for citation in content_div.find_all('sup', {'class': 'reference'}):
+        link = citation.find('a')
+        cite_id = link.get('href', '').replace('#', '') if link else ''
+        # Named references are cited many times but listed once
+        if not cite_id or cite_id in seen:
+            continue
+        seen.add(cite_id)
+        cite_note = notes_by_id.get(cite_id)
+        if cite_note:
+            ref_text, ref_url = reference_entry(cite_note)
+            if ref_url:
+                ref_urls.append(dict(ref_url, index=len(references)))
+            references.append(ref_text)
+
+    return references, ref_urls
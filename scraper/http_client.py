@@ -0,0 +1,92 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scraper.scheduler import Scheduler
+
+# Advertise brotli only when urllib3 can actually decode it
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+USER_AGENT = 'Web-Scrap-Wikipedia/1.0 (https://github.com/Sw-Dy/Web-Scrap--Wikipedia)'
+# Connection pool sizes of the shared client; images are fetched many at a time
+HOST_POOL_SIZES = {'upload.wikimedia.org': 16}
+
+
+class HttpClient:
+    # One keep-alive session shared by the article, image and API fetches
+    def __init__(self, pool_connections=10, pool_maxsize=10, host_pool_sizes=None,
+                 connect_timeout=5, read_timeout=30, retries=3, backoff_factor=0.5,
+                 user_agent=USER_AGENT, scheduler=None):
+        self.timeout = (connect_timeout, read_timeout)
+        # Rate limits and 429/503 handling live in the scheduler, which paces
+        # every thread sharing this client; scheduler=False turns it off and
+        # leaves those statuses to urllib3's per-request retries
+        if scheduler is None:
+            scheduler = Scheduler(retries=retries, base_delay=backoff_factor)
+        self.scheduler = scheduler or None
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 504) if self.scheduler else (429, 500, 502, 503, 504),
+            respect_retry_after_header=not self.scheduler,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept-Encoding': ACCEPT_ENCODING
+        })
+
+        # Default pools, then a dedicated pool for every host given its own size
+        # (requests picks the adapter with the longest matching prefix)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=self.retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        for host, size in (host_pool_sizes or {}).items():
+            host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=self.retry)
+            self.session.mount(f'https://{host}/', host_adapter)
+            self.session.mount(f'http://{host}/', host_adapter)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.scheduler is None:
+            return self.session.get(url, **kwargs)
+        return self.scheduler.request(self.session.get, url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient(host_pool_sizes=HOST_POOL_SIZES)
+        return _default_client
+
+
+def configure(**kwargs):
+    # Replace the shared client, e.g. configure(read_timeout=60, retries=5)
+    global _default_client
+    with _default_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = HttpClient(**kwargs)
+        return _default_client
+
+
+def get(url, **kwargs):
+    # Drop-in replacement for requests.get that goes through the shared client
+    return get_client().get(url, **kwargs)
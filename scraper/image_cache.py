@@ -0,0 +1,157 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE_ROOT = os.environ.get('WIKI_SCRAPER_CACHE_DIR', os.path.join(PROJECT_ROOT, '.cache'))
+
+# Thumbnails shipped with the repo (flags, emblems, trend icons) seed the cache
+SEED_DIR = os.path.join(PROJECT_ROOT, 'images')
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageCache:
+    # Persistent image cache: URL -> content hash -> original bytes, plus the
+    # resized copies generate_enhanced_pdf embeds, keyed by (hash, max_width).
+    # Originals and derived files share one size budget with LRU eviction.
+    def __init__(self, root=None, max_bytes=512 * 1024 * 1024, seed_dirs=None):
+        self.root = root or os.path.join(CACHE_ROOT, 'images')
+        self.max_bytes = max_bytes
+        self.seed_dirs = seed_dirs or []
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.root, 'index.sqlite'), timeout=30,
+                                   check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_last_used ON files (last_used);
+        ''')
+        self._db.commit()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _read(self, key):
+        # Returns (bytes, width, height) and refreshes the LRU stamp, or None on a miss
+        row = self._db.execute('SELECT width, height FROM files WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._path(key), 'rb') as file:
+                data = file.read()
+        except OSError:
+            self._db.execute('DELETE FROM files WHERE key = ?', (key,))
+            self._db.commit()
+            return None
+        self._db.execute('UPDATE files SET last_used = ? WHERE key = ?', (time.time(), key))
+        self._db.commit()
+        return data, row[0], row[1]
+
+    def _write(self, key, data, width=None, height=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        self._db.execute('INSERT OR REPLACE INTO files (key, size, width, height, last_used) VALUES (?, ?, ?, ?, ?)',
+                         (key, len(data), width, height, time.time()))
+        self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM files').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute('SELECT key, size FROM files ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self._db.execute('DELETE FROM files WHERE key = ?', (key,))
+            total -= size
+
+    def _seed(self, url):
+        # Fall back to a bundled thumbnail with the same file name as the URL
+        name = urlsplit(url).path.rsplit('/', 1)[-1]
+        for seed_dir in self.seed_dirs:
+            path = os.path.join(seed_dir, name)
+            if name and os.path.isfile(path):
+                with open(path, 'rb') as file:
+                    return file.read()
+        return None
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute('SELECT hash FROM urls WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                hit = self._read(row[0])
+                if hit is not None:
+                    return hit[0]
+        data = self._seed(url)
+        if data is not None:
+            self.put(url, data)
+        return data
+
+    def put(self, url, data):
+        key = content_hash(data)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)', (url, key))
+            # Identical content under another URL is stored only once
+            if self._db.execute('SELECT 1 FROM files WHERE key = ?', (key,)).fetchone() is None:
+                self._write(key, data)
+            else:
+                self._db.commit()
+        return key
+
+    def get_derived(self, key, max_width):
+        with self._lock:
+            return self._read(f'{key}-{max_width}')
+
+    def put_derived(self, key, max_width, data, width, height):
+        with self._lock:
+            self._write(f'{key}-{max_width}', data, width, height)
+
+    def derived_path(self, key, max_width):
+        # Path of a stored resized copy, or None
+        with self._lock:
+            if self._db.execute('SELECT 1 FROM files WHERE key = ?', (f'{key}-{max_width}',)).fetchone() is None:
+                return None
+        path = self._path(f'{key}-{max_width}')
+        return path if os.path.exists(path) else None
+
+    def total_bytes(self):
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM files').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ImageCache(seed_dirs=[SEED_DIR])
+        return _default_cache
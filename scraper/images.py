@@ -0,0 +1,263 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from scraper import http_client
+from scraper.image_cache import content_hash
+from scraper.metrics import NULL_METRICS
+
+
+def fetch_image(url, get=None, cache=None, metrics=None):
+    # One download, through the cache when there is one. Returns (url, bytes or None).
+    get = get or http_client.get
+    metrics = metrics or NULL_METRICS
+    if cache is not None:
+        data = cache.get(url)
+        if data is not None:
+            metrics.count('image_cache_hits')
+            return url, data
+    try:
+        response = get(url)
+    except Exception:
+        metrics.count('images_failed')
+        return url, None
+    if response.status_code != 200:
+        metrics.count('images_failed')
+        return url, None
+    metrics.count('images_fetched')
+    if cache is not None:
+        cache.put(url, response.content)
+    return url, response.content
+
+
+def prefetch_images(urls, get=None, max_workers=8, cache=None, metrics=None):
+    # Download every unique URL exactly once, concurrently.
+    # Returns {url: bytes} in first-seen order, with None for failed downloads.
+    # With a cache, hits skip the network and fresh downloads are stored.
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_urls)))) as executor:
+        return dict(executor.map(lambda url: fetch_image(url, get, cache, metrics), unique_urls))
+
+
+def iter_image_batches(urls, max_bytes, get=None, max_workers=8, cache=None, metrics=None):
+    # prefetch_images in bounded memory: yields lists of (url, bytes or None)
+    # in first-seen order. Downloads in flight count against max_bytes too,
+    # each reserving the size of the largest download so far (the first runs
+    # alone), and a batch is only yielded once nothing is in flight. So the
+    # batch plus the downloads behind it stay within max_bytes, give or take
+    # one image larger than any before it; an image larger than max_bytes
+    # comes in a batch of its own.
+    pending = deque(dict.fromkeys(urls))
+    if not pending:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+        running = deque()
+        batch = []
+        held = 0
+        largest = None
+        while pending or running:
+            while pending and len(running) < max_workers and (
+                    (not running and not batch)
+                    or (largest is not None and held + (len(running) + 1) * largest <= max_bytes)):
+                running.append(executor.submit(fetch_image, pending.popleft(), get, cache, metrics))
+            if running:
+                url, data = running.popleft().result()
+                size = len(data or b'')
+                largest = max(largest or 0, size)
+                batch.append((url, data))
+                held += size
+            else:
+                # The budget is full and nothing is in flight
+                yield batch
+                batch = []
+                held = 0
+        if batch:
+            yield batch
+
+
+JPEG_QUALITY = 85
+ALPHA_MODES = ('RGBA', 'LA', 'PA')
+
+# The process pool (see get_pool)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def process_image(data, max_width):
+    # Decode, shrink to max_width and encode as JPEG, ready to embed.
+    # Returns (jpeg_bytes, width, height).
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    if width > max_width:
+        # JPEGs are decoded straight at a reduced scale (1/2, 1/4, 1/8)
+        # instead of at full resolution and then shrunk
+        img.draft('RGB', (max_width, max(1, height * max_width // width)))
+        img.thumbnail((max_width, height), Image.LANCZOS)
+
+    # Flatten transparency onto white in one composite, then encode as RGB
+    if img.mode == 'P' and 'transparency' in img.info:
+        img = img.convert('RGBA')
+    if img.mode in ALPHA_MODES:
+        background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img.convert('RGBA'))
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=JPEG_QUALITY)
+    return (output.getvalue(),) + img.size
+
+
+def _process_or_none(data, max_width):
+    try:
+        return process_image(data, max_width)
+    except Exception:
+        return None
+
+
+def get_pool(workers=None):
+    # One process pool per interpreter, shared by every thread rendering a
+    # PDF. It is started with `workers` processes (default: one per core) the
+    # first time it is asked for, and never replaced, so work already
+    # submitted by another thread is never stranded; callers that want fewer
+    # workers submit fewer tasks at a time (see process_images). Workers are
+    # spawned rather than forked, since the parent runs download threads; the
+    # spawned workers import the main script, so only entry points guarded by
+    # `if __name__ == "__main__"` (the CLI, the service, the benchmarks) ask for a pool.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _map_at_most(pool, limit, images, max_width):
+    # pool.map over the images, in order, with at most `limit` of them in the pool at a time
+    results = []
+    running = deque()
+    for data in images:
+        if len(running) == limit:
+            results.append(running.popleft().result())
+        running.append(pool.submit(_process_or_none, data, max_width))
+    results.extend(future.result() for future in running)
+    return results
+
+
+def process_images(images, max_width, cache=None, workers=None, metrics=None):
+    # Process many images at one width: inline by default, or at most
+    # `workers` at a time in the process pool when workers > 1. Returns a list in input order of (jpeg_bytes, width, height), or None
+    # for images that could not be decoded. With a cache, already-processed
+    # images are reused and new results are stored.
+    metrics = metrics or NULL_METRICS
+    results = [None] * len(images)
+    pending = []
+    for index, data in enumerate(images):
+        if cache is not None:
+            hit = cache.get_derived(content_hash(data), max_width)
+            if hit is not None:
+                metrics.count('processed_image_cache_hits')
+                results[index] = hit
+                continue
+        pending.append(index)
+
+    # The pool is opt-in; a single image is always processed inline
+    if workers is None or workers <= 1 or len(pending) <= 1:
+        processed = [_process_or_none(images[index], max_width) for index in pending]
+    else:
+        processed = _map_at_most(get_pool(workers), workers, [images[index] for index in pending], max_width)
+
+    for index, result in zip(pending, processed):
+        results[index] = result
+        if cache is not None and result is not None:
+            cache.put_derived(content_hash(images[index]), max_width, *result)
+    return results
+
+
+def decoded_size(data, max_width):
+    # Peak bytes process_image needs for one image: its pixels at the scale
+    # they are decoded at (JPEGs are drafted down towards max_width), as RGBA,
+    # twice for the flattened copy. None when the header cannot be read.
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(data))
+    except Exception:
+        return None
+    width, height = img.size
+    if img.format == 'JPEG':
+        scale = 1
+        while scale < 8 and width // (scale * 2) >= max_width:
+            scale *= 2
+        width, height = -(-width // scale), -(-height // scale)
+    return width * height * 4 * 2
+
+
+def fitting_width(data, max_width, max_bytes):
+    # The largest of max_width, max_width // 2, ... at which the image
+    # decodes within max_bytes: a smaller width lets a JPEG be drafted
+    # further down, to 1/8 scale. None when no width fits (other formats
+    # always decode at full size). An unreadable header fits as is.
+    width = max_width
+    while width >= 1:
+        size = decoded_size(data, width)
+        if size is None or size <= max_bytes:
+            return width
+        width //= 2
+    return None
+
+
+class ImageSpool:
+    # Processed images kept on disk and handed to reportlab by path, so that
+    # layout holds no image bytes. Files already in the image cache are
+    # hard-linked (or copied), which also keeps them safe from eviction until
+    # close() removes the spool.
+    def __init__(self, cache=None, directory=None):
+        self.cache = cache
+        self.directory = tempfile.mkdtemp(prefix='wiki_images_', dir=directory)
+        self.files = 0
+        self.bytes = 0
+
+    def _link(self, key, max_width, path):
+        source = self.cache.derived_path(key, max_width) if self.cache is not None and key else None
+        if source is None:
+            return False
+        try:
+            os.link(source, path)
+        except OSError:
+            try:
+                shutil.copyfile(source, path)
+            except OSError:
+                return False
+        return True
+
+    def add(self, result, key=None, max_width=None):
+        # result is process_image's (jpeg_bytes, width, height) and key the
+        # content hash of the original. Returns (path, width, height).
+        data, width, height = result
+        # reportlab reads only the header of a .jpg path until the page is drawn
+        path = os.path.join(self.directory, f'{self.files}.jpg')
+        if not self._link(key, max_width, path):
+            with open(path, 'wb') as file:
+                file.write(data)
+        self.files += 1
+        self.bytes += len(data)
+        return path, width, height
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,151 @@
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Per-stage timing and counters for scrapes. Functions take metrics=None and
+# fall back to NULL_METRICS, whose methods do nothing, so instrumentation
+# costs next to nothing when it is off.
+
+PROMETHEUS_PREFIX = 'wiki_scraper'
+
+
+class Metrics:
+    # Wall time and bytes per stage, plus named counts. Safe to share between
+    # the threads of one scrape. Hooks are called with an event dict, e.g.
+    # {'type': 'stage', 'name': 'fetch', 'seconds': 0.2, 'bytes': 1048576}
+    # or {'type': 'count', 'name': 'images_failed', 'value': 1}. A stage
+    # event's bytes are those added by its own thread while it was open.
+    enabled = True
+
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+        self.stages = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        # Per thread, the [name, bytes] of each stage call still open
+        self._open = threading.local()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def _emit(self, event):
+        for hook in self.hooks:
+            hook(event)
+
+    def _stage_entry(self, name):
+        return self.stages.setdefault(name, {'seconds': 0.0, 'bytes': 0, 'calls': 0})
+
+    def _open_calls(self):
+        calls = getattr(self._open, 'calls', None)
+        if calls is None:
+            calls = self._open.calls = []
+        return calls
+
+    @contextmanager
+    def stage(self, name):
+        calls = self._open_calls()
+        call = [name, 0]
+        calls.append(call)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            calls.remove(call)
+            with self._lock:
+                entry = self._stage_entry(name)
+                entry['seconds'] += seconds
+                entry['calls'] += 1
+            self._emit({'type': 'stage', 'name': name, 'seconds': seconds, 'bytes': call[1]})
+
+    def add_bytes(self, name, count):
+        with self._lock:
+            self._stage_entry(name)['bytes'] += count
+        # Bytes added inside an open call of the stage also go to that call's event
+        for call in reversed(self._open_calls()):
+            if call[0] == name:
+                call[1] += count
+                break
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+        self._emit({'type': 'count', 'name': name, 'value': value})
+
+    def merge(self, report):
+        # Add another recorder's report() into this one (e.g. a batch total)
+        with self._lock:
+            for name, stage in report['stages'].items():
+                entry = self._stage_entry(name)
+                for key in ('seconds', 'bytes', 'calls'):
+                    entry[key] += stage[key]
+            for name, value in report['counts'].items():
+                self.counts[name] = self.counts.get(name, 0) + value
+
+    def report(self):
+        with self._lock:
+            return {'stages': {name: dict(stage) for name, stage in self.stages.items()},
+                    'counts': dict(self.counts)}
+
+    def to_json(self, **extra):
+        return json.dumps({**extra, **self.report()}, indent=2)
+
+    def to_prometheus(self, labels=None):
+        return prometheus_text(self.report(), labels)
+
+
+_NO_STAGE = nullcontext()
+
+
+class NullMetrics:
+    # Stand-in used when instrumentation is off
+    enabled = False
+    hooks = ()
+
+    def stage(self, name):
+        return _NO_STAGE
+
+    def add_hook(self, hook):
+        pass
+
+    def add_bytes(self, name, count):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def merge(self, report):
+        pass
+
+    def report(self):
+        return {'stages': {}, 'counts': {}}
+
+
+NULL_METRICS = NullMetrics()
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+
+
+def prometheus_text(report, labels=None):
+    # Prometheus text exposition format for one report
+    base = _labels(labels)
+    lines = []
+    for metric, key, kind in (('stage_seconds', 'seconds', 'gauge'), ('stage_bytes', 'bytes', 'gauge'),
+                              ('stage_calls', 'calls', 'counter')):
+        name = f'{PROMETHEUS_PREFIX}_{metric}'
+        lines.append(f'# TYPE {name} {kind}')
+        for stage, values in sorted(report['stages'].items()):
+            stage_labels = ','.join(filter(None, [base, f'stage="{stage}"']))
+            lines.append(f'{name}{{{stage_labels}}} {values[key]}')
+    for count, value in sorted(report['counts'].items()):
+        name = f'{PROMETHEUS_PREFIX}_{count}_total'
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name}{{{base}}} {value}' if base else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
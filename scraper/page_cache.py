@@ -0,0 +1,140 @@
+import os
+import re
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from scraper import http_client
+from scraper.image_cache import CACHE_ROOT
+
+REVISION_RE = re.compile(rb'"wgRevisionId"\s*:\s*(\d+)')
+
+
+def parse_revision(content):
+    # MediaWiki embeds the revision id of the rendered page in its RLCONF script
+    match = REVISION_RE.search(content)
+    return int(match.group(1)) if match else None
+
+
+class PageCache:
+    # Article HTML kept with its validators (ETag, Last-Modified) and revision id,
+    # plus the extraction derived from it so an unchanged page needs no re-parse
+    def __init__(self, root=None):
+        self.root = root or os.path.join(CACHE_ROOT, 'pages')
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.root, 'index.sqlite'), timeout=30,
+                                   check_same_thread=False)
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                revision INTEGER,
+                fetched_at REAL NOT NULL,
+                extracted TEXT
+            )
+        ''')
+        self._db.commit()
+
+    def _path(self, url):
+        return os.path.join(self.root, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.html.gz')
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._db.execute('SELECT etag, last_modified, revision, extracted FROM pages WHERE url = ?',
+                                   (url,)).fetchone()
+        if row is None:
+            return None
+        extracted = json.loads(row[3]) if row[3] else None
+        return {'etag': row[0], 'last_modified': row[1], 'revision': row[2], 'extracted': extracted}
+
+    def read_html(self, url):
+        try:
+            with gzip.open(self._path(url), 'rb') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def store(self, url, content, etag=None, last_modified=None):
+        path = self._path(url)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with gzip.open(tmp_path, 'wb', compresslevel=5) as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+        revision = parse_revision(content)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO pages (url, etag, last_modified, revision, fetched_at, extracted) '
+                             'VALUES (?, ?, ?, ?, ?, NULL)', (url, etag, last_modified, revision, time.time()))
+            self._db.commit()
+        return revision
+
+    def touch(self, url):
+        with self._lock:
+            self._db.execute('UPDATE pages SET fetched_at = ? WHERE url = ?', (time.time(), url))
+            self._db.commit()
+
+    def store_extracted(self, url, extracted):
+        with self._lock:
+            self._db.execute('UPDATE pages SET extracted = ? WHERE url = ?', (json.dumps(extracted), url))
+            self._db.commit()
+
+    def fetch(self, url, get=None, cache_only=False):
+        # Revalidate the cached copy with a conditional GET.
+        # Returns a dict with 'status', 'content', 'revision', 'not_modified' and,
+        # for unchanged pages, the cached 'extracted' data (None if never parsed).
+        get = get or http_client.get
+        entry = self.lookup(url)
+
+        if cache_only:
+            content = self.read_html(url) if entry else None
+            if content is None:
+                return {'status': None, 'error': 'Page not in cache'}
+            return {'status': 200, 'content': content, 'revision': entry['revision'],
+                    'not_modified': True, 'extracted': entry['extracted']}
+
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = get(url, headers=headers) if headers else get(url)
+
+        if response.status_code == 304 and entry:
+            self.touch(url)
+            # The HTML is only needed when there is no stored extraction to reuse
+            content = None if entry['extracted'] else self.read_html(url)
+            if content is not None or entry['extracted']:
+                return {'status': 200, 'content': content, 'revision': entry['revision'],
+                        'not_modified': True, 'extracted': entry['extracted']}
+            # Cached file went missing: fetch the page unconditionally
+            response = get(url)
+
+        if response.status_code != 200:
+            return {'status': response.status_code, 'error': f'Failed to fetch page: {response.status_code}'}
+
+        response_headers = getattr(response, 'headers', {}) or {}
+        revision = self.store(url, response.content, etag=response_headers.get('ETag'),
+                              last_modified=response_headers.get('Last-Modified'))
+        return {'status': 200, 'content': response.content, 'revision': revision,
+                'not_modified': False, 'extracted': None}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_page_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PageCache()
+        return _default_cache
@@ -0,0 +1,181 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from bs4 import BeautifulSoup
+
+from scraper import http_client
+from scraper.article import Article
+from scraper.extract import extract_sections, extract_references, extract_links, image_candidates, select_images
+from scraper.metrics import NULL_METRICS
+
+# Section-level fetch through the MediaWiki action=parse API. The outline
+# (headings, levels and section numbers) costs one small request; section
+# HTML is then fetched on demand, without the navboxes, sidebars and page
+# chrome of the rendered desktop page. The API returns a section together
+# with its subsections, so the unit of fetching is the introduction
+# (section 0) or one top-level section.
+
+API_URL = 'https://{lang}.wikipedia.org/w/api.php'
+ARTICLE_URL = 'https://{lang}.wikipedia.org/wiki/{title}'
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+class ParseApiClient:
+    def __init__(self, lang='en', get=None, api_url=None, parser='html.parser', metrics=None):
+        self.lang = lang
+        self.get = get or http_client.get
+        self.api_url = api_url or API_URL.format(lang=lang)
+        self.parser = parser
+        self.metrics = metrics or NULL_METRICS
+
+    def _call(self, params):
+        response = self.get(self.api_url, params={'action': 'parse', 'format': 'json', 'formatversion': 2,
+                                                  **params})
+        if response.status_code != 200:
+            raise ValueError(f'Failed to fetch page: {response.status_code}')
+        self.metrics.add_bytes('fetch', len(response.content))
+        data = response.json()
+        if 'error' in data:
+            raise ValueError(data['error'].get('info', data['error'].get('code', 'API error')))
+        return data['parse']
+
+    def outline(self, topic):
+        # {'title', 'revision', 'sections': [{'index', 'level', 'toclevel', 'heading'}]}
+        parse = self._call({'page': topic, 'prop': 'sections|revid', 'redirects': 1})
+        sections = []
+        for section in parse.get('sections', []):
+            # Sections that come from transcluded templates ("T-1") can't be fetched by number
+            if not str(section.get('index', '')).isdigit():
+                continue
+            sections.append({'index': int(section['index']), 'level': int(section['level']),
+                             'toclevel': int(section['toclevel']),
+                             'heading': TAG_RE.sub('', section['line']).strip()})
+        return {'title': parse['title'], 'revision': parse.get('revid'), 'sections': sections}
+
+    def section_html(self, title, index):
+        parse = self._call({'page': title, 'section': index, 'prop': 'text', 'disableeditsection': 1,
+                            'disabletoc': 1, 'disablelimitreport': 1})
+        return parse['text']
+
+    def parse_section(self, html):
+        # The same extraction as parse_article, on one section's HTML. The
+        # API puts the notes cited in the section in a references list at
+        # its end, or in the section's own reflist when it has one.
+        soup = BeautifulSoup(html, self.parser)
+        main_content = soup.find('div', {'class': 'mw-parser-output'}) or soup
+        # A reflist parsed on its own lists only the notes defined in this
+        # section, often none; an empty one would hide the cited notes
+        for reflist in soup.find_all('div', {'class': 'reflist'}):
+            if reflist.find('li') is None:
+                reflist.decompose()
+        references, ref_urls = extract_references(soup, main_content)
+        return {
+            'sections': extract_sections(main_content),
+            'references': references,
+            'ref_urls': ref_urls,
+            'images': image_candidates(main_content),
+            'links': extract_links(main_content)
+        }
+
+
+class SectionedArticle:
+    # An article whose sections are fetched on first access. headings()
+    # needs only the outline; fetch() loads chosen parts; sections,
+    # references and to_article() load whatever is still missing.
+    def __init__(self, client, topic, workers=4):
+        self.client = client
+        self.workers = workers
+        outline = client.outline(topic)
+        self.title = outline['title']
+        self.revision = outline['revision']
+        self.url = ARTICLE_URL.format(lang=client.lang, title=quote(self.title.replace(' ', '_')))
+        self.outline = outline['sections']
+        # Parts: the introduction, then each top-level section with its subsections
+        self.parts = [0] + [section['index'] for section in self.outline if section['toclevel'] == 1]
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+    def headings(self):
+        # (tag, heading, level) for every section, without fetching any text
+        return [(f"h{section['level']}", section['heading'], section['level']) for section in self.outline]
+
+    def parts_of(self, headings):
+        # Parts holding the given headings, in article order
+        wanted = {self.part_of(heading) for heading in headings}
+        return [part for part in self.parts if part in wanted]
+
+    def part_of(self, heading):
+        # Index of the part holding a heading; 'Introduction' is part 0
+        if heading == 'Introduction':
+            return 0
+        part = 0
+        for section in self.outline:
+            if section['toclevel'] == 1:
+                part = section['index']
+            if section['heading'] == heading:
+                return part
+        raise KeyError(heading)
+
+    def fetch(self, parts=None):
+        # Load the given parts (default: all), several requests at a time
+        with self._lock:
+            missing = [part for part in (self.parts if parts is None else parts) if part not in self._parsed]
+        if not missing:
+            return
+
+        def load(part):
+            return part, self.client.parse_section(self.client.section_html(self.title, part))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(missing)))) as executor:
+            for part, parsed in executor.map(load, missing):
+                with self._lock:
+                    self._parsed[part] = parsed
+
+    def section(self, heading):
+        # Section dicts of the part holding `heading` (the heading's own section and its subsections)
+        part = self.part_of(heading)
+        self.fetch([part])
+        return self._parsed[part]['sections']
+
+    @property
+    def sections(self):
+        self.fetch()
+        return [section for part in self.parts for section in self._parsed[part]['sections']]
+
+    def to_dict(self, parts=None):
+        # The given parts (default: everything), merged into the dict
+        # parse_article returns for the full page
+        parts = self.parts if parts is None else parts
+        self.fetch(parts)
+        parsed = [self._parsed[part] for part in parts]
+        references = []
+        ref_urls = []
+        seen = set()
+        for part in parsed:
+            urls = {ref_url['index']: ref_url for ref_url in part['ref_urls']}
+            for i, text in enumerate(part['references']):
+                # A named reference cited in several sections is listed once
+                if text in seen:
+                    continue
+                seen.add(text)
+                if i in urls:
+                    ref_urls.append(dict(urls[i], index=len(references)))
+                references.append(text)
+        thumbnails = [img for part in parsed for img in part['images'][0]]
+        infobox = next((part['images'][1] for part in parsed if part['images'][1]), [])
+        images = [img for part in parsed for img in part['images'][2]]
+        return {
+            'title': self.title,
+            'url': self.url,
+            'revision': self.revision,
+            'sections': [section for part in parsed for section in part['sections']],
+            'references': references,
+            'ref_urls': ref_urls,
+            'images': select_images(thumbnails, infobox, images),
+            'links': list(dict.fromkeys(link for part in parsed for link in part['links']))
+        }
+
+    def to_article(self, parts=None):
+        return Article.from_dict(self.to_dict(parts))
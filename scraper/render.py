@@ -0,0 +1,78 @@
+import sys
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _init_worker(workers=1):
+    # Import reportlab and build the paragraph styles once, when the worker starts
+    from enhanced_wikipedia_scraper import get_styles
+    from scraper import http_client
+    from scraper.scheduler import Scheduler
+    get_styles()
+    # Every worker fetches its article's images with its own client, so each
+    # takes an equal share of the per-host rates and concurrency; together
+    # they stay within what a single process would send
+    http_client.configure(host_pool_sizes=http_client.HOST_POOL_SIZES, scheduler=Scheduler().share(workers))
+
+
+def _render(topic, data, output_dir, with_metrics=False, summary=True, image_memory=None):
+    from enhanced_wikipedia_scraper import render_article
+    from scraper.metrics import Metrics
+    # The farm already uses every core, so images are processed inline here
+    metrics = Metrics() if with_metrics else None
+    result = render_article(topic, data, output_dir=output_dir, verbose=False, process_workers=1, metrics=metrics,
+                            summary_writer=None if summary else False, image_memory=image_memory)
+    if metrics is not None:
+        # Recorders stay in the worker; the report travels back with the result
+        result['metrics'] = metrics.report()
+    return result
+
+
+class RenderFarm:
+    # Pool of worker processes that lay out PDFs. reportlab layout is pure
+    # Python, so rendering in threads would serialize on the GIL.
+    # image_memory (bytes) bounds the images each render holds in memory.
+    def __init__(self, workers=None, image_memory=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.image_memory = image_memory
+        # Spawned rather than forked, since the parent runs download threads
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self.workers,), mp_context=multiprocessing.get_context('spawn'))
+
+    def submit(self, topic, data, output_dir=None, with_metrics=False, summary=True):
+        # data is an extracted article dict (Article.to_dict); returns a Future
+        # for the render_article result, with a 'metrics' report if asked for.
+        # summary=False skips the per-topic CSV (the caller writes the summary).
+        return self._pool.submit(_render, topic, data, output_dir, with_metrics, summary, self.image_memory)
+
+    def warm(self):
+        # Start every worker now; the pool otherwise spawns them one submit at a time
+        for future in [self._pool.submit(int) for _ in range(self.workers)]:
+            future.result()
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_batch(articles, workers=None, output_dir=None):
+    # Render (topic, article_dict) pairs across worker processes.
+    # Results come back in input order, as {'topic', 'result'} or {'topic', 'error'}.
+    with RenderFarm(workers) as farm:
+        futures = [(topic, farm.submit(topic, data, output_dir)) for topic, data in articles]
+        results = []
+        for topic, future in futures:
+            try:
+                results.append({'topic': topic, 'result': future.result()})
+            except Exception as e:
+                results.append({'topic': topic, 'error': str(e)})
+        return results
@@ -0,0 +1,169 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Statuses that mean "slow down" rather than "broken"
+THROTTLE_STATUSES = (429, 503)
+
+# Requests per second (and burst) per host. Wikimedia asks API clients to
+# stay polite; images are static files and tolerate more.
+DEFAULT_HOST_RATES = {
+    'en.wikipedia.org': (20, 40),
+    'upload.wikimedia.org': (50, 100),
+}
+DEFAULT_RATE = (20, 40)
+
+
+def retry_after_seconds(value, now=None):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - (now if now is not None else time.time()))
+
+
+class TokenBucket:
+    # Classic token bucket: `rate` tokens per second, holding at most `burst`
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # Take one token; returns how long to wait before using it
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class HostState:
+    # Rate, concurrency window and Retry-After pause of one host.
+    # Concurrency is additive-increase / multiplicative-decrease: halved on
+    # every throttled response, raised by one after a window's worth of
+    # successes, never above max_concurrency.
+    def __init__(self, rate, burst, max_concurrency, clock=time.monotonic):
+        self.bucket = TokenBucket(rate, burst, clock)
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.active = 0
+        self.successes = 0
+        self.throttled = 0
+        self.paused_until = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.active >= self.limit:
+                self.cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify()
+
+    def on_success(self):
+        with self.cond:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.max_concurrency:
+                self.limit += 1
+                self.successes = 0
+                self.cond.notify()
+
+    def on_throttle(self, pause_until):
+        with self.cond:
+            self.throttled += 1
+            self.successes = 0
+            self.limit = max(1, self.limit // 2)
+            self.paused_until = max(self.paused_until, pause_until)
+
+
+class Scheduler:
+    # Sits in front of every request of an HttpClient: per-host token buckets,
+    # adaptive per-host concurrency, Retry-After and jittered exponential
+    # backoff on 429/503. Clock, sleep and random are injectable for tests.
+    def __init__(self, host_rates=None, default_rate=DEFAULT_RATE, max_concurrency=8, retries=5,
+                 base_delay=0.5, max_delay=60, clock=time.monotonic, sleep=time.sleep, rand=random.random):
+        self.host_rates = {**DEFAULT_HOST_RATES, **(host_rates or {})}
+        self.default_rate = default_rate
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self.rand = rand
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def share(self, parts):
+        # Scheduler for one of `parts` processes that split this one's budget:
+        # every host gets rate / parts (burst likewise) and max_concurrency / parts
+        def split(rate):
+            return rate[0] / parts, max(1, rate[1] / parts)
+
+        return Scheduler({host: split(rate) for host, rate in self.host_rates.items()}, split(self.default_rate),
+                         max(1, self.max_concurrency // parts), self.retries, self.base_delay, self.max_delay,
+                         self.clock, self.sleep, self.rand)
+
+    def host(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                rate, burst = self.host_rates.get(host, self.default_rate)
+                self._hosts[host] = HostState(rate, burst, self.max_concurrency, self.clock)
+            return self._hosts[host]
+
+    def backoff(self, attempt):
+        # "Full jitter": anywhere between 0 and the exponential ceiling
+        return self.rand() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+    def _wait_turn(self, state):
+        pause = state.paused_until - self.clock()
+        if pause > 0:
+            self.sleep(pause)
+        wait = state.bucket.reserve()
+        if wait > 0:
+            self.sleep(wait)
+
+    def request(self, send, url, **kwargs):
+        # Call send(url, **kwargs) under the host's schedule; throttled
+        # responses are retried up to `retries` times, then returned as they are
+        state = self.host(url)
+        attempt = 0
+        while True:
+            state.acquire()
+            try:
+                self._wait_turn(state)
+                response = send(url, **kwargs)
+            finally:
+                state.release()
+
+            if response.status_code not in THROTTLE_STATUSES:
+                state.on_success()
+                return response
+            if attempt >= self.retries:
+                return response
+
+            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            delay = retry_after if retry_after is not None else self.backoff(attempt)
+            # The pause applies to every request to this host, not just this one
+            state.on_throttle(self.clock() + delay)
+            response.close()
+            attempt += 1
@@ -0,0 +1,436 @@
+import os
+import re
+import math
+import mmap
+import heapq
+import bisect
+import sqlite3
+import threading
+import itertools
+from array import array
+
+# Full-text search over scraped sections, kept on disk.
+#
+# The index is a directory of immutable segments plus index.sqlite, which
+# holds the section metadata (title, url, heading, level) and the segment
+# list. Each segment is written once, when buffered sections are flushed:
+#   seg-N.post   postings: per term, varint (doc id gap, term frequency) pairs
+#   seg-N.terms  sorted "term<TAB>df<TAB>offset<TAB>length" lines
+#   seg-N.lens   section lengths in tokens (uint32 from the segment's first doc id)
+# All three are memory-mapped, and terms are found by binary search over the
+# sorted term table, so a query only touches the pages of the terms it asks
+# for. Adding articles writes new segments; a new revision of an article
+# hides the old sections until their segment is merged.
+
+TOKEN_RE = re.compile(r'\w+')
+STOPWORDS = frozenset('a an and are as at be by for from has in is it its of on or that the to was were with'.split())
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+K1 = 1.2
+B = 0.75
+
+# Sections buffered in memory before they are written out as a segment
+FLUSH_SECTIONS = 5000
+# Segments are tiered by size (1-9 sections, 10-99, ...); this many adjacent
+# segments of one tier are merged into one of the next, so every section is
+# rewritten about once per tier rather than on every merge
+MERGE_FACTOR = 10
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS docs (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        url TEXT,
+        position INTEGER NOT NULL,
+        heading TEXT NOT NULL,
+        level INTEGER NOT NULL,
+        deleted INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS docs_title ON docs (title);
+    CREATE TABLE IF NOT EXISTS articles (
+        title TEXT PRIMARY KEY,
+        revision INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS segments (
+        name TEXT PRIMARY KEY,
+        base INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        tokens INTEGER NOT NULL
+    );
+'''
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def encode_varint(value, out):
+    # LEB128: 7 bits per byte, high bit set on all but the last byte
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_postings(data):
+    # [(doc id, term frequency)] from a run of varint (gap, tf) pairs
+    postings = []
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+    doc = 0
+    for i in range(0, len(values), 2):
+        doc += values[i]
+        postings.append((doc, values[i + 1]))
+    return postings
+
+
+def segment_tier(count, factor=MERGE_FACTOR):
+    tier = 0
+    while count >= factor:
+        count //= factor
+        tier += 1
+    return tier
+
+
+def encode_postings(postings):
+    out = bytearray()
+    previous = 0
+    for doc, frequency in postings:
+        encode_varint(doc - previous, out)
+        encode_varint(frequency, out)
+        previous = doc
+    return out
+
+
+class Segment:
+    # One immutable segment, opened read-only
+    def __init__(self, directory, name, base, count, tokens):
+        self.name = name
+        self.base = base
+        self.count = count
+        self.tokens = tokens
+        self._terms_file = open(os.path.join(directory, f'{name}.terms'), 'rb')
+        self._post_file = open(os.path.join(directory, f'{name}.post'), 'rb')
+        self._lens_file = open(os.path.join(directory, f'{name}.lens'), 'rb')
+        # mmap refuses empty files; an empty segment has nothing to map
+        self.terms_map = self._map(self._terms_file) or b''
+        self.postings_map = self._map(self._post_file) or b''
+        self._lens_map = self._map(self._lens_file)
+        self.lengths = memoryview(self._lens_map).cast('I') if self._lens_map is not None else []
+
+    @staticmethod
+    def _map(file):
+        if not os.path.getsize(file.name):
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def lookup(self, term):
+        # (df, offset, length) of a term, or None: a binary search over the
+        # sorted, newline-separated term table. UTF-8 bytes sort in the same
+        # order as the strings they encode.
+        data = self.terms_map
+        key = term.encode('utf-8')
+        lo, hi = 0, len(data)
+        while lo < hi:
+            newline = data.rfind(b'\n', lo, (lo + hi) // 2)
+            start = newline + 1 if newline >= 0 else lo
+            end = data.find(b'\n', start)
+            tab = data.find(b'\t', start, end)
+            found = data[start:tab]
+            if found == key:
+                df, offset, length = data[tab + 1:end].split(b'\t')
+                return int(df), int(offset), int(length)
+            if found < key:
+                lo = end + 1
+            else:
+                hi = start
+        return None
+
+    def iter_terms(self):
+        # Every term in sorted order, read from the map line by line
+        data = self.terms_map
+        start = 0
+        while start < len(data):
+            end = data.find(b'\n', start)
+            yield data[start:data.find(b'\t', start, end)].decode('utf-8')
+            start = end + 1
+
+    def postings(self, term):
+        entry = self.lookup(term)
+        if entry is None:
+            return []
+        _, offset, length = entry
+        return decode_postings(self.postings_map[offset:offset + length])
+
+    def length(self, doc):
+        return self.lengths[doc - self.base]
+
+    def close(self):
+        if self._lens_map is not None:
+            self.lengths.release()
+            self._lens_map.close()
+        for data in (self.terms_map, self.postings_map):
+            if isinstance(data, mmap.mmap):
+                data.close()
+        self._terms_file.close()
+        self._post_file.close()
+        self._lens_file.close()
+
+
+def write_segment(directory, name, postings, lengths):
+    # postings: {term: [(doc, tf), ...] in doc order}; lengths: array('I')
+    # indexed from the segment's first doc. Files are written under temporary
+    # names and moved into place, so a crash never leaves half a segment.
+    paths = {kind: os.path.join(directory, f'{name}.{kind}') for kind in ('post', 'terms', 'lens')}
+    with open(paths['post'] + '.tmp', 'wb') as post, open(paths['terms'] + '.tmp', 'w', encoding='utf-8') as terms:
+        offset = 0
+        for term in sorted(postings):
+            data = encode_postings(postings[term])
+            post.write(data)
+            terms.write(f'{term}\t{len(postings[term])}\t{offset}\t{len(data)}\n')
+            offset += len(data)
+    with open(paths['lens'] + '.tmp', 'wb') as lens:
+        lengths.tofile(lens)
+    for path in paths.values():
+        os.replace(path + '.tmp', path)
+
+
+class SearchIndex:
+    # Incremental BM25 index of article sections. add_article buffers
+    # sections and writes a segment every FLUSH_SECTIONS sections; call
+    # commit() (or close()) to make the rest searchable. Safe to share
+    # between threads.
+    def __init__(self, directory, flush_sections=FLUSH_SECTIONS, merge_factor=MERGE_FACTOR):
+        self.directory = directory
+        self.flush_sections = flush_sections
+        self.merge_factor = merge_factor
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=30, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self._segments = [Segment(directory, *row) for row in
+                          self._db.execute('SELECT name, base, count, tokens FROM segments ORDER BY base')]
+        self._deleted = {doc for (doc,) in self._db.execute('SELECT id FROM docs WHERE deleted = 1')}
+        # Tokens of the hidden sections, left out of the average section length
+        self._deleted_tokens = self._length_of(self._deleted)
+        self._reset_buffer()
+
+    def _length_of(self, docs):
+        # Total length of committed sections, found by segment base
+        bases = [segment.base for segment in self._segments]
+        total = 0
+        for doc in docs:
+            segment = self._segments[bisect.bisect_right(bases, doc) - 1]
+            total += segment.length(doc)
+        return total
+
+    def _reset_buffer(self):
+        self._docs = []
+        self._postings = {}
+        self._lengths = array('I')
+        self._revisions = {}
+
+    def add_article(self, title, url, sections, revision=None):
+        # Index the sections of one article (section dicts as in
+        # scrape_enhanced_wikipedia's result, or Section records). A
+        # revision already indexed is skipped; a new one replaces the old.
+        # Returns the number of sections added.
+        with self._lock:
+            if title in self._revisions:
+                if revision is not None and self._revisions[title] == revision:
+                    return 0
+                # Same article twice in one buffer: flush so the newer copy wins
+                self.commit()
+            row = self._db.execute('SELECT revision FROM articles WHERE title = ?', (title,)).fetchone()
+            if row is not None and revision is not None and row[0] == revision:
+                return 0
+            self._revisions[title] = revision
+            if not self._docs:
+                self._next_doc = self._last_doc() + 1
+            for position, section in enumerate(sections):
+                if not isinstance(section, dict):
+                    section = section.to_dict()
+                doc = self._next_doc + len(self._docs)
+                heading = section['heading'][1]
+                tokens = tokenize(heading + '\n' + section['content'])
+                counts = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, frequency in counts.items():
+                    self._postings.setdefault(token, []).append((doc, frequency))
+                self._lengths.append(len(tokens))
+                self._docs.append((doc, title, url, position, heading, section['level']))
+            added = len(sections)
+            if len(self._docs) >= self.flush_sections:
+                self.commit()
+            return added
+
+    def _last_doc(self):
+        # Doc ids only grow, even past sections a merge has dropped
+        row = self._db.execute('SELECT MAX(id) FROM docs').fetchone()
+        ends = [segment.base + segment.count - 1 for segment in self._segments]
+        return max([row[0] or 0] + ends)
+
+    def commit(self):
+        # Write the buffered sections as a new segment and make them searchable
+        with self._lock:
+            if not self._revisions:
+                return
+            name = None
+            if self._docs:
+                base = self._docs[0][0]
+                name = f'seg-{base:012d}'
+                write_segment(self.directory, name, self._postings, self._lengths)
+            with self._db:
+                # Older revisions of these articles are hidden from now on
+                for title in self._revisions:
+                    hidden = [doc for (doc,) in self._db.execute(
+                        'SELECT id FROM docs WHERE deleted = 0 AND title = ?', (title,))]
+                    self._deleted.update(hidden)
+                    self._deleted_tokens += self._length_of(hidden)
+                self._db.executemany('UPDATE docs SET deleted = 1 WHERE title = ?',
+                                     [(title,) for title in self._revisions])
+                self._db.executemany('INSERT OR REPLACE INTO articles (title, revision) VALUES (?, ?)',
+                                     self._revisions.items())
+                self._db.executemany('INSERT INTO docs (id, title, url, position, heading, level) '
+                                     'VALUES (?, ?, ?, ?, ?, ?)', self._docs)
+                if name is not None:
+                    self._db.execute('INSERT INTO segments (name, base, count, tokens) VALUES (?, ?, ?, ?)',
+                                     (name, base, len(self._docs), sum(self._lengths)))
+            if name is not None:
+                self._segments.append(Segment(self.directory, name, base, len(self._docs), sum(self._lengths)))
+            self._reset_buffer()
+            self._merge_tiers()
+
+    def _merge_tiers(self):
+        # Merge the first merge_factor segments of any run of adjacent
+        # segments in the same size tier, until no run is that long
+        while True:
+            tiers = [segment_tier(segment.count, self.merge_factor) for segment in self._segments]
+            for start in range(len(tiers) - self.merge_factor + 1):
+                if len(set(tiers[start:start + self.merge_factor])) == 1:
+                    self._merge_segments(start, start + self.merge_factor)
+                    break
+            else:
+                return
+
+    def merge(self):
+        # Fold every segment into one, dropping hidden (replaced) sections
+        with self._lock:
+            if len(self._segments) < 2 and not self._deleted:
+                return
+            if self._segments:
+                self._merge_segments(0, len(self._segments))
+
+    def _merge_segments(self, first, last):
+        # Replace the adjacent segments [first:last] with one segment, leaving
+        # out the hidden sections among them
+        segments = self._segments[first:last]
+        base = segments[0].base
+        end = segments[-1].base + segments[-1].count
+        deleted = {doc for doc in self._deleted if base <= doc < end}
+        lengths = array('I', bytes(4 * (end - base)))
+        tokens = 0
+        dropped = 0
+        for segment in segments:
+            for i in range(segment.count):
+                doc = segment.base + i
+                if doc not in deleted:
+                    lengths[doc - base] = segment.lengths[i]
+                    tokens += segment.lengths[i]
+                else:
+                    dropped += segment.lengths[i]
+        # Terms come out of every segment in sorted order, so they are merged
+        # a term at a time without loading any term table whole
+        postings = {}
+        terms = heapq.merge(*(segment.iter_terms() for segment in segments))
+        for term, _ in itertools.groupby(terms):
+            merged = [posting for segment in segments for posting in segment.postings(term)
+                      if posting[0] not in deleted]
+            if merged:
+                postings[term] = merged
+        name = f'seg-{base:012d}-m{end:012d}'
+        write_segment(self.directory, name, postings, lengths)
+        with self._db:
+            self._db.executemany('DELETE FROM segments WHERE name = ?', [(segment.name,) for segment in segments])
+            self._db.execute('INSERT INTO segments (name, base, count, tokens) VALUES (?, ?, ?, ?)',
+                             (name, base, end - base, tokens))
+            self._db.execute('DELETE FROM docs WHERE deleted = 1 AND id >= ? AND id < ?', (base, end))
+        for segment in segments:
+            segment.close()
+            # A merged segment merged again on its own was just rewritten in place
+            if segment.name != name:
+                for kind in ('post', 'terms', 'lens'):
+                    os.remove(os.path.join(self.directory, f'{segment.name}.{kind}'))
+        self._segments[first:last] = [Segment(self.directory, name, base, end - base, tokens)]
+        self._deleted -= deleted
+        self._deleted_tokens -= dropped
+
+    def stats(self):
+        with self._lock:
+            sections = self._db.execute('SELECT COUNT(*) FROM docs WHERE deleted = 0').fetchone()[0]
+            articles = self._db.execute('SELECT COUNT(DISTINCT title) FROM docs WHERE deleted = 0').fetchone()[0]
+            return {'articles': articles, 'sections': sections, 'segments': len(self._segments),
+                    'buffered': len(self._docs)}
+
+    def search(self, query, limit=10):
+        # Best `limit` sections for the query by BM25, as
+        # {'title', 'url', 'heading', 'level', 'position', 'score'} dicts
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            return self._search(terms, limit)
+
+    def _search(self, terms, limit):
+        segments = self._segments
+        deleted = self._deleted
+        live = sum(segment.count for segment in segments) - len(deleted)
+        if not terms or live <= 0:
+            return []
+        # Average over the live sections only; hidden ones stay in their segments until a merge
+        average = max(1.0, (sum(segment.tokens for segment in segments) - self._deleted_tokens) / live)
+
+        scores = {}
+        for term in terms:
+            matches = [(segment, segment.postings(term)) for segment in segments]
+            if deleted:
+                matches = [(segment, [posting for posting in postings if posting[0] not in deleted])
+                           for segment, postings in matches]
+            df = sum(len(postings) for _, postings in matches)
+            if not df:
+                continue
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            for segment, postings in matches:
+                for doc, frequency in postings:
+                    norm = K1 * (1 - B + B * segment.length(doc) / average)
+                    scores[doc] = scores.get(doc, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        if not best:
+            return []
+        rows = {row[0]: row for row in self._db.execute(
+            f'SELECT id, title, url, heading, level, position FROM docs WHERE id IN ({",".join("?" * len(best))})',
+            [doc for doc, _ in best])}
+        return [{'title': rows[doc][1], 'url': rows[doc][2], 'heading': rows[doc][3], 'level': rows[doc][4],
+                 'position': rows[doc][5], 'score': score} for doc, score in best if doc in rows]
+
+    def close(self):
+        with self._lock:
+            self.commit()
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,245 @@
+import sys
+import os
+import json
+import time
+import uuid
+import threading
+import socketserver
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia, get_styles
+from scraper import http_client
+from scraper.images import get_pool
+from scraper.metrics import Metrics
+from scraper.render import RenderFarm
+
+# Long-running scrape service. One process keeps the imports, paragraph
+# styles, HTTP connection pools, caches and render workers warm, and takes
+# jobs over a small JSON API on TCP or a Unix socket:
+#   POST /jobs               {"topics": ["India", ...]} or {"topic": "India"},
+#                            optionally "extract_only": true -> 202 with the new jobs
+#   GET  /jobs               every job still in the history
+#   GET  /jobs/<id>          status: queued, running, done or failed
+#   GET  /jobs/<id>/pdf|csv  the finished job's file
+#   GET  /health             queue depth
+#   GET  /metrics            stage timings of all jobs, Prometheus text format
+
+DEFAULT_ADDRESS = '127.0.0.1:8765'
+DEFAULT_OUTPUT_DIR = 'service_output'
+# Finished jobs remembered for polling and downloads
+HISTORY = 1000
+
+
+class ScrapeService:
+    # Job queue in front of the scraper. Jobs run on `workers` threads; with
+    # render_workers, PDFs are laid out in a warm pool of processes.
+    # scrape_options are passed to every scrape (e.g. image_cache, parser).
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, workers=4, render_workers=None, get=None,
+                 scrape_options=None, history=HISTORY):
+        self.output_dir = output_dir
+        self.get = get or http_client.get
+        self.scrape_options = dict(scrape_options or {})
+        self.history = history
+        self.metrics = Metrics()
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self.farm = RenderFarm(render_workers) if render_workers else None
+
+    def warm(self):
+        # Pay the start-up costs before the first job instead of during it
+        get_styles()
+        http_client.get_client()
+        if self.farm is not None:
+            self.farm.warm()
+        # The image process pool, when scrape_options ask for one
+        process_workers = self.scrape_options.get('process_workers')
+        if process_workers and process_workers > 1:
+            get_pool(process_workers).submit(int).result()
+
+    def submit(self, topic, extract_only=False):
+        job = {'id': uuid.uuid4().hex[:12], 'topic': topic, 'extract_only': extract_only, 'status': 'queued',
+               'submitted': time.time(), 'started': None, 'finished': None}
+        with self._lock:
+            self.jobs[job['id']] = job
+            self._trim()
+            submitted = dict(job)
+        self._executor.submit(self._run, job)
+        return submitted
+
+    def _trim(self):
+        # Forget the oldest finished jobs beyond the history size
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
+
+    def job(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list_jobs(self):
+        with self._lock:
+            return [dict(job) for job in self.jobs.values()]
+
+    def counts(self):
+        with self._lock:
+            counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+            for job in self.jobs.values():
+                counts[job['status']] += 1
+            return counts
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.update(changes)
+
+    def _run(self, job):
+        self._update(job, status='running', started=time.time())
+        metrics = Metrics()
+        options = {**self.scrape_options, 'get': self.get, 'verbose': False, 'metrics': metrics,
+                   'output_dir': os.path.join(self.output_dir, job['id'])}
+        try:
+            if job['extract_only'] or self.farm is not None:
+                article = scrape_enhanced_wikipedia(job['topic'], extract_only=True, **options)
+                if isinstance(article, dict):
+                    result = article  # {'error': ...}
+                elif job['extract_only']:
+                    result = article.to_dict()
+                else:
+                    result = self.farm.submit(job['topic'], article.to_dict(), options['output_dir'],
+                                              with_metrics=True).result()
+                    metrics.merge(result.pop('metrics'))
+            else:
+                result = scrape_enhanced_wikipedia(job['topic'], **options)
+        except Exception as e:
+            result = {'error': str(e)}
+        self.metrics.merge(metrics.report())
+
+        if 'error' in result:
+            self._update(job, status='failed', error=result['error'], finished=time.time())
+        else:
+            summary = {key: result[key] for key in ('title', 'url', 'pdf_file', 'csv_file') if key in result}
+            summary.update(sections=len(result['sections']), references=len(result['references']),
+                           images=len(result['images']))
+            if job['extract_only']:
+                summary['article'] = result
+            self._update(job, status='done', result=summary, finished=time.time())
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self.farm is not None:
+            self.farm.close()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    # Keep-alive JSON API over the server's ScrapeService
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type='application/json', filename=None):
+        if not isinstance(body, bytes):
+            body = (json.dumps(body, indent=2) + '\n').encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if filename:
+            self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if parts == ['health']:
+            return self._send(200, {'status': 'ok', 'jobs': service.counts()})
+        if parts == ['metrics']:
+            return self._send(200, service.metrics.to_prometheus().encode('utf-8'),
+                              'text/plain; version=0.0.4; charset=utf-8')
+        if parts == ['jobs']:
+            return self._send(200, {'jobs': service.list_jobs()})
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            job = service.job(parts[1])
+            if job is None:
+                return self._send(404, {'error': 'No such job'})
+            if len(parts) == 2:
+                return self._send(200, job)
+            kind = parts[2]
+            path = (job.get('result') or {}).get(f'{kind}_file') if kind in ('pdf', 'csv') else None
+            if path is None or not os.path.exists(path):
+                return self._send(404, {'error': f'No {kind} file for this job (status: {job["status"]})'})
+            with open(path, 'rb') as file:
+                body = file.read()
+            content_type = 'application/pdf' if kind == 'pdf' else 'text/csv; charset=utf-8'
+            return self._send(200, body, content_type, filename=os.path.basename(path))
+        return self._send(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path.split('?')[0].strip('/') != 'jobs':
+            return self._send(404, {'error': 'Not found'})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            topics = request['topics'] if 'topics' in request else [request['topic']]
+            if not topics or not all(isinstance(topic, str) and topic.strip() for topic in topics):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            return self._send(400, {'error': 'Expected {"topics": [...]} or {"topic": "..."}'})
+        extract_only = bool(request.get('extract_only'))
+        jobs = [self.server.service.submit(topic.strip(), extract_only=extract_only) for topic in topics]
+        return self._send(202, {'jobs': jobs})
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        self.service = service
+        self.verbose = verbose
+        super().__init__(address, ServiceHandler)
+
+
+class UnixServiceServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, service, verbose=False):
+        self.service = service
+        self.verbose = verbose
+        if os.path.exists(path):
+            os.remove(path)  # left over from a previous run
+        super().__init__(path, ServiceHandler)
+
+
+def make_server(service, address=DEFAULT_ADDRESS, verbose=False):
+    # address: "host:port", or "unix:/path/to/socket"
+    if address.startswith('unix:'):
+        return UnixServiceServer(address[len('unix:'):], service, verbose)
+    host, _, port = address.rpartition(':')
+    return ServiceServer((host or '127.0.0.1', int(port)), service, verbose)
+
+
+def serve(address=DEFAULT_ADDRESS, verbose=True, **options):
+    # Run the service until interrupted
+    service = ScrapeService(**options)
+    service.warm()
+    server = make_server(service, address, verbose)
+    print(f"Scrape service listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if address.startswith('unix:') and os.path.exists(address[len('unix:'):]):
+            os.remove(address[len('unix:'):])
@@ -0,0 +1,174 @@
+import sys
+import os
+import time
+import sqlite3
+import threading
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scraper.article import Article, Section, Reference, ImageRef
+
+DEFAULT_PATH = 'wikipedia_articles.sqlite'
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS articles (
+        id INTEGER PRIMARY KEY,
+        key TEXT UNIQUE NOT NULL,
+        title TEXT NOT NULL,
+        url TEXT,
+        revision INTEGER,
+        stored_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sections (
+        article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        tag TEXT NOT NULL,
+        heading TEXT NOT NULL,
+        level INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        PRIMARY KEY (article_id, position)
+    );
+    CREATE TABLE IF NOT EXISTS refs (
+        article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        url TEXT,
+        PRIMARY KEY (article_id, position)
+    );
+    CREATE TABLE IF NOT EXISTS images (
+        article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        PRIMARY KEY (article_id, position)
+    );
+    CREATE TABLE IF NOT EXISTS links (
+        article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        PRIMARY KEY (article_id, position)
+    );
+'''
+
+
+def store_title(topic):
+    # Article titles use spaces ("Web scraping"); topics may use underscores
+    title = topic.replace('_', ' ').strip()
+    return title[:1].upper() + title[1:]
+
+
+def _offline_get(url, **kwargs):
+    # Renders from the store never touch the network; images come from the image cache or are left out
+    raise ConnectionError(f'Offline: not fetching {url}')
+
+
+class ArticleStore:
+    # Extracted articles kept in SQLite, one row per article keyed by its
+    # title in store_title form (so "iPhone" is found as "IPhone" too), with
+    # its sections, references, images and links in child tables. The title
+    # itself is kept as the page gives it. Safe to share between threads.
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA foreign_keys=ON')
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def upsert(self, articles):
+        # Write many articles in one transaction. An article whose stored
+        # revision matches is left alone; a new revision replaces the old rows.
+        # Returns {'inserted', 'updated', 'unchanged'} counts.
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        with self._lock, self._db:
+            for article in articles:
+                key = store_title(article.title)
+                row = self._db.execute('SELECT id, revision FROM articles WHERE key = ?', (key,)).fetchone()
+                if row is not None and article.revision is not None and row[1] == article.revision:
+                    counts['unchanged'] += 1
+                    continue
+                if row is not None:
+                    # The child rows go with it (ON DELETE CASCADE)
+                    self._db.execute('DELETE FROM articles WHERE id = ?', (row[0],))
+                    counts['updated'] += 1
+                else:
+                    counts['inserted'] += 1
+                article_id = self._db.execute(
+                    'INSERT INTO articles (key, title, url, revision, stored_at) VALUES (?, ?, ?, ?, ?)',
+                    (key, article.title, article.url, article.revision, time.time())).lastrowid
+                self._db.executemany(
+                    'INSERT INTO sections (article_id, position, tag, heading, level, content) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(article_id, i, s.heading[0], s.heading[1], s.level, s.content)
+                     for i, s in enumerate(article.sections)])
+                self._db.executemany('INSERT INTO refs (article_id, position, text, url) VALUES (?, ?, ?, ?)',
+                                     [(article_id, i, r.text, r.url) for i, r in enumerate(article.references)])
+                self._db.executemany('INSERT INTO images (article_id, position, url) VALUES (?, ?, ?)',
+                                     [(article_id, i, image.url) for i, image in enumerate(article.images)])
+                self._db.executemany('INSERT INTO links (article_id, position, title) VALUES (?, ?, ?)',
+                                     [(article_id, i, link) for i, link in enumerate(article.links)])
+        return counts
+
+    def revision(self, title):
+        with self._lock:
+            row = self._db.execute('SELECT revision FROM articles WHERE key = ?',
+                                   (store_title(title),)).fetchone()
+        return row[0] if row else None
+
+    def titles(self):
+        with self._lock:
+            return [title for (title,) in self._db.execute('SELECT title FROM articles ORDER BY key')]
+
+    def get(self, title):
+        # The stored Article, or None
+        with self._lock:
+            row = self._db.execute('SELECT id, title, url, revision FROM articles WHERE key = ?',
+                                   (store_title(title),)).fetchone()
+            if row is None:
+                return None
+            article_id = row[0]
+
+            def rows(query):
+                return self._db.execute(query, (article_id,)).fetchall()
+
+            sections = [Section((tag, heading), level, content) for tag, heading, level, content in
+                        rows('SELECT tag, heading, level, content FROM sections WHERE article_id = ? ORDER BY position')]
+            references = [Reference(text, url) for text, url in
+                          rows('SELECT text, url FROM refs WHERE article_id = ? ORDER BY position')]
+            images = [ImageRef(url) for (url,) in
+                      rows('SELECT url FROM images WHERE article_id = ? ORDER BY position')]
+            links = [link for (link,) in rows('SELECT title FROM links WHERE article_id = ? ORDER BY position')]
+        return Article(row[1], row[2], row[3], sections, references, images, links)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def render_stored(store, titles=None, output_dir=None, verbose=False, image_cache=None, process_workers=None):
+    # Write the PDF and CSV of stored articles (all of them by default) with
+    # no network access. Images are taken from the image cache when they
+    # are there and skipped otherwise.
+    # Returns {'topic', 'result'} or {'topic', 'error'} per title, in order.
+    from enhanced_wikipedia_scraper import render_article
+    results = []
+    for title in (titles if titles is not None else store.titles()):
+        topic = store_title(title).replace(' ', '_')
+        article = store.get(title)
+        if article is None:
+            results.append({'topic': topic, 'error': 'Article not in store'})
+            continue
+        try:
+            result = render_article(topic, article.to_dict(), get=_offline_get, output_dir=output_dir,
+                                    verbose=verbose, image_cache=image_cache, process_workers=process_workers)
+            results.append({'topic': topic, 'result': result})
+        except Exception as e:
+            results.append({'topic': topic, 'error': str(e)})
+    return results
@@ -0,0 +1,341 @@
+import codecs
+from html.parser import HTMLParser
+
+from scraper import http_client
+from scraper.utils import clean_text
+
+HEADING_TAGS = ('h2', 'h3', 'h4')
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'param', 'source', 'track', 'wbr'}
+# BeautifulSoup's get_text() leaves these out, so the stream does too
+SKIP_TEXT_TAGS = {'script', 'style'}
+
+# Caps matching parse_article: thumbnails, infobox images, and the first
+# 20 images of the page when they are wider than 100px
+MAX_THUMBNAILS = 15
+MAX_INFOBOX_IMAGES = 5
+MAX_CONTENT_IMAGES = 20
+
+
+class _Node:
+    # Minimal element used for the one top-level element being parsed.
+    # infobox is set on the page's first infobox and everything inside it.
+    __slots__ = ('tag', 'attrs', 'children', 'infobox')
+
+    def __init__(self, tag, attrs, infobox=False):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.infobox = infobox
+
+    def get(self, name, default=None):
+        value = self.attrs.get(name)
+        return default if value is None else value
+
+    def iter(self, *tags):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if not tags or node.tag in tags:
+                yield node
+            stack.extend(child for child in reversed(node.children) if isinstance(child, _Node))
+
+    def itertext(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif node.tag not in SKIP_TEXT_TAGS:
+                stack.extend(reversed(node.children))
+
+
+def _classes(element):
+    return element.get('class', '').split()
+
+
+def _text(element):
+    return ''.join(element.itertext())
+
+
+def _absolute(src):
+    return src if src.startswith('http') else 'https:' + src
+
+
+def _heading_of(element):
+    if element.tag in HEADING_TAGS:
+        return element
+    if element.tag == 'div' and 'mw-heading' in _classes(element):
+        return next(element.iter(*HEADING_TAGS), None)
+    return None
+
+
+def _reference(note):
+    ref_text = _text(note)
+    for link in note.iter('a'):
+        if 'external' in _classes(link) and link.get('href'):
+            return ref_text, {'text': ref_text[:50] + '...', 'url': link.get('href')}
+    return ref_text, None
+
+
+class _ArticleState:
+    # Everything the stream remembers between elements: the open section,
+    # image counters and the citation bookkeeping for pages without a
+    # reflist. None of it grows with the HTML tree itself.
+    def __init__(self):
+        self.heading = None
+        self.content = []
+        self.intro = None
+        # Image candidates of each kind, in the order select_images takes them
+        self.thumbnails = []
+        self.infobox_images = []
+        self.content_images = []
+        self.content_seen = 0
+        self.has_reflist = False
+        self.cited_ids = {}
+        self.notes = {}
+
+    def close_section(self):
+        if self.heading and self.content:
+            return {
+                'heading': self.heading,
+                'level': int(self.heading[0][1]),
+                'content': '\n\n'.join(self.content)
+            }
+        return None
+
+
+def _images(element, state):
+    # Each cap counts every <img> of its kind in document order, as the
+    # slices in select_images do. At most the capped number of each kind is
+    # kept, so this stays small however many images the page has.
+    for img in element.iter('img'):
+        src = img.get('src')
+        src = _absolute(src) if src else None
+        if 'thumbimage' in _classes(img) and len(state.thumbnails) < MAX_THUMBNAILS:
+            state.thumbnails.append(src)
+        if img.infobox and len(state.infobox_images) < MAX_INFOBOX_IMAGES:
+            state.infobox_images.append(src)
+        state.content_seen += 1
+        if state.content_seen <= MAX_CONTENT_IMAGES and img.get('width', '').isdigit() \
+                and int(img.get('width')) > 100:
+            state.content_images.append(src)
+
+
+def _citations(element, state):
+    # Without a reflist, remember which notes are cited and the notes themselves
+    if state.has_reflist:
+        return
+    for sup in element.iter('sup'):
+        if 'reference' in _classes(sup):
+            link = next(sup.iter('a'), None)
+            cite_id = link.get('href', '').replace('#', '') if link is not None else ''
+            if cite_id:
+                state.cited_ids.setdefault(cite_id, None)
+    for note in element.iter('li'):
+        note_id = note.get('id')
+        if note_id and note_id not in state.notes:
+            state.notes[note_id] = _reference(note)
+
+
+def _top_level(element, state, events):
+    # Same rules as extract_sections, applied to one finished element
+    heading = _heading_of(element)
+    if heading is not None:
+        section = state.close_section()
+        if section:
+            events.append(('section', section))
+        heading_text = _text(heading).replace('[edit]', '').strip()
+        state.heading = (heading.tag, heading_text)
+        state.content = []
+        # Paragraphs before the first heading form the introduction
+        if state.intro:
+            events.append(('section', {'heading': ('h1', 'Introduction'), 'level': 1,
+                                       'content': '\n\n'.join(state.intro)}))
+            state.intro = None
+    elif element.tag == 'p':
+        text = _text(element)
+        if text.strip():
+            if state.heading:
+                state.content.append(clean_text(text))
+            elif state.intro is None:
+                state.intro = [clean_text(text)]
+            else:
+                state.intro.append(clean_text(text))
+    elif element.tag in ('ul', 'ol', 'table') and state.heading:
+        list_content = clean_text(_text(element).strip())
+        if list_content:
+            state.content.append(list_content)
+
+    _images(element, state)
+    _citations(element, state)
+
+
+class _ArticleParser(HTMLParser):
+    # Push parser over the article HTML. Outside mw-parser-output only the
+    # open tags are tracked; inside it, a small tree is built for the current
+    # top-level element and handed off as soon as that element closes.
+    # Nested list items and table rows are folded to their text when they
+    # close, and reflist entries are emitted and dropped one by one, so
+    # memory stays flat however long the article is.
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.state = _ArticleState()
+        self.events = []
+        self.tags = []
+        self.root_depth = None
+        self.nodes = []
+        # Only the first infobox and the first reflist count, as in parse_article
+        self.infobox_depth = None
+        self.seen_infobox = False
+        self.reflist_depth = None
+        self.title = None
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, dict(attrs))
+        if tag in VOID_TAGS:
+            self._end()
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, dict(attrs))
+        self._end()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or tag not in self.tags:
+            return
+        # Close anything left open inside the element, as browsers do
+        while self.tags[-1] != tag:
+            self._end()
+        self._end()
+
+    def handle_data(self, data):
+        if self.nodes:
+            self.nodes[-1].children.append(data)
+        elif self.title is not None:
+            self.title.append(data)
+
+    def _start(self, tag, attrs):
+        self.tags.append(tag)
+        classes = (attrs.get('class') or '').split()
+
+        if self.root_depth is None:
+            if tag == 'div' and 'mw-parser-output' in classes:
+                self.root_depth = len(self.tags)
+            elif tag == 'h1' and attrs.get('id') == 'firstHeading':
+                self.title = []
+            return
+
+        if not self.seen_infobox and tag == 'table' and 'infobox' in classes:
+            self.infobox_depth = len(self.tags)
+            self.seen_infobox = True
+        node = _Node(tag, attrs, self.infobox_depth is not None)
+        if self.nodes:
+            self.nodes[-1].children.append(node)
+        self.nodes.append(node)
+
+        if not self.state.has_reflist and tag == 'div' and 'reflist' in classes:
+            # A reflist wins over the citation fallback, as in parse_article
+            self.reflist_depth = len(self.tags)
+            self.state.has_reflist = True
+            self.state.cited_ids.clear()
+            self.state.notes.clear()
+
+    def _end(self):
+        depth = len(self.tags)
+        tag = self.tags.pop()
+
+        if self.root_depth is None:
+            if tag == 'h1' and self.title is not None:
+                self.events.append(('title', ''.join(self.title)))
+                self.title = None
+            return
+        if depth == self.root_depth:
+            self.root_depth = None  # mw-parser-output itself has ended
+            return
+
+        node = self.nodes.pop()
+        if depth == self.infobox_depth:
+            self.infobox_depth = None
+        if self.nodes:
+            # Nested inside a top-level element that is still open
+            if depth == self.reflist_depth:
+                self.reflist_depth = None
+            elif self.reflist_depth is not None and tag == 'li':
+                _images(node, self.state)
+                self.events.append(('reference',) + _reference(node))
+                self.nodes[-1].children.pop()
+            elif tag in ('li', 'tr'):
+                _images(node, self.state)
+                _citations(node, self.state)
+                node.children = [_text(node)]
+        else:
+            # A direct child of mw-parser-output is complete
+            if depth == self.reflist_depth:
+                self.reflist_depth = None
+            _top_level(node, self.state, self.events)
+
+    def finish(self):
+        state = self.state
+        if state.intro:
+            self.events.append(('section', {'heading': ('h1', 'Introduction'), 'level': 1,
+                                            'content': '\n\n'.join(state.intro)}))
+        section = state.close_section()
+        if section:
+            self.events.append(('section', section))
+        if not state.has_reflist:
+            for cite_id in state.cited_ids:
+                if cite_id in state.notes:
+                    self.events.append(('reference',) + state.notes[cite_id])
+        # Thumbnails, then infobox images, then wide images, as select_images orders them
+        seen = set()
+        for src in state.thumbnails + state.infobox_images + state.content_images:
+            if src and src not in seen:
+                seen.add(src)
+                self.events.append(('image', src))
+
+
+def iter_article_events(chunks, encoding='utf-8'):
+    # Incrementally parse article HTML fed as an iterable of byte chunks and
+    # yield ('title', text), ('section', dict) and ('reference', text,
+    # ref_url_or_None) as soon as each is complete, then ('image', url) in
+    # the order parse_article picks images
+    parser = _ArticleParser()
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        yield from parser.events
+        parser.events.clear()
+
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    parser.finish()
+    yield from parser.events
+
+
+def stream_article(url, get=None, chunk_size=64 * 1024):
+    # Fetch with a streamed body so the HTML is never held in one piece
+    get = get or http_client.get
+    response = get(url, stream=True)
+    if response.status_code != 200:
+        raise ValueError(f'Failed to fetch page: {response.status_code}')
+    return iter_article_events(response.iter_content(chunk_size))
+
+
+def collect_article(events):
+    # Fold a stream into the title/sections/references/ref_urls/images
+    # dict parse_article returns, keeping only the extracted text
+    article = {'title': None, 'sections': [], 'references': [], 'ref_urls': [], 'images': []}
+    for event in events:
+        kind = event[0]
+        if kind == 'title':
+            article['title'] = event[1]
+        elif kind == 'section':
+            article['sections'].append(event[1])
+        elif kind == 'image':
+            article['images'].append(event[1])
+        elif kind == 'reference':
+            if event[2]:
+                article['ref_urls'].append(dict(event[2], index=len(article['references'])))
+            article['references'].append(event[1])
+    return article
@@ -0,0 +1,125 @@
+import os
+import csv
+import json
+import threading
+
+# One summary file for a whole batch, written as the articles come in: a row
+# per section instead of one CSV (holding one big cell) per topic.
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+COLUMNS = ('topic', 'title', 'url', 'position', 'level', 'heading', 'summary')
+EXCERPT_CHARS = 100
+# Parquet rows are buffered and written a row group at a time
+PARQUET_ROW_GROUP = 10000
+
+
+def first_sentence(content, limit=EXCERPT_CHARS):
+    # Text up to the first '.', or the first limit-3 characters and '...'.
+    # Only the first `limit` characters are scanned, however long the section.
+    end = content.find('.', 0, limit)
+    if end >= 0:
+        return content[:end + 1]
+    if len(content) < limit:
+        return content + '.'
+    return content[:limit - 3] + '...'
+
+
+def first_paragraph(content):
+    end = content.find('\n\n')
+    return content if end < 0 else content[:end]
+
+
+def summary_rows(topic, title, url, sections):
+    # One row per section: the introduction keeps its first paragraph,
+    # every other section its first sentence
+    for position, section in enumerate(sections):
+        heading = section['heading'][1]
+        content = section['content']
+        if heading == 'Introduction':
+            if position != 0:
+                continue
+            summary = first_paragraph(content)
+        else:
+            summary = first_sentence(content) if content else ''
+        yield {'topic': topic, 'title': title, 'url': url, 'position': position, 'level': section['level'],
+               'heading': heading, 'summary': summary}
+
+
+def summary_format(path):
+    for name in FORMATS:
+        if path.endswith('.' + name):
+            return name
+    return 'csv'
+
+
+class SummaryWriter:
+    # Keeps one output open across a batch and streams a row per section.
+    # format is 'csv', 'jsonl' or 'parquet' (needs pyarrow), by default taken
+    # from the file extension. Safe to share between the threads of a batch.
+    def __init__(self, path, format=None):
+        self.path = path
+        self.format = format or summary_format(path)
+        if self.format not in FORMATS:
+            raise ValueError(f'Unknown summary format: {self.format}')
+        self.rows = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self._parquet = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if self.format == 'parquet':
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError('Parquet summaries need pyarrow (pip install pyarrow)') from None
+            self._schema = pyarrow.schema([('topic', pyarrow.string()), ('title', pyarrow.string()),
+                                           ('url', pyarrow.string()), ('position', pyarrow.int32()),
+                                           ('level', pyarrow.int8()), ('heading', pyarrow.string()),
+                                           ('summary', pyarrow.string())])
+            self._parquet = pyarrow.parquet.ParquetWriter(path, self._schema)
+            self._file = None
+        else:
+            self._file = open(path, mode='w', newline='', encoding='utf-8')
+            if self.format == 'csv':
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(COLUMNS)
+
+    def write_article(self, topic, title, url, sections):
+        # Returns the number of rows written
+        rows = list(summary_rows(topic, title, url, sections))
+        with self._lock:
+            if self.format == 'csv':
+                self._csv.writerows([row[column] for column in COLUMNS] for row in rows)
+            elif self.format == 'jsonl':
+                self._file.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+            else:
+                self._pending.extend(rows)
+                if len(self._pending) >= PARQUET_ROW_GROUP:
+                    self._flush_parquet()
+            self.rows += len(rows)
+        return len(rows)
+
+    def _flush_parquet(self):
+        import pyarrow
+        if self._pending:
+            self._parquet.write_table(pyarrow.Table.from_pylist(self._pending, schema=self._schema))
+            self._pending = []
+
+    def close(self):
+        with self._lock:
+            if self._parquet is not None:
+                self._flush_parquet()
+                self._parquet.close()
+                self._parquet = None
+            elif self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
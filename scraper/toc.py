@@ -0,0 +1,121 @@
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, Paragraph
+from reportlab.platypus.tableofcontents import TableOfContents
+
+# Table of contents and PDF outline for generate_enhanced_pdf.
+#
+# 'forms' (the default) lays the document out once. The TOC lines are known
+# before layout (one per section), so they are placed up front; only their
+# page numbers are unknown. Each number is drawn as a reference to a PDF form
+# XObject, and the forms are filled in with the real page numbers just before
+# the file is saved.
+# 'multibuild' is reportlab's standard TableOfContents + multiBuild, which lays
+# the whole document out at least twice. 'none' leaves the TOC out.
+
+TOC_MODES = ('forms', 'multibuild', 'none')
+PAGE_NUMBER_WIDTH = 30
+
+
+def outline_level(level, previous):
+    # The introduction (h1) and h2 sections are top level. PDF outlines can't
+    # skip a level, so an h4 straight after an h2 becomes its child.
+    return min(max(0, level - 2), previous + 1)
+
+
+class TocEntry(Flowable):
+    # One TOC line: a link to the section, and its page number drawn through
+    # a form that is filled in after layout
+    def __init__(self, text, key, style):
+        Flowable.__init__(self)
+        self.key = key
+        self.style = style
+        self.para = Paragraph(f"<a href='#{key}'>{text}</a>", style)
+
+    def wrap(self, available_width, available_height):
+        self.width = available_width
+        _, self.height = self.para.wrap(available_width - PAGE_NUMBER_WIDTH, available_height)
+        return self.width, self.height
+
+    def draw(self):
+        self.para.drawOn(self.canv, 0, 0)
+        self.canv.saveState()
+        self.canv.translate(self.width, self.height - self.style.fontSize)
+        self.canv.doForm(f'page-of-{self.key}')
+        self.canv.restoreState()
+
+
+class SectionIndex:
+    # Collects the page of every section heading while the document is laid
+    # out, and turns that into the TOC page numbers and the PDF outline
+    def __init__(self, mode='forms', styles=None):
+        if mode not in TOC_MODES:
+            raise ValueError(f'Unknown toc_mode: {mode}')
+        self.mode = mode
+        self.styles = styles
+        self.entries = []
+        self.pages = {}
+        self._outline_level = -1
+        self._toc = None
+
+    def heading(self, text, level, style):
+        # Heading paragraph carrying a named destination for links and the outline
+        key = f'section-{len(self.entries)}'
+        self.entries.append((text, level, key))
+        para = Paragraph(f"<a name='{key}'/>{text}", style)
+        para._toc_entry = (text, level, key)
+        return para
+
+    def flowables(self):
+        # The TOC itself, to be placed before the sections. Call after every
+        # heading() so the one-pass lines can be laid out up front.
+        if self.mode == 'forms':
+            return [TocEntry(text, key, self.styles[min(level, 3) - 1]) for text, level, key in self.entries]
+        if self.mode == 'multibuild':
+            self._toc = TableOfContents()
+            self._toc.levelStyles = self.styles
+            return [self._toc]
+        return []
+
+    def after_flowable(self, doc, flowable):
+        entry = getattr(flowable, '_toc_entry', None)
+        if entry is None:
+            return
+        text, level, key = entry
+        page = doc.canv.getPageNumber()
+        if key not in self.pages:
+            self._outline_level = outline_level(level, self._outline_level)
+            doc.canv.addOutlineEntry(text, key, self._outline_level)
+        self.pages[key] = page
+        if self.mode == 'multibuild':
+            doc.notify('TOCEntry', (min(level, 3) - 1, text, page, key))
+
+    def fill_page_numbers(self, canvas):
+        # The cheap fix-up step: one tiny form per TOC line
+        for _, _, key in self.entries:
+            canvas.beginForm(f'page-of-{key}', lowerx=-PAGE_NUMBER_WIDTH, lowery=-5, upperx=0, uppery=20)
+            canvas.setFont(self.styles[0].fontName, 10)
+            canvas.drawRightString(0, 0, str(self.pages.get(key, '')))
+            canvas.endForm()
+
+    def reset(self):
+        # Called at the start of every layout pass; multiBuild makes several,
+        # each on a fresh canvas
+        self.pages = {}
+        self._outline_level = -1
+
+    def build(self, doc, elements):
+        doc.beforeDocument = self.reset
+        doc.afterFlowable = lambda flowable: self.after_flowable(doc, flowable)
+        if self.mode == 'multibuild':
+            doc.multiBuild(elements)
+        elif self.mode == 'forms':
+            index = self
+
+            class IndexedCanvas(Canvas):
+                def save(self):
+                    index.fill_page_numbers(self)
+                    Canvas.save(self)
+
+            doc.build(elements, canvasmaker=IndexedCanvas)
+        else:
+            doc.build(elements)
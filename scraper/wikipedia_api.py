@@ -1,9 +1,131 @@
-import wikipediaapi
+import time
+import threading
 
-def get_wikipedia_summary(title, lang="en"):
-    wiki = wikipediaapi.Wikipedia(lang)
-    page = wiki.page(title)
-    if page.exists():
-        return {'title': page.title, 'summary': page.summary[:1000], 'url': page.fullurl}
+from scraper import http_client
+
+API_URL = 'https://{lang}.wikipedia.org/w/api.php'
+
+# prop=extracts returns at most 20 intro extracts per request (exlimit)
+MAX_TITLES_PER_QUERY = 20
+SUMMARY_CHARS = 1000
+
+
+class SummaryClient:
+    # Fetches article summaries for one language, many titles per API request,
+    # and keeps the results (including "not found") for `ttl` seconds
+    def __init__(self, lang='en', get=None, api_url=None, ttl=3600, batch_size=MAX_TITLES_PER_QUERY):
+        self.get = get or http_client.get
+        self.api_url = api_url or API_URL.format(lang=lang)
+        self.ttl = ttl
+        self.batch_size = min(batch_size, MAX_TITLES_PER_QUERY)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, title):
+        with self._lock:
+            entry = self._cache.get(title)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            return None
+
+    def _store(self, title, result):
+        if self.ttl:
+            with self._lock:
+                self._cache[title] = (time.monotonic() + self.ttl, result)
+
+    def _query(self, titles):
+        # One multi-title query, following continuations until every extract is in.
+        # Returns {requested title: result}.
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': 2,
+            'prop': 'extracts|info',
+            'exintro': 1,
+            'explaintext': 1,
+            # Let the server cut the extract instead of sending all of it
+            'exchars': SUMMARY_CHARS,
+            'exlimit': len(titles),
+            'inprop': 'url',
+            'redirects': 1,
+            'titles': '|'.join(titles)
+        }
+        pages = {}
+        renamed = {}
+        while True:
+            response = self.get(self.api_url, params=params)
+            if response.status_code != 200:
+                error = {'error': f'Failed to fetch summary: {response.status_code}'}
+                return {title: error for title in titles}
+            data = response.json()
+            query = data.get('query', {})
+            # Titles are normalized ("web scraping" -> "Web scraping"), then redirected
+            for change in query.get('normalized', []) + query.get('redirects', []):
+                renamed[change['from']] = change['to']
+            for page in query.get('pages', []):
+                known = pages.setdefault(page['title'], page)
+                if 'extract' in page:
+                    known['extract'] = page['extract']
+            if 'continue' not in data:
+                break
+            params = {**params, **data['continue']}
+
+        results = {}
+        for title in titles:
+            final = title
+            while final in renamed and renamed[final] != final:
+                final = renamed[final]
+            page = pages.get(final)
+            if page and 'missing' not in page and 'invalid' not in page:
+                results[title] = {'title': page['title'], 'summary': page.get('extract', '')[:SUMMARY_CHARS],
+                                  'url': page['fullurl']}
+            else:
+                results[title] = {'error': 'Page not found'}
+        return results
+
+    def summaries(self, titles):
+        # Returns {title: {'title', 'summary', 'url'} or {'error'}} in input order
+        results = {}
+        pending = []
+        for title in dict.fromkeys(titles):
+            cached = self._cached(title)
+            if cached is not None:
+                results[title] = cached
+            else:
+                pending.append(title)
+
+        for start in range(0, len(pending), self.batch_size):
+            for title, result in self._query(pending[start:start + self.batch_size]).items():
+                results[title] = result
+                # Request failures are retried next time; missing pages are remembered
+                if not result.get('error', '').startswith('Failed'):
+                    self._store(title, result)
+        return {title: results[title] for title in dict.fromkeys(titles)}
+
+    def summary(self, title):
+        return self.summaries([title])[title]
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_summary_client(lang='en'):
+    # One shared client (and cache) per language
+    with _clients_lock:
+        if lang not in _clients:
+            _clients[lang] = SummaryClient(lang)
+        return _clients[lang]
+
+
+def get_wikipedia_summaries(titles, lang="en", get=None, api_url=None):
+    # A custom `get` or API URL gets its own client, so it never shares the cache
+    if get is None and api_url is None:
+        client = get_summary_client(lang)
     else:
-        return {'error': 'Page not found'}
+        client = SummaryClient(lang, get=get, api_url=api_url, ttl=0)
+    return client.summaries(titles)
+
+
+def get_wikipedia_summary(title, lang="en", get=None, api_url=None):
+    return get_wikipedia_summaries([title], lang=lang, get=get, api_url=api_url)[title]
@@ -0,0 +1,197 @@
+import re
+import html
+from urllib.parse import quote
+
+from scraper.utils import clean_text
+
+# Converts raw wikitext (what dumps store) into the same title/sections/
+# references/ref_urls/images/links dict parse_article builds from HTML.
+# This is a pragmatic subset of the markup, not a MediaWiki parser:
+# templates and tables are dropped, links keep their label, and
+# headings, paragraphs and lists become sections.
+
+# Same cap as parse_article: 15 thumbnails plus 5 infobox images
+MAX_IMAGES = 20
+FILE_URL = 'https://en.wikipedia.org/wiki/Special:FilePath/{}'
+FILE_NAMESPACES = ('file', 'image')
+DROPPED_NAMESPACES = ('category', 'wikipedia', 'wp', 'help', 'template', 'portal', 'special', 'media')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.tif', '.tiff', '.webp')
+
+_COMMENT = re.compile(r'<!--.*?(?:-->|$)', re.S)
+_REF = re.compile(r'<ref\b([^>]*?)(?:/>|>(.*?)</ref\s*>)', re.S | re.I)
+_REF_NAME = re.compile(r'name\s*=\s*"?([^">/]+?)"?\s*$', re.I)
+_BLOCK_TAGS = re.compile(r'<(gallery|math|syntaxhighlight|score|timeline|imagemap)\b.*?</\1\s*>', re.S | re.I)
+_TEMPLATE = re.compile(r'\{\{(?:(?!\{\{)[^}]|\}(?!\}))*\}\}', re.S)
+_TABLE = re.compile(r'\{\|(?:(?!\{\|).)*?\|\}', re.S)
+_INFOBOX_IMAGE = re.compile(r'\|\s*(?:image|logo|flag|map)\w*\s*=\s*([^|\n}<\[]+)', re.I)
+_LINK = re.compile(r'\[\[([^\[\]]*)\]\]')
+_EXTERNAL = re.compile(r'\[(?:https?:)?//[^\s\]]+(?:\s+([^\]]*))?\]')
+_URL = re.compile(r'https?://[^\s|\]}<"]+')
+_CITE_URL = re.compile(r'\|\s*url\s*=\s*([^\s|}]+)', re.I)
+_HEADING = re.compile(r'^(={2,6})\s*(.+?)\s*\1\s*$')
+_TAG = re.compile(r'<[^>]*>')
+_MAGIC = re.compile(r'__[A-Z]+__')
+_QUOTES = re.compile(r"'{2,}")
+_SPACES = re.compile(r'[ \t]{2,}')
+
+
+def _strip_repeatedly(pattern, text, replace=''):
+    # Nested templates/tables: remove the innermost ones until none are left
+    while True:
+        text, count = pattern.subn(replace, text)
+        if not count:
+            return text
+
+
+def file_url(name):
+    # Special:FilePath redirects to the file wherever it lives (Commons or local)
+    return FILE_URL.format(quote(name.strip().replace(' ', '_')))
+
+
+def _cite_text(content):
+    # "{{cite web |title=... |website=... |date=...}}" -> "Title. Website. Date."
+    template = _TEMPLATE.search(content)
+    if not template or not template.group(0)[2:].lstrip().lower().startswith('cite'):
+        return None
+    params = {}
+    for part in template.group(0)[2:-2].split('|')[1:]:
+        name, equals, value = part.partition('=')
+        if equals:
+            params[name.strip().lower()] = value.strip()
+    author = params.get('author') or ' '.join(filter(None, [params.get('first'), params.get('last')]))
+    source = next((params[key] for key in ('work', 'website', 'newspaper', 'journal', 'publisher')
+                   if params.get(key)), None)
+    parts = [author, params.get('title'), source, params.get('date')]
+    return '. '.join(part for part in parts if part) + '.' if any(parts) else None
+
+
+def _inline(text, links=None, images=None):
+    # Links, external links, quotes, tags and entities -> plain text
+    def link(match):
+        target, _, label = match.group(1).partition('|')
+        target = target.strip().lstrip(':')
+        prefix = target.partition(':')[0].strip().lower() if ':' in target else ''
+        if prefix in FILE_NAMESPACES:
+            if images is not None and len(images) < MAX_IMAGES:
+                images.append(file_url(target.partition(':')[2]))
+            return ''
+        if prefix in DROPPED_NAMESPACES or (len(prefix) in (2, 3) and prefix.isalpha() and not label):
+            # Categories, project pages and interlanguage links are not article text
+            return ''
+        title = target.split('#')[0].strip().replace(' ', '_')
+        if links is not None and title:
+            links.setdefault(title[:1].upper() + title[1:], None)
+        return label.rpartition('|')[2] if label else target
+
+    text = _strip_repeatedly(_LINK, text, link)
+    text = _EXTERNAL.sub(lambda match: match.group(1) or '', text)
+    text = _QUOTES.sub('', text)
+    text = text.replace('<br>', ' ').replace('<br/>', ' ').replace('<br />', ' ')
+    text = html.unescape(_TAG.sub('', text))
+    return _SPACES.sub(' ', text.replace('\xa0', ' ')).strip()
+
+
+def _references(text):
+    # Pull <ref> bodies out in order; a named ref is listed once however often it is cited
+    references = []
+    ref_urls = []
+    seen = set()
+
+    def ref(match):
+        attrs, content = match.group(1), match.group(2)
+        name = _REF_NAME.search(attrs.strip())
+        if content is None or not content.strip() or (name and name.group(1) in seen):
+            return ''
+        if name:
+            seen.add(name.group(1))
+        ref_text = _cite_text(content) or _inline(_strip_repeatedly(_TEMPLATE, content))
+        url = _CITE_URL.search(content) or _URL.search(content)
+        if url:
+            ref_urls.append({'text': ref_text[:50] + '...', 'url': url.group(1) if url.re is _CITE_URL
+                             else url.group(0), 'index': len(references)})
+        references.append(ref_text)
+        return ''
+
+    return _REF.sub(ref, text), references, ref_urls
+
+
+def parse_wikitext(title, text):
+    text = _COMMENT.sub('', text)
+    text = _BLOCK_TAGS.sub('', text)
+    text, references, ref_urls = _references(text)
+
+    # Infobox images first, as parse_article lists them, then drop templates and tables
+    images = []
+    for template in _TEMPLATE.finditer(text):
+        if template.group(0)[2:].lstrip().lower().startswith('infobox'):
+            for name in _INFOBOX_IMAGE.findall(template.group(0)):
+                name = name.strip()
+                if name.lower().endswith(IMAGE_EXTENSIONS) and len(images) < 5:
+                    images.append(file_url(name.partition(':')[2] if ':' in name else name))
+    text = _strip_repeatedly(_TEMPLATE, text)
+    text = _strip_repeatedly(_TABLE, text)
+    text = _MAGIC.sub('', text)
+
+    links = {}
+    sections = []
+    current_heading = None
+    current_content = []
+    paragraph = []
+    items = []
+
+    def flush():
+        # Close the paragraph or list being collected, as one block of the section
+        if paragraph:
+            block = clean_text(_inline(' '.join(paragraph), links, images))
+            if block:
+                if current_heading:
+                    current_content.append(block)
+                elif not sections:
+                    sections.append({'heading': ('h1', 'Introduction'), 'level': 1, 'content': block})
+                else:
+                    sections[0]['content'] += '\n\n' + block
+            paragraph.clear()
+        if items:
+            # Lists only count inside a section, as in extract_sections
+            block = clean_text('\n'.join(filter(None, (_inline(item, links, images) for item in items))))
+            if block and current_heading:
+                current_content.append(block)
+            items.clear()
+
+    for line in text.split('\n'):
+        stripped = line.strip()
+        heading = _HEADING.match(stripped)
+        if heading:
+            flush()
+            if len(heading.group(1)) > 4:
+                continue
+            if current_heading and current_content:
+                sections.append({'heading': current_heading, 'level': int(current_heading[0][1]),
+                                 'content': '\n\n'.join(current_content)})
+            current_heading = (f'h{len(heading.group(1))}', _inline(heading.group(2)))
+            current_content = []
+        elif not stripped:
+            flush()
+        elif stripped[0] in '*#':
+            if paragraph:
+                flush()
+            items.append(stripped.lstrip('*#:; '))
+        elif stripped[0] in ':;|!':
+            continue
+        else:
+            if items:
+                flush()
+            paragraph.append(stripped)
+    flush()
+    if current_heading and current_content:
+        sections.append({'heading': current_heading, 'level': int(current_heading[0][1]),
+                         'content': '\n\n'.join(current_content)})
+
+    return {
+        'title': title,
+        'sections': sections,
+        'references': references,
+        'ref_urls': ref_urls,
+        'images': list(dict.fromkeys(images)),
+        'links': list(links)
+    }
@@ -1,5 +1,5 @@
-from scraper.wikipedia_scraper import scrape_wikipedia
+from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
 
 # This script will run the enhanced Wikipedia scraper
 if __name__ == "__main__":
-    scrape_wikipedia()
\ No newline at end of file
+    scrape_enhanced_wikipedia()
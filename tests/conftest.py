@@ -0,0 +1,51 @@
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+# Add the project root to sys.path for proper imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    # Keep-alive capable handler answering from the server's route table
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # setup() runs once per TCP connection, not once per request
+        self.server.connections.append(self.client_address)
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        route = self.server.routes.get(urlsplit(self.path).path, (404, {}, b'not found'))
+        status, headers, body = route(self) if callable(route) else route
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def standin_server():
+    # Local stand-in for Wikipedia: tests fill server.routes with
+    # path -> (status, headers, body) or path -> callable(handler)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandinHandler)
+    server.daemon_threads = True
+    server.routes = {}
+    server.requests = []
+    server.connections = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
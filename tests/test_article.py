@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.corpus import synthetic_article
+from enhanced_wikipedia_scraper import parse_article, scrape_enhanced_wikipedia
+from scraper.article import Article, Section
+
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+
+def test_extract_only_returns_article_without_fetching_images(tmp_path):
+    html = synthetic_article(sections=10)
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        return FakeResponse(html)
+
+    article = scrape_enhanced_wikipedia('India', get=get, output_dir=str(tmp_path), verbose=False,
+                                        page_cache=False, extract_only=True)
+    assert isinstance(article, Article)
+    assert calls == ['https://en.wikipedia.org/wiki/India']
+    assert article.revision == 1234567
+    assert isinstance(article.sections[0], Section)
+    assert article.images
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_article_round_trips_the_parse_dict():
+    data = parse_article(synthetic_article(sections=10, reflist=False))
+    restored = Article.from_dict(data).to_dict()
+    for key in ('title', 'sections', 'references', 'ref_urls', 'images'):
+        assert restored[key] == data[key]
+
+
+def test_reference_links_are_paired_by_index():
+    # Same first 50 characters, and only the second one has a link
+    prefix = 'A' * 50
+    data = {'title': 'India', 'sections': [], 'images': [],
+            'references': [prefix + ' first', prefix + ' second', 'Third'],
+            'ref_urls': [{'text': prefix + '...', 'url': 'https://example.org/2', 'index': 1},
+                         {'text': 'Third...', 'url': 'https://example.org/3', 'index': 2}]}
+    article = Article.from_dict(data)
+    assert [reference.url for reference in article.references] == [None, 'https://example.org/2',
+                                                                    'https://example.org/3']
+    assert article.to_dict()['ref_urls'] == data['ref_urls']
+
+
+def test_import_does_not_load_rendering_libraries():
+    code = ('import sys, enhanced_wikipedia_scraper; '
+            'print(any(m in sys.modules for m in ("reportlab", "PIL")))')
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=PROJECT_ROOT)
+    assert output.strip() == b'False'
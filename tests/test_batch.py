@@ -0,0 +1,56 @@
+import threading
+import time
+
+from scraper.batch import load_topics, scrape_batch
+
+
+def test_batch_collects_results_and_errors_in_order():
+    def fake_scrape(topic, get=None, output_dir=None, verbose=True):
+        if topic == 'Missing':
+            return {'error': 'Failed to fetch page: 404'}
+        if topic == 'Broken':
+            raise ValueError('boom')
+        return {'title': topic}
+
+    results = scrape_batch(['India', 'Missing', 'Broken', 'Nepal'], max_workers=4, scrape=fake_scrape)
+    assert [r['topic'] for r in results] == ['India', 'Missing', 'Broken', 'Nepal']
+    assert results[0]['result'] == {'title': 'India'}
+    assert results[1]['error'] == 'Failed to fetch page: 404'
+    assert results[2]['error'] == 'boom'
+
+
+def test_host_limiter_caps_concurrent_requests_per_host():
+    lock = threading.Lock()
+    active = {'now': 0, 'peak': 0}
+
+    def slow_get(url):
+        with lock:
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+        time.sleep(0.02)
+        with lock:
+            active['now'] -= 1
+
+    def fake_scrape(topic, get=None, output_dir=None, verbose=True):
+        get(f'https://en.wikipedia.org/wiki/{topic}')
+        return {'title': topic}
+
+    scrape_batch([f'T{i}' for i in range(12)], max_workers=8, per_host_limit=2,
+                 get=slow_get, scrape=fake_scrape)
+    assert active['peak'] <= 2
+
+
+def test_load_topics_skips_blanks_and_comments(tmp_path):
+    path = tmp_path / 'topics.txt'
+    path.write_text('India\n\n# comment\nNepal\n', encoding='utf-8')
+    assert load_topics(str(path)) == ['India', 'Nepal']
+
+
+def test_a_string_is_a_topics_file_only_when_the_file_exists(tmp_path):
+    def fake_scrape(topic, get=None, output_dir=None, verbose=True):
+        return {'title': topic}
+
+    path = tmp_path / 'topics.txt'
+    path.write_text('India\nNepal\n', encoding='utf-8')
+    assert [r['topic'] for r in scrape_batch(str(path), scrape=fake_scrape)] == ['India', 'Nepal']
+    assert [r['topic'] for r in scrape_batch('India', scrape=fake_scrape)] == ['India']
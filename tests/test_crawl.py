@@ -0,0 +1,82 @@
+from benchmarks.standin import StandinServer
+from scraper.crawl import SeenSet, canonical_title, crawl, namespace_of
+
+
+def page(title, links):
+    body = ''.join(f'<a href="/wiki/{link}">{link}</a> ' for link in links)
+    return (f'<html><body><h1 id="firstHeading">{title}</h1><div id="mw-content-text">'
+            f'<div class="mw-parser-output"><p>{title} links to {body}</p></div></div></body></html>').encode()
+
+
+GRAPH = {
+    'India': page('India', ['Nepal', 'Bharat', 'File:Flag.svg', 'Help:Contents', 'India#History']),
+    'Bharat': page('India', ['Nepal']),  # a redirect serves its target page
+    'Nepal': page('Nepal', ['India', 'Bhutan', 'Mount_Everest']),
+    'Bhutan': page('Bhutan', ['Tibet']),
+    'Mount_Everest': page('Mount Everest', ['Tibet']),
+    'Tibet': page('Tibet', []),
+}
+
+
+def fetched_titles(server):
+    return [path.split('/wiki/')[1] for path in server.requests]
+
+
+def test_crawl_follows_links_to_the_depth_limit(tmp_path):
+    seen = []
+    with StandinServer(GRAPH) as server:
+        stats = crawl(['India'], str(tmp_path / 'frontier.db'), max_depth=2, get=server.client_get(),
+                      page_cache=False, verbose=False,
+                      on_article=lambda article, depth: seen.append((article.title, depth)))
+        fetched = fetched_titles(server)
+    assert seen == [('India', 0), ('Nepal', 1), ('Bhutan', 2), ('Mount Everest', 2)]
+    # Bharat is fetched once and recognised as India; nothing is fetched twice
+    assert sorted(fetched) == ['Bharat', 'Bhutan', 'India', 'Mount_Everest', 'Nepal']
+    assert stats['redirects'] == 1
+    # Tibet is three hops away, so it is never queued
+    assert stats['pending'] == 0
+
+
+def test_redirect_to_a_pending_title_stands_in_for_it(tmp_path):
+    # Nepal queues India before Bharat, which redirects to India, is handled
+    graph = {'Asia': page('Asia', ['Nepal', 'Bharat']), 'Nepal': page('Nepal', ['India']),
+             'Bharat': page('India', []), 'India': page('India', [])}
+    seen = []
+    with StandinServer(graph) as server:
+        stats = crawl(['Asia'], str(tmp_path / 'frontier.db'), max_depth=2, get=server.client_get(),
+                      page_cache=False, verbose=False,
+                      on_article=lambda article, depth: seen.append(article.title))
+        fetched = fetched_titles(server)
+    assert sorted(fetched) == ['Asia', 'Bharat', 'Nepal']
+    assert seen == ['Asia', 'Nepal', 'India']
+    assert stats['pending'] == 0 and stats['redirects'] == 1
+
+
+def test_interrupted_crawl_resumes_from_the_frontier(tmp_path):
+    path = str(tmp_path / 'frontier.db')
+    with StandinServer(GRAPH) as server:
+        first = crawl(['India'], path, max_depth=3, max_pages=2, workers=1, get=server.client_get(),
+                      page_cache=False, verbose=False)
+        second = crawl(['India'], path, max_depth=3, get=server.client_get(), page_cache=False, verbose=False)
+        fetched = fetched_titles(server)
+    assert first['crawled'] == 2
+    assert first['crawled'] + second['crawled'] == 5
+    assert len(fetched) == len(set(fetched))
+
+
+def test_titles_and_namespaces():
+    assert canonical_title('india#History') == 'India'
+    assert canonical_title('Mount%20Everest') == 'Mount_Everest'
+    assert namespace_of('File:Flag.svg') == 'File'
+    assert namespace_of('Help_talk:Contents') == 'Help talk'
+    assert namespace_of('Star_Wars:_Episode_IV') == ''
+
+
+def test_seen_set_has_no_false_negatives():
+    seen = SeenSet(capacity=1000, error_rate=0.01)
+    titles = [f'Title_{i}' for i in range(1000)]
+    assert all(seen.add(title) for title in titles[:10])
+    for title in titles:
+        seen.add(title)
+    assert all(title in seen for title in titles)
+    assert sum(f'Other_{i}' in seen for i in range(1000)) < 50
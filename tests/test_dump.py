@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from benchmarks.corpus import synthetic_wikitext, write_multistream_dump
+from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
+from scraper import dump as dump_module
+from scraper.dump import DumpReader, dump_batch, iter_pages, iter_stream_pages
+from scraper.wikitext import parse_wikitext
+
+
+@pytest.fixture
+def dump(tmp_path):
+    pages = [{'title': f'Page {i}', 'text': synthetic_wikitext(f'Page {i}', sections=4, seed=i)} for i in range(25)]
+    pages.append({'title': 'India', 'text': synthetic_wikitext('India', sections=12, images=0), 'revision': 4242})
+    pages.append({'title': 'Bharat', 'text': '#REDIRECT [[India]]', 'redirect': 'India'})
+    pages.append({'title': 'Talk:India', 'ns': 1, 'text': 'Discussion.'})
+    dump_path, index_path = str(tmp_path / 'dump.xml.bz2'), str(tmp_path / 'index.txt.bz2')
+    write_multistream_dump(dump_path, index_path, pages, pages_per_stream=10)
+    return dump_path, index_path
+
+
+def test_parse_wikitext():
+    text = ("{{Infobox country\n| image_flag = Flag of India.svg\n}}\n"
+            "'''India''' is in [[South Asia|southern Asia]].<ref name=\"a\">{{cite web |url=https://example.org/a "
+            "|title=About India |website=Example}}</ref> Again.<ref name=\"a\" />\n\n"
+            "== History ==\n[[File:Taj Mahal.jpg|thumb|The [[Taj Mahal]]]]\nAncient &amp; modern.<ref>Plain</ref>\n"
+            "* one\n* two\n{| class=\"wikitable\"\n| cell\n|}\n[[Category:Countries]]\n")
+    data = parse_wikitext('India', text)
+    assert data['sections'] == [
+        {'heading': ('h1', 'Introduction'), 'level': 1, 'content': 'India is in southern Asia. Again.'},
+        {'heading': ('h2', 'History'), 'level': 2, 'content': 'Ancient & modern.\n\none\ntwo'},
+    ]
+    assert data['references'] == ['About India. Example.', 'Plain']
+    assert data['ref_urls'] == [{'text': 'About India. Example....', 'url': 'https://example.org/a', 'index': 0}]
+    assert data['images'] == ['https://en.wikipedia.org/wiki/Special:FilePath/Flag_of_India.svg',
+                              'https://en.wikipedia.org/wiki/Special:FilePath/Taj_Mahal.jpg']
+    assert data['links'] == ['South_Asia', 'Taj_Mahal']
+
+
+def test_reader_seeks_to_one_stream(dump):
+    dump_path, index_path = dump
+    reader = DumpReader(dump_path, index_path)
+    offset = reader.index.lookup('India')
+    with open(dump_path, 'rb') as file:
+        titles = [page['title'] for page in iter_stream_pages(file, offset)]
+    assert 'India' in titles and len(titles) <= 10
+
+    article = reader.article('Bharat')
+    assert article.title == 'India' and article.revision == 4242
+    assert article.url == 'https://en.wikipedia.org/wiki/India'
+    assert len(article.sections) > 5 and article.references
+    assert len(list(iter_pages(dump_path))) == 28
+    with pytest.raises(ValueError):
+        reader.article('Missing')
+
+
+def test_pages_are_let_go_as_they_are_read(tmp_path, monkeypatch):
+    # The pages of the first stream sit inside <mediawiki>, of later ones in the parser's own root
+    holders = []
+
+    class RecordingParser(dump_module.ET.XMLPullParser):
+        def read_events(self):
+            for event, element in super().read_events():
+                if event == 'start' and not element.tag.endswith('page') and len(holders) < 2:
+                    holders.append(element)
+                yield event, element
+
+    monkeypatch.setattr(dump_module.ET, 'XMLPullParser', RecordingParser)
+    # Small reads, so the parser only ever has a few pages to hand
+    monkeypatch.setattr(dump_module, 'READ_SIZE', 1024)
+    pages = [{'title': f'Page {i}', 'text': f'Page {i} text.'} for i in range(300)]
+    dump_path = str(tmp_path / 'dump.xml.bz2')
+    write_multistream_dump(dump_path, str(tmp_path / 'index.txt.bz2'), pages)
+    sizes = [sum(len(holder) for holder in holders) for _ in iter_pages(dump_path)]
+    assert len(sizes) == 300 and max(sizes) < 50
+    # Only <mediawiki> and its <siteinfo> are left
+    assert sum(len(holder) for holder in holders) == 2
+
+
+def test_scrape_from_dump(tmp_path, dump):
+    reader = DumpReader(*dump, titles=['India'])
+    result = scrape_enhanced_wikipedia('India', dump=reader, output_dir=str(tmp_path), verbose=False,
+                                       image_cache=False)
+    assert result['title'] == 'India'
+    assert os.path.exists(result['pdf_file']) and os.path.exists(result['csv_file'])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_dump_batch(tmp_path, dump, workers):
+    results = list(dump_batch(*dump, titles=['Bharat', 'Page_3', 'Missing'], workers=workers,
+                              output_dir=str(tmp_path), images=False))
+    assert sorted(r['topic'] for r in results) == ['India', 'Missing', 'Page_3']
+    assert [r['topic'] for r in results if 'error' in r] == ['Missing']
+    assert os.path.exists(tmp_path / 'Page_3_enhanced_wikipedia.pdf')
+
+    everything = list(dump_batch(*dump, workers=workers, render=False))
+    # Articles only: no redirect, no talk page
+    assert len(everything) == 26 and not any('error' in r for r in everything)
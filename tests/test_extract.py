@@ -0,0 +1,51 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from benchmarks.corpus import synthetic_article
+from benchmarks.legacy import extract_sections_two_pass, resolve_citations_by_search
+from scraper.extract import extract_sections, extract_references
+
+
+def main_content_of(html, parser='html.parser'):
+    return BeautifulSoup(html, parser).find('div', {'class': 'mw-parser-output'})
+
+
+def test_matches_original_output_on_bare_heading_layout():
+    main_content = main_content_of(synthetic_article(sections=20, layout='legacy'))
+    assert extract_sections(main_content) == extract_sections_two_pass(main_content)
+
+
+def test_mw_heading_layout_has_no_duplicates_and_keeps_section_text():
+    main_content = main_content_of(synthetic_article(sections=20, layout='modern'))
+    legacy = extract_sections_two_pass(main_content)
+    sections = extract_sections(main_content)
+
+    # The original put every paragraph into the introduction and then emitted
+    # each section again from the mw-heading pass; the new output is intro + sections
+    intro = [p.get_text() for p in main_content.find_all('p', recursive=False)][:3]
+    assert sections[0]['heading'] == ('h1', 'Introduction')
+    assert sections[0]['content'].count('\n\n') == len(intro) - 1
+    assert [s['heading'] for s in sections[1:]] == [s['heading'] for s in legacy[1:]]
+    for new, old in zip(sections[1:], legacy[1:]):
+        # Lists and tables are now kept too, after the section's paragraphs
+        assert new['content'].startswith(old['content'])
+
+
+def test_lxml_parser_gives_the_same_sections():
+    pytest.importorskip('lxml')
+    html = synthetic_article(sections=20)
+    assert extract_sections(main_content_of(html, 'lxml')) == extract_sections(main_content_of(html))
+
+
+def test_citations_resolve_without_cap_or_duplicates():
+    soup = BeautifulSoup(synthetic_article(sections=20, reflist=False), 'html.parser')
+    content_div = soup.find('div', {'id': 'mw-content-text'})
+    references, ref_urls = extract_references(soup, content_div)
+
+    # Same notes, in the same order, as the original search without its cap
+    legacy, legacy_urls = resolve_citations_by_search(soup, content_div, limit=None)
+    assert references == list(dict.fromkeys(legacy))
+    assert len(references) > 30
+    assert len(references) == len(set(references))
+    assert len(ref_urls) == len(references)
+    assert references[:5] == legacy[:5]
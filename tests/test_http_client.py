@@ -0,0 +1,57 @@
+import gzip
+import json
+
+from scraper.http_client import HttpClient
+from scraper.wikipedia_api import get_wikipedia_summary
+
+
+def test_connections_are_reused(standin_server):
+    standin_server.routes['/wiki/India'] = (200, {'Content-Type': 'text/html'}, b'<html>India</html>')
+    client = HttpClient()
+    for _ in range(5):
+        assert client.get(f'{standin_server.url}/wiki/India').status_code == 200
+    client.close()
+    assert len(standin_server.requests) == 5
+    assert len(standin_server.connections) == 1
+
+
+def test_sends_user_agent_and_decodes_gzip(standin_server):
+    body = gzip.compress(b'<html>compressed</html>')
+    standin_server.routes['/wiki/India'] = (200, {'Content-Encoding': 'gzip'}, body)
+    client = HttpClient(user_agent='TestAgent/1.0')
+    response = client.get(f'{standin_server.url}/wiki/India')
+    assert response.text == '<html>compressed</html>'
+    headers = standin_server.requests[0][1]
+    assert headers['User-Agent'] == 'TestAgent/1.0'
+    assert 'gzip' in headers['Accept-Encoding']
+
+
+def test_retries_transient_errors(standin_server):
+    attempts = []
+
+    def flaky(handler):
+        attempts.append(1)
+        if len(attempts) < 3:
+            return 503, {}, b'busy'
+        return 200, {}, b'ok'
+
+    standin_server.routes['/flaky'] = flaky
+    client = HttpClient(retries=3, backoff_factor=0)
+    response = client.get(f'{standin_server.url}/flaky')
+    assert response.status_code == 200
+    assert len(attempts) == 3
+
+
+def test_summary_goes_through_shared_client(standin_server):
+    payload = {'query': {'pages': [{
+        'title': 'Web scraping',
+        'extract': 'Web scraping is data scraping. ' * 100,
+        'fullurl': 'https://en.wikipedia.org/wiki/Web_scraping'
+    }]}}
+    standin_server.routes['/w/api.php'] = (200, {'Content-Type': 'application/json'},
+                                           json.dumps(payload).encode())
+    client = HttpClient()
+    result = get_wikipedia_summary('Web scraping', get=client.get, api_url=f'{standin_server.url}/w/api.php')
+    assert result['title'] == 'Web scraping'
+    assert len(result['summary']) == 1000
+    assert 'titles=Web+scraping' in standin_server.requests[0][0]
@@ -0,0 +1,270 @@
+import io
+import os
+import threading
+import time
+from collections import Counter
+
+from PIL import Image
+
+from enhanced_wikipedia_scraper import generate_enhanced_pdf
+from scraper.image_cache import ImageCache
+from scraper.metrics import Metrics
+from scraper import images as image_stage
+from scraper.images import prefetch_images, process_image, process_images
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), '..', 'images')
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+
+def image_server():
+    # Serve files from images/ by basename; anything else is a 404
+    calls = Counter()
+    lock = threading.Lock()
+
+    def get(url, **kwargs):
+        with lock:
+            calls[url] += 1
+        path = os.path.join(IMAGES_DIR, url.rsplit('/', 1)[-1])
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                return FakeResponse(file.read())
+        return FakeResponse(b'', 404)
+
+    return get, calls
+
+
+def test_prefetch_requests_each_url_once():
+    get, calls = image_server()
+    urls = ['https://upload.wikimedia.org/a/11px-Increase2.svg.png',
+            'https://upload.wikimedia.org/a/missing.png',
+            'https://upload.wikimedia.org/a/11px-Increase2.svg.png']
+    fetched = prefetch_images(urls, get=get, max_workers=4)
+    assert list(fetched) == urls[:2]
+    assert fetched[urls[1]] is None
+    assert set(calls.values()) == {1}
+
+
+def test_pdf_layout_uses_prefetched_bytes(tmp_path):
+    get, calls = image_server()
+    images = ['https://upload.wikimedia.org/a/125px-Flag_of_India.svg.png',
+              'https://upload.wikimedia.org/a/missing.png',
+              'https://upload.wikimedia.org/a/60px-Emblem_of_India.svg.png',
+              'https://upload.wikimedia.org/a/11px-Increase2.svg.png']
+    sections = [{'heading': ('h1', 'Introduction'), 'level': 1, 'content': 'India is a country.'}]
+    pdf_file = generate_enhanced_pdf('India', 'India', sections, [], images, 'https://en.wikipedia.org/wiki/India',
+                                     get=get, output_dir=str(tmp_path), verbose=False, image_workers=4,
+                                     image_cache=False)
+    assert os.path.getsize(pdf_file) > 0
+    assert set(calls) == set(images)
+    assert set(calls.values()) == {1}
+
+
+def test_cache_serves_repeat_runs_without_downloads(tmp_path, monkeypatch):
+    get, calls = image_server()
+    cache = ImageCache(root=str(tmp_path / 'cache'))
+    images = ['https://upload.wikimedia.org/a/125px-Flag_of_India.svg.png',
+              'https://upload.wikimedia.org/a/60px-Emblem_of_India.svg.png']
+    sections = [{'heading': ('h1', 'Introduction'), 'level': 1, 'content': 'India is a country.'}]
+    args = ('India', 'India', sections, [], images, 'https://en.wikipedia.org/wiki/India')
+    generate_enhanced_pdf(*args, get=get, output_dir=str(tmp_path), verbose=False, image_cache=cache)
+    assert sum(calls.values()) == 2
+
+    # Second run: no downloads and no decoding, everything comes from the cache
+    def no_decode(*a, **kw):
+        raise AssertionError('image was decoded again')
+    monkeypatch.setattr(image_stage, 'process_image', no_decode)
+    generate_enhanced_pdf(*args, get=get, output_dir=str(tmp_path), verbose=False, image_cache=cache)
+    assert sum(calls.values()) == 2
+
+
+def test_cache_dedupes_content_and_evicts_least_recently_used(tmp_path):
+    cache = ImageCache(root=str(tmp_path), max_bytes=250)
+    cache.put('https://a/one.png', b'1' * 100)
+    cache.put('https://b/one.png', b'1' * 100)  # same content, stored once
+    assert cache.total_bytes() == 100
+    cache.put('https://a/two.png', b'2' * 100)
+    assert cache.get('https://a/one.png') == b'1' * 100  # refresh one.png
+    cache.put('https://a/three.png', b'3' * 100)
+    assert cache.get('https://a/two.png') is None
+    assert cache.get('https://b/one.png') == b'1' * 100
+    assert cache.total_bytes() <= 250
+
+
+def test_cache_falls_back_to_bundled_thumbnails(tmp_path):
+    cache = ImageCache(root=str(tmp_path), seed_dirs=[IMAGES_DIR])
+    url = 'https://upload.wikimedia.org/wikipedia/commons/thumb/x/11px-Increase2.svg.png'
+    with open(os.path.join(IMAGES_DIR, '11px-Increase2.svg.png'), 'rb') as file:
+        assert cache.get(url) == file.read()
+
+
+def encoded(image, format):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def test_process_image_shrinks_and_flattens_alpha():
+    photo = encoded(Image.new('RGB', (2000, 1000), (200, 10, 10)), 'JPEG')
+    data, width, height = process_image(photo, 250)
+    assert (width, height) == (250, 125)
+    assert Image.open(io.BytesIO(data)).size == (250, 125)
+
+    # Transparent pixels come out white, not black
+    icon = encoded(Image.new('RGBA', (40, 40), (0, 0, 0, 0)), 'PNG')
+    data, width, height = process_image(icon, 250)
+    flattened = Image.open(io.BytesIO(data))
+    assert (flattened.format, flattened.mode, width) == ('JPEG', 'RGB', 40)
+    assert min(flattened.getpixel((20, 20))) > 245
+
+
+def test_process_images_in_pool_matches_inline():
+    with open(os.path.join(IMAGES_DIR, '125px-Flag_of_India.svg.png'), 'rb') as file:
+        flag = file.read()
+    images = [flag, b'not an image', flag]
+    pooled = process_images(images, 100, workers=2)
+    assert pooled == process_images(images, 100, workers=1)
+    assert pooled[1] is None
+    assert pooled[0][1:] == (100, 67)
+
+
+def test_process_images_runs_inline_unless_workers_are_asked_for(monkeypatch):
+    with open(os.path.join(IMAGES_DIR, '125px-Flag_of_India.svg.png'), 'rb') as file:
+        flag = file.read()
+
+    def no_pool(workers=None):
+        raise AssertionError('a process pool was started')
+    monkeypatch.setattr(image_stage, 'get_pool', no_pool)
+    assert all(process_images([flag, flag], 100))
+
+
+def test_workers_limit_the_tasks_in_the_shared_pool(monkeypatch):
+    with open(os.path.join(IMAGES_DIR, '125px-Flag_of_India.svg.png'), 'rb') as file:
+        flag = file.read()
+
+    class CountingPool:
+        # Counts the tasks submitted whose results have not been collected yet
+        def __init__(self):
+            self.running = 0
+            self.peak = 0
+
+        def submit(self, fn, *args):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            return Task(self, fn(*args))
+
+    class Task:
+        def __init__(self, pool, value):
+            self.pool = pool
+            self.value = value
+
+        def result(self):
+            self.pool.running -= 1
+            return self.value
+
+    pool = CountingPool()
+    monkeypatch.setattr(image_stage, 'get_pool', lambda workers=None: pool)
+    images = [flag, b'not an image', flag, flag, flag]
+    assert process_images(images, 100, workers=2) == process_images(images, 100)
+    assert pool.peak == 2
+
+
+def test_image_batches_hold_about_max_bytes():
+    get, _ = image_server()
+    names = ['125px-Flag_of_India.svg.png', '60px-Emblem_of_India.svg.png', '11px-Increase2.svg.png']
+    urls = [f'https://upload.wikimedia.org/a/{name}' for name in names] + ['https://upload.wikimedia.org/a/missing.png']
+    batches = list(image_stage.iter_image_batches(urls * 2, 1, get=get, max_workers=1))
+    # Every download fills a one-byte batch; the failed one never does
+    assert [[url for url, _ in batch] for batch in batches] == [urls[:1], urls[1:2], urls[2:3], urls[3:]]
+    assert batches[-1][0][1] is None
+    assert [url for batch in image_stage.iter_image_batches(urls, 10 ** 9, get=get) for url, _ in batch] == urls
+
+
+def test_decoded_size_accounts_for_jpeg_draft():
+    photo = encoded(Image.new('RGB', (2000, 1000)), 'JPEG')
+    assert image_stage.decoded_size(photo, 250) == 250 * 125 * 4 * 2
+    icon = encoded(Image.new('RGBA', (40, 40)), 'PNG')
+    assert image_stage.decoded_size(icon, 250) == 40 * 40 * 4 * 2
+    assert image_stage.decoded_size(b'not an image', 250) is None
+
+
+def test_pdf_spools_images_within_memory_limit(tmp_path, monkeypatch):
+    get, calls = image_server()
+    images = ['https://upload.wikimedia.org/a/125px-Flag_of_India.svg.png',
+              'https://upload.wikimedia.org/a/missing.png',
+              'https://upload.wikimedia.org/a/60px-Emblem_of_India.svg.png',
+              'https://upload.wikimedia.org/a/11px-Increase2.svg.png']
+    sections = [{'heading': ('h1', 'Introduction'), 'level': 1, 'content': 'India is a country.'}]
+    args = ('India', 'India', sections, [], images, 'https://en.wikipedia.org/wiki/India')
+    spool_root = tmp_path / 'spool'
+    spool_root.mkdir()
+    monkeypatch.setattr(image_stage.tempfile, 'tempdir', str(spool_root))
+    cache = ImageCache(root=str(tmp_path / 'cache'))
+    for _ in range(2):
+        metrics = Metrics()
+        pdf_file = generate_enhanced_pdf(*args, get=get, output_dir=str(tmp_path), verbose=False,
+                                         image_cache=cache, image_memory=1024 * 1024, metrics=metrics)
+        assert os.path.getsize(pdf_file) > 0
+        # The spool goes away with the render
+        assert os.listdir(spool_root) == []
+        assert 'images_over_memory' not in metrics.report()['counts']
+    # The second run embeds the cached copies without downloading again
+    assert calls[images[0]] == 1
+    assert 'images_fetched' not in metrics.report()['counts']
+
+
+def test_images_over_the_ceiling_are_reduced_or_left_out(tmp_path, monkeypatch):
+    # With 1 MB, 512 KB is left for decoding. The photo needs 960 KB drafted
+    # to 1/4 for 250px, but 240 KB at 1/8; the PNG needs 2.9 MB at any width.
+    files = {'photo.jpg': encoded(Image.new('RGB', (1600, 1200), 'blue'), 'JPEG'),
+             'diagram.png': encoded(Image.new('RGBA', (600, 600)), 'PNG'),
+             'icon.png': encoded(Image.new('RGB', (40, 40)), 'PNG')}
+
+    def get(url, **kwargs):
+        return FakeResponse(files[url.rsplit('/', 1)[-1]])
+
+    spooled = []
+    add = image_stage.ImageSpool.add
+    monkeypatch.setattr(image_stage.ImageSpool, 'add', lambda self, *args: spooled.append(args) or add(self, *args))
+    decoded = []
+    process = image_stage.process_image
+    monkeypatch.setattr(image_stage, 'process_image',
+                        lambda data, max_width: decoded.append(image_stage.decoded_size(data, max_width))
+                        or process(data, max_width))
+    metrics = Metrics()
+    sections = [{'heading': ('h1', 'Introduction'), 'level': 1, 'content': 'A gallery.'}]
+    images = [f'https://upload.wikimedia.org/a/{name}' for name in files]
+    generate_enhanced_pdf('Gallery', 'Gallery', sections, [], images, 'https://en.wikipedia.org/wiki/Gallery',
+                          get=get, output_dir=str(tmp_path), verbose=False, image_cache=False,
+                          image_memory=1024 * 1024, metrics=metrics)
+    counts = metrics.report()['counts']
+    assert counts['images_reduced'] == 1 and counts['images_over_memory'] == 1
+    assert 'images_failed' not in counts
+    # The photo at 125px and the icon at 250px make a pair
+    assert sorted(args[0][1] for args in spooled) == [40, 125]
+    assert max(decoded) <= 512 * 1024
+
+
+def test_downloads_in_flight_count_against_max_bytes():
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def get(url, **kwargs):
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return FakeResponse(b'x' * 100)
+
+    urls = [f'https://upload.wikimedia.org/a/{i}.png' for i in range(20)]
+    batches = list(image_stage.iter_image_batches(urls, 300, get=get, max_workers=8))
+    assert [url for batch in batches for url, _ in batch] == urls
+    assert all(sum(len(data) for _, data in batch) <= 300 for batch in batches)
+    # Room for three downloads, held or in flight, at a time
+    assert active[1] == 3
@@ -0,0 +1,65 @@
+from benchmarks.corpus import synthetic_article
+from benchmarks.standin import StandinServer
+from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
+from scraper.batch import scrape_batch
+from scraper.metrics import Metrics, NULL_METRICS, prometheus_text
+
+
+def test_scrape_reports_every_stage(tmp_path):
+    events = []
+    metrics = Metrics(hooks=[events.append])
+    articles = {'India': synthetic_article(sections=6, images=3)}
+    with StandinServer(articles) as server:
+        scrape_enhanced_wikipedia('India', get=server.client_get(), output_dir=str(tmp_path), verbose=False,
+                                  image_cache=False, page_cache=False, metrics=metrics)
+    report = metrics.report()
+    for stage in ('fetch', 'parse', 'extract', 'references', 'image_fetch', 'image_process', 'layout', 'csv'):
+        assert report['stages'][stage]['calls'] >= 1
+    assert report['stages']['fetch']['bytes'] == len(articles['India'])
+    assert report['stages']['layout']['bytes'] > 0
+    assert report['counts']['sections'] == 7
+    assert report['counts']['images_fetched'] == 5
+    assert {'type': 'count', 'name': 'images_fetched', 'value': 1} in events
+
+
+def test_stage_events_carry_the_bytes_of_their_own_call():
+    events = []
+    metrics = Metrics(hooks=[events.append])
+    for size in (100, 50):
+        with metrics.stage('fetch'):
+            metrics.add_bytes('fetch', size)
+    # Bytes added outside the stage count in the report only
+    metrics.add_bytes('fetch', 7)
+    with metrics.stage('fetch'):
+        pass
+    assert [event['bytes'] for event in events] == [100, 50, 0]
+    assert metrics.report()['stages']['fetch']['bytes'] == 157
+
+
+def test_batch_reports_per_topic_and_total():
+    def fake_scrape(topic, get=None, output_dir=None, verbose=True, metrics=None):
+        with metrics.stage('fetch'):
+            metrics.add_bytes('fetch', 100)
+        metrics.count('sections', 3)
+        return {'title': topic}
+
+    metrics = Metrics()
+    results = scrape_batch(['India', 'Nepal'], scrape=fake_scrape, metrics=metrics)
+    assert results[0]['metrics']['counts'] == {'sections': 3}
+    report = metrics.report()
+    assert report['stages']['fetch']['bytes'] == 200
+    assert report['counts']['sections'] == 6
+
+
+def test_prometheus_text_format():
+    report = {'stages': {'fetch': {'seconds': 0.5, 'bytes': 1024, 'calls': 1}}, 'counts': {'images_failed': 2}}
+    text = prometheus_text(report, {'topic': 'India "IN"'})
+    assert 'wiki_scraper_stage_seconds{topic="India \\"IN\\"",stage="fetch"} 0.5' in text
+    assert '# TYPE wiki_scraper_images_failed_total counter' in text
+    assert 'wiki_scraper_images_failed_total{topic="India \\"IN\\""} 2' in text
+
+
+def test_disabled_metrics_record_nothing():
+    with NULL_METRICS.stage('fetch'):
+        NULL_METRICS.count('sections', 3)
+    assert NULL_METRICS.report() == {'stages': {}, 'counts': {}}
@@ -0,0 +1,68 @@
+import enhanced_wikipedia_scraper
+from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
+from scraper.http_client import HttpClient
+from scraper.page_cache import PageCache
+
+ARTICLE = b'''<html><head><script>RLCONF={"wgRevisionId":1234567,"wgPageName":"India"};</script></head>
+<body><h1 id="firstHeading">India</h1><div id="mw-content-text"><div class="mw-parser-output">
+<p>India is a country in South Asia.</p>
+<h2>History</h2><p>Anatomically modern humans arrived long ago.</p>
+</div></div></body></html>'''
+
+
+def serve_article(server):
+    def article(handler):
+        if handler.headers.get('If-None-Match') == '"rev-1234567"':
+            return 304, {'ETag': '"rev-1234567"'}, b''
+        return 200, {'ETag': '"rev-1234567"', 'Last-Modified': 'Sat, 17 Oct 2026 10:00:00 GMT'}, ARTICLE
+    server.routes['/wiki/India'] = article
+
+
+def test_conditional_get_revalidates_cached_page(tmp_path, standin_server):
+    serve_article(standin_server)
+    cache = PageCache(root=str(tmp_path))
+    url = f'{standin_server.url}/wiki/India'
+    get = HttpClient().get
+
+    first = cache.fetch(url, get=get)
+    assert first['status'] == 200 and not first['not_modified']
+    assert first['revision'] == 1234567
+
+    cache.store_extracted(url, {'title': 'India'})
+    second = cache.fetch(url, get=get)
+    assert second['not_modified']
+    assert second['extracted'] == {'title': 'India'}
+    assert standin_server.requests[1][1]['If-None-Match'] == '"rev-1234567"'
+
+
+def test_cache_only_mode_never_touches_the_network(tmp_path):
+    cache = PageCache(root=str(tmp_path))
+    cache.store('https://en.wikipedia.org/wiki/India', ARTICLE)
+
+    def no_network(url, **kwargs):
+        raise AssertionError('network used in cache-only mode')
+
+    page = cache.fetch('https://en.wikipedia.org/wiki/India', get=no_network, cache_only=True)
+    assert page['content'] == ARTICLE
+    assert cache.fetch('https://en.wikipedia.org/wiki/Nepal', get=no_network, cache_only=True)['status'] is None
+
+
+def test_unchanged_page_skips_parsing(tmp_path, standin_server, monkeypatch):
+    serve_article(standin_server)
+    client = HttpClient()
+
+    # Point the article URL at the stand-in server
+    def get(url, **kwargs):
+        return client.get(url.replace('https://en.wikipedia.org', standin_server.url), **kwargs)
+
+    cache = PageCache(root=str(tmp_path / 'pages'))
+    kwargs = dict(get=get, output_dir=str(tmp_path), verbose=False, image_cache=False, page_cache=cache)
+    first = scrape_enhanced_wikipedia('India', **kwargs)
+
+    def no_parse(content):
+        raise AssertionError('page parsed again')
+
+    monkeypatch.setattr(enhanced_wikipedia_scraper, 'parse_article', no_parse)
+    second = scrape_enhanced_wikipedia('India', **kwargs)
+    assert second['sections'] == first['sections']
+    assert [path for path, headers in standin_server.requests] == ['/wiki/India', '/wiki/India']
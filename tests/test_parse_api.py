@@ -0,0 +1,90 @@
+from benchmarks.corpus import synthetic_article
+from benchmarks.standin import StandinServer
+from enhanced_wikipedia_scraper import parse_article, scrape_enhanced_wikipedia
+from scraper.metrics import Metrics
+from scraper.parse_api import ParseApiClient, SectionedArticle
+
+
+def test_sections_match_the_full_page():
+    # Without a reflist the full page lists the cited notes, as section HTML does
+    html = synthetic_article(sections=15, images=10, reflist=False)
+    expected = parse_article(html)
+    with StandinServer({'India': html}) as server:
+        metrics = Metrics()
+        data = SectionedArticle(ParseApiClient(get=server.client_get(), metrics=metrics), 'India').to_dict()
+
+    assert data['title'] == 'India' and data['revision'] == 1234567
+    assert data['sections'] == expected['sections']
+    assert data['references'] == expected['references']
+    assert data['ref_urls'] == expected['ref_urls']
+    assert data['images'] == expected['images']
+
+
+def test_sections_are_fetched_on_first_access():
+    html = synthetic_article(sections=15, images=0)
+    with StandinServer({'India': html}) as server:
+        metrics = Metrics()
+        article = SectionedArticle(ParseApiClient(get=server.client_get(), metrics=metrics), 'India')
+        headings = article.headings()
+        assert len(headings) == 15 and len(server.requests) == 1
+        assert article.section('Introduction')[0]['heading'] == ('h1', 'Introduction')
+        assert metrics.report()['stages']['fetch']['bytes'] < len(html) / 4
+
+        # A subsection comes with the top-level section that holds it
+        tag, heading, level = next(h for h in headings if h[2] > 2)
+        sections = article.section(heading)
+        assert len(server.requests) == 3
+        assert sections[0]['level'] == 2 and heading in [s['heading'][1] for s in sections]
+
+        article.sections
+        assert len(server.requests) == 1 + len(article.parts)
+        assert article.sections == parse_article(html)['sections']
+
+
+def test_scrape_through_the_parse_api():
+    html = synthetic_article(sections=8, images=0)
+    with StandinServer({'India': html}) as server:
+        article = scrape_enhanced_wikipedia('India', get=server.client_get(), verbose=False, page_cache=False,
+                                            extract_only=True, parse_api=True)
+        assert '/wiki/India' not in server.requests
+    assert [s.to_dict() for s in article.sections] == parse_article(html)['sections']
+    assert article.url == 'https://en.wikipedia.org/wiki/India'
+
+
+class ErrorResponse:
+    status_code = 200
+    content = b'{}'
+
+    def json(self):
+        return {'error': {'code': 'missingtitle', 'info': "The page you specified doesn't exist."}}
+
+
+def test_missing_page_is_an_error():
+    result = scrape_enhanced_wikipedia('Missing', get=lambda url, **kwargs: ErrorResponse(), verbose=False,
+                                       page_cache=False, extract_only=True, parse_api=True)
+    assert result == {'error': "The page you specified doesn't exist."}
+
+
+def test_only_the_asked_for_sections_are_fetched():
+    html = synthetic_article(sections=8, images=0)
+    with StandinServer({'India': html}) as server:
+        article = SectionedArticle(ParseApiClient(get=server.client_get()), 'India')
+        heading = next(h for _, h, level in article.headings() if level == 2)
+        fetched = len(server.requests)
+        partial = scrape_enhanced_wikipedia('India', get=server.client_get(), verbose=False, page_cache=False,
+                                            extract_only=True, parse_api=True, headings=[heading])
+        # One outline request and one section request
+        assert len(server.requests) == fetched + 2
+    assert partial.sections[0].heading[1] == heading
+    assert [s.to_dict() for s in partial.sections] == article.section(heading)
+
+
+def test_notes_cited_beside_an_empty_reflist_are_kept():
+    html = synthetic_article(sections=6, images=0, reflist=False)
+    expected = parse_article(html)
+    # A section whose own {{reflist}} comes back empty when parsed on its own
+    marked = html.replace(b'<h2', b'<div><div class="reflist"></div></div><h2', 2)
+    with StandinServer({'India': marked}) as server:
+        data = SectionedArticle(ParseApiClient(get=server.client_get()), 'India').to_dict()
+    assert data['references'] == expected['references']
+    assert data['ref_urls'] == expected['ref_urls']
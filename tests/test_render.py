@@ -0,0 +1,37 @@
+import os
+
+from benchmarks.corpus import synthetic_article
+from enhanced_wikipedia_scraper import parse_article
+from scraper.article import Article
+from scraper.batch import scrape_batch
+from scraper.render import render_batch
+
+
+def article_dict(title):
+    data = parse_article(synthetic_article(title=title, sections=6, images=0))
+    return Article.from_dict(data, url=f'https://en.wikipedia.org/wiki/{title}').to_dict()
+
+
+def test_render_batch_writes_pdfs_in_worker_processes(tmp_path):
+    articles = [('India', article_dict('India')), ('Nepal', article_dict('Nepal')),
+                ('Broken', {'title': 'Broken'})]
+    results = render_batch(articles, workers=2, output_dir=str(tmp_path))
+    assert [r['topic'] for r in results] == ['India', 'Nepal', 'Broken']
+    assert 'error' in results[2]
+    for result in results[:2]:
+        assert os.path.getsize(result['result']['pdf_file']) > 0
+    # Only finished files are left behind
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_batch_hands_extracted_articles_to_the_farm(tmp_path):
+    def fake_scrape(topic, get=None, output_dir=None, verbose=True, extract_only=False):
+        assert extract_only
+        if topic == 'Missing':
+            return {'error': 'Failed to fetch page: 404'}
+        return Article.from_dict(article_dict(topic))
+
+    results = scrape_batch(['India', 'Missing'], output_dir=str(tmp_path), scrape=fake_scrape,
+                           render_workers=1)
+    assert results[0]['result']['pdf_file'].endswith('India_enhanced_wikipedia.pdf')
+    assert results[1]['error'] == 'Failed to fetch page: 404'
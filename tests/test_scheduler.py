@@ -0,0 +1,87 @@
+from scraper.http_client import HttpClient
+from scraper.scheduler import HostState, Scheduler, TokenBucket, retry_after_seconds
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_injected_429s_are_retried_after_the_advertised_delay(standin_server):
+    attempts = []
+
+    def throttled(handler):
+        attempts.append(1)
+        if len(attempts) <= 2:
+            return 429, {'Retry-After': '3'}, b'slow down'
+        return 200, {}, b'ok'
+
+    standin_server.routes['/wiki/India'] = throttled
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep)
+    client = HttpClient(scheduler=scheduler)
+    start = clock.now
+    response = client.get(f'{standin_server.url}/wiki/India')
+    assert response.status_code == 200
+    assert len(attempts) == 3
+    assert clock.now - start >= 6
+    # Each 429 halved the host's concurrency window
+    assert scheduler.host(standin_server.url + '/').limit == 2
+
+
+def test_gives_up_after_the_retry_budget(standin_server):
+    standin_server.routes['/busy'] = (503, {}, b'busy')
+    clock = FakeClock()
+    client = HttpClient(scheduler=Scheduler(retries=2, clock=clock, sleep=clock.sleep, rand=lambda: 1.0))
+    assert client.get(f'{standin_server.url}/busy').status_code == 503
+    assert len(standin_server.requests) == 3
+
+
+def test_token_bucket_paces_after_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.now += 1.5
+    assert bucket.reserve() == 0.0
+
+
+def test_backoff_is_jittered_and_capped():
+    scheduler = Scheduler(base_delay=0.5, max_delay=4, rand=lambda: 1.0)
+    assert [scheduler.backoff(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 4, 4]
+    assert Scheduler(rand=lambda: 0.25).backoff(3) == 1.0
+
+
+def test_concurrency_recovers_after_successes():
+    state = HostState(rate=10, burst=10, max_concurrency=8)
+    state.on_throttle(0)
+    state.on_throttle(0)
+    assert state.limit == 2
+    for _ in range(2 + 3):
+        state.on_success()
+    assert state.limit == 4
+
+
+def test_render_workers_share_the_host_budget(monkeypatch):
+    from scraper import http_client
+    from scraper.render import _init_worker
+
+    monkeypatch.setattr(http_client, '_default_client', None)
+    _init_worker(4)
+    state = http_client.get_client().scheduler.host('https://upload.wikimedia.org/a.png')
+    rate, burst = Scheduler().host_rates['upload.wikimedia.org']
+    assert (state.bucket.rate, state.bucket.burst) == (rate / 4, burst / 4)
+    assert state.max_concurrency == Scheduler().max_concurrency // 4
+    assert Scheduler().share(100).host('https://example.org').max_concurrency == 1
+    http_client.get_client().close()
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert retry_after_seconds('120') == 120
+    assert retry_after_seconds('Sat, 17 Oct 2026 10:00:30 GMT', now=1792231200.0) == 30
+    assert retry_after_seconds('soon') is None
@@ -1,12 +1,26 @@
-from scraper.wikipedia_scraper import scrape_wikipedia_page
+import json
+
+from benchmarks.corpus import synthetic_article
+from benchmarks.standin import StandinServer
+from enhanced_wikipedia_scraper import scrape_enhanced_wikipedia
 from scraper.wikipedia_api import get_wikipedia_summary
 
-def test_scraper():
-    result = scrape_wikipedia_page("https://en.wikipedia.org/wiki/Web_scraping")
-    assert 'title' in result
-    assert 'content' in result
 
-def test_api():
-    result = get_wikipedia_summary("Web scraping")
+def test_scraper(tmp_path):
+    # Offline: Wikipedia and its image host are served by the local stand-in
+    articles = {'Web_scraping': synthetic_article('Web scraping', sections=8, images=4)}
+    with StandinServer(articles) as server:
+        result = scrape_enhanced_wikipedia('Web_scraping', get=server.client_get(), output_dir=str(tmp_path),
+                                           verbose=False, image_cache=False, page_cache=False)
+    assert result['title'] == 'Web scraping'
+    assert result['sections']
+    assert result['pdf_file'].endswith('Web_scraping_enhanced_wikipedia.pdf')
+
+
+def test_api(standin_server):
+    payload = {'query': {'pages': [{'title': 'Web scraping', 'extract': 'Web scraping is data scraping.',
+                                    'fullurl': 'https://en.wikipedia.org/wiki/Web_scraping'}]}}
+    standin_server.routes['/w/api.php'] = (200, {'Content-Type': 'application/json'}, json.dumps(payload).encode())
+    result = get_wikipedia_summary("Web scraping", api_url=f'{standin_server.url}/w/api.php')
     assert 'title' in result
     assert 'summary' in result
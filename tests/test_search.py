@@ -0,0 +1,109 @@
+from scraper.search import SearchIndex, decode_postings, encode_postings, segment_tier
+
+
+def section(heading, content, level=2):
+    return {'heading': (f'h{level}', heading), 'level': level, 'content': content}
+
+
+INDIA = [
+    section('Introduction', 'India is a country in South Asia.', 1),
+    section('Geography', 'The monsoon brings heavy rainfall to the Western Ghats. Monsoon winds.'),
+    section('Economy', 'Trade and services drive growth.'),
+]
+NEPAL = [
+    section('Introduction', 'Nepal is a landlocked country in the Himalaya.', 1),
+    section('Climate', 'The monsoon reaches Nepal in June.'),
+]
+
+
+def test_postings_round_trip():
+    postings = [(1, 3), (2, 1), (300, 1), (100000, 42)]
+    assert decode_postings(encode_postings(postings)) == postings
+
+
+def test_bm25_ranking_across_segments(tmp_path):
+    with SearchIndex(str(tmp_path), flush_sections=2) as index:
+        index.add_article('India', 'https://en.wikipedia.org/wiki/India', INDIA, revision=1)
+        index.add_article('Nepal', 'https://en.wikipedia.org/wiki/Nepal', NEPAL, revision=1)
+        index.commit()
+        assert index.stats()['segments'] == 2
+
+        results = index.search('monsoon rainfall')
+        assert [(r['title'], r['heading']) for r in results] == [('India', 'Geography'), ('Nepal', 'Climate')]
+        assert results[0]['score'] > results[1]['score']
+        assert index.search('himalaya')[0]['title'] == 'Nepal'
+        assert index.search('the of') == [] and index.search('volcano') == []
+
+
+def test_incremental_updates_survive_reopen(tmp_path):
+    with SearchIndex(str(tmp_path)) as index:
+        index.add_article('India', None, INDIA, revision=1)
+    with SearchIndex(str(tmp_path)) as index:
+        # Same revision: nothing to do; new revision: replaces the old sections
+        assert index.add_article('India', None, INDIA, revision=1) == 0
+        index.add_article('India', None, [section('Climate', 'Mostly tropical.')], revision=2)
+        index.add_article('Nepal', None, NEPAL, revision=1)
+        index.commit()
+        assert index.search('rainfall') == []
+        assert [r['heading'] for r in index.search('tropical')] == ['Climate']
+        assert index.stats() == {'articles': 2, 'sections': 3, 'segments': 2, 'buffered': 0}
+
+        index.merge()
+        assert index.stats()['segments'] == 1
+        assert [r['title'] for r in index.search('monsoon')] == ['Nepal']
+    with SearchIndex(str(tmp_path)) as index:
+        assert [r['title'] for r in index.search('tropical climate')] == ['India', 'Nepal']
+
+
+def test_replaced_sections_leave_the_average_length(tmp_path):
+    long_india = [section(s['heading'][1], s['content'] + ' filler' * 200, s['level']) for s in INDIA]
+    with SearchIndex(str(tmp_path / 'fresh')) as fresh:
+        fresh.add_article('India', None, INDIA, revision=2)
+        fresh.add_article('Nepal', None, NEPAL, revision=1)
+        fresh.commit()
+        expected = [r['score'] for r in fresh.search('monsoon')]
+
+    # A long first revision is replaced, but stays in its segment until a merge
+    with SearchIndex(str(tmp_path / 'updated')) as updated:
+        updated.add_article('India', None, long_india, revision=1)
+        updated.commit()
+        updated.add_article('India', None, INDIA, revision=2)
+        updated.add_article('Nepal', None, NEPAL, revision=1)
+        updated.commit()
+        assert updated.stats()['segments'] == 2
+        assert [r['score'] for r in updated.search('monsoon')] == expected
+    with SearchIndex(str(tmp_path / 'updated')) as reopened:
+        assert [r['score'] for r in reopened.search('monsoon')] == expected
+
+
+def test_terms_are_found_by_binary_search(tmp_path):
+    with SearchIndex(str(tmp_path)) as index:
+        index.add_article('India', None, INDIA + [section('Culture', 'Café ünïcode naïve')], revision=1)
+        index.commit()
+        segment = index._segments[0]
+        terms = list(segment.iter_terms())
+        assert terms == sorted(terms) and 'ünïcode' in terms
+        for term in terms:
+            assert segment.lookup(term) is not None
+        for missing in ('', 'aaa', 'monsoo', 'monsoons', 'zzz', 'ü'):
+            assert segment.lookup(missing) is None
+
+
+def test_segments_merge_by_tier(tmp_path):
+    assert [segment_tier(count, 3) for count in (1, 2, 3, 8, 9, 27)] == [0, 0, 1, 1, 2, 3]
+    with SearchIndex(str(tmp_path), flush_sections=1, merge_factor=3) as index:
+        def add(number):
+            index.add_article(f'Topic {number}', None, [section('Notes', f'word{number} shared')], revision=1)
+
+        for number in range(9):
+            add(number)
+        # 9 one-section segments became 3 of three sections, then one of nine
+        assert [segment.count for segment in index._segments] == [9]
+        big = index._segments[0].name
+        for number in range(9, 12):
+            add(number)
+        # The next tier is filled without rewriting the big segment
+        assert [segment.count for segment in index._segments] == [9, 3]
+        assert index._segments[0].name == big
+        assert len(index.search('shared', limit=20)) == 12
+        assert index.search('word10')[0]['title'] == 'Topic 10'
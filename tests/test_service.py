@@ -0,0 +1,132 @@
+import json
+import os
+import socket
+import threading
+import time
+import http.client
+
+import pytest
+
+from benchmarks.corpus import synthetic_article
+from benchmarks.standin import StandinServer
+from enhanced_wikipedia_scraper import parse_article, render_article
+from scraper.service import ScrapeService, make_server
+
+
+@pytest.fixture
+def service(tmp_path):
+    with StandinServer({'India': synthetic_article(sections=6, images=2),
+                        'Nepal': synthetic_article('Nepal', sections=4, images=0)}) as wiki:
+        service = ScrapeService(output_dir=str(tmp_path), workers=2, get=wiki.client_get(),
+                                scrape_options={'image_cache': False, 'page_cache': False})
+        server = make_server(service, '127.0.0.1:0')
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        yield service, server.server_address[1], wiki
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def call(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request(method, path, body=json.dumps(body) if body is not None else None)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    if response.getheader('Content-Type') == 'application/json':
+        data = json.loads(data)
+    return response.status, data
+
+
+def wait(port, job_id):
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        status, job = call(port, 'GET', f'/jobs/{job_id}')
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('job did not finish')
+
+
+def test_jobs_write_downloadable_files(service):
+    _, port, wiki = service
+    status, body = call(port, 'POST', '/jobs', {'topics': ['India', 'Nepal']})
+    assert status == 202 and [job['status'] for job in body['jobs']] == ['queued', 'queued']
+
+    jobs = [wait(port, job['id']) for job in body['jobs']]
+    assert [job['status'] for job in jobs] == ['done', 'done']
+    assert jobs[0]['result']['title'] == 'India' and jobs[0]['result']['sections'] > 6
+
+    status, pdf = call(port, 'GET', f"/jobs/{jobs[0]['id']}/pdf")
+    assert status == 200 and pdf.startswith(b'%PDF')
+    status, csv = call(port, 'GET', f"/jobs/{jobs[1]['id']}/csv")
+    assert status == 200 and b'Nepal' in csv
+
+    status, health = call(port, 'GET', '/health')
+    assert health['jobs']['done'] == 2
+    status, metrics = call(port, 'GET', '/metrics')
+    assert b'fetch' in metrics
+
+
+def test_extract_only_and_errors(service):
+    _, port, _ = service
+    status, body = call(port, 'POST', '/jobs', {'topic': 'Nepal', 'extract_only': True})
+    job = wait(port, body['jobs'][0]['id'])
+    assert job['result']['article']['title'] == 'Nepal' and 'pdf_file' not in job['result']
+    assert call(port, 'GET', f"/jobs/{job['id']}/pdf")[0] == 404
+
+    assert call(port, 'POST', '/jobs', {'topics': []})[0] == 400
+    assert call(port, 'POST', '/jobs', {'title': 'India'})[0] == 400
+    assert call(port, 'GET', '/jobs/unknown')[0] == 404
+
+
+def test_failed_job_reports_the_error(tmp_path):
+    def get(url, **kwargs):
+        raise ConnectionError('offline')
+
+    service = ScrapeService(output_dir=str(tmp_path), workers=1, get=get,
+                            scrape_options={'image_cache': False, 'page_cache': False})
+    job = service.submit('India')
+    service.close()
+    job = service.job(job['id'])
+    assert job['status'] == 'failed' and 'offline' in job['error']
+
+
+def test_topics_cannot_name_files_outside_the_job_directory(tmp_path):
+    with StandinServer({'AC/DC': synthetic_article('AC/DC', sections=3, images=0)}) as wiki:
+        service = ScrapeService(output_dir=str(tmp_path / 'jobs'), workers=1, get=wiki.client_get(),
+                                scrape_options={'image_cache': False, 'page_cache': False})
+        job = service.submit('AC/DC')
+        service.close()
+    job = service.job(job['id'])
+    assert job['status'] == 'done'
+    assert os.path.dirname(job['result']['pdf_file']) == str(tmp_path / 'jobs' / job['id'])
+
+    data = {**parse_article(synthetic_article('X', sections=3, images=0)), 'url': 'https://en.wikipedia.org/wiki/X'}
+    result = render_article('../../x', data, output_dir=str(tmp_path / 'jobs' / 'one'), verbose=False,
+                            image_cache=False)
+    for path in (result['pdf_file'], result['csv_file']):
+        assert os.path.dirname(path) == str(tmp_path / 'jobs' / 'one')
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='needs Unix sockets')
+def test_unix_socket(tmp_path):
+    path = str(tmp_path / 'service.sock')
+    service = ScrapeService(output_dir=str(tmp_path), workers=1)
+    server = make_server(service, f'unix:{path}')
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+            client.sendall(b'GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+            response = b''
+            while chunk := client.recv(65536):
+                response += chunk
+        assert response.startswith(b'HTTP/1.1 200') and b'"status": "ok"' in response
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+        os.remove(path)
@@ -0,0 +1,59 @@
+import os
+
+from benchmarks.corpus import synthetic_article
+from benchmarks.standin import StandinServer
+from enhanced_wikipedia_scraper import parse_article, scrape_enhanced_wikipedia
+from scraper.article import Article
+from scraper.store import ArticleStore, render_stored
+
+
+def article(revision, sections=5):
+    html = synthetic_article(sections=sections, images=2, revision=revision)
+    return Article.from_dict(parse_article(html), url='https://en.wikipedia.org/wiki/India', revision=revision)
+
+
+def test_upsert_skips_unchanged_revisions(tmp_path):
+    with ArticleStore(str(tmp_path / 'articles.sqlite')) as store:
+        first = article(1)
+        assert store.upsert([first]) == {'inserted': 1, 'updated': 0, 'unchanged': 0}
+        assert store.get('India') == first
+
+        assert store.upsert([article(1, sections=8)]) == {'inserted': 0, 'updated': 0, 'unchanged': 1}
+        assert store.get('India') == first
+
+        second = article(2, sections=8)
+        assert store.upsert([second]) == {'inserted': 0, 'updated': 1, 'unchanged': 0}
+        assert store.get('India') == second and store.revision('India') == 2
+        assert store.titles() == ['India'] and store.get('Nepal') is None
+
+
+def test_titles_with_a_lowercase_first_letter_are_found(tmp_path):
+    html = synthetic_article(title='iPhone', sections=3, images=0, revision=1)
+    iphone = Article.from_dict(parse_article(html), url='https://en.wikipedia.org/wiki/IPhone', revision=1)
+    with ArticleStore(str(tmp_path / 'articles.sqlite')) as store:
+        store.upsert([iphone])
+        assert store.titles() == ['iPhone']
+        assert store.get('IPhone').title == 'iPhone'
+        assert store.get('iPhone').sections == iphone.sections
+        assert store.revision('IPhone') == 1
+        assert store.upsert([iphone]) == {'inserted': 0, 'updated': 0, 'unchanged': 1}
+        [result] = render_stored(store, output_dir=str(tmp_path), image_cache=False)
+    assert os.path.exists(result['result']['pdf_file'])
+
+
+def test_render_from_store_is_offline(tmp_path):
+    path = str(tmp_path / 'articles.sqlite')
+    with StandinServer({'India': synthetic_article(sections=5, images=2)}) as server:
+        with ArticleStore(path) as store:
+            data = scrape_enhanced_wikipedia('India', get=server.client_get(), verbose=False, image_cache=False,
+                                             page_cache=False, extract_only=True, store=store)
+        fetched = len(server.requests)
+
+        with ArticleStore(path) as store:
+            results = render_stored(store, titles=['India', 'Nepal'], output_dir=str(tmp_path), image_cache=False)
+        assert len(server.requests) == fetched
+
+    india, nepal = results
+    assert india['result']['sections'] == data.to_dict()['sections']
+    assert os.path.exists(india['result']['pdf_file']) and os.path.exists(india['result']['csv_file'])
+    assert nepal == {'topic': 'Nepal', 'error': 'Article not in store'}
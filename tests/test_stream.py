@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from benchmarks.corpus import synthetic_article
+from enhanced_wikipedia_scraper import parse_article, scrape_enhanced_wikipedia
+from scraper.http_client import HttpClient
+from scraper.stream import collect_article, iter_article_events
+
+
+def chunked(data, size=4096):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize('layout', ['modern', 'legacy'])
+@pytest.mark.parametrize('reflist', [True, False])
+def test_stream_matches_full_parse(layout, reflist):
+    html = synthetic_article(sections=15, layout=layout, reflist=reflist)
+    expected = parse_article(html)
+    streamed = collect_article(iter_article_events(chunked(html)))
+    assert streamed['title'] == expected['title']
+    assert streamed['sections'] == expected['sections']
+    assert streamed['references'] == expected['references']
+    assert streamed['ref_urls'] == expected['ref_urls']
+    assert streamed['images'] == expected['images']
+
+
+def test_sections_are_yielded_before_the_page_is_read():
+    html = synthetic_article(sections=15)
+    read = [0]
+
+    def counting_chunks():
+        for chunk in chunked(html):
+            read[0] += len(chunk)
+            yield chunk
+
+    for event in iter_article_events(counting_chunks()):
+        if event[0] == 'section' and event[1]['heading'][1] != 'Introduction':
+            break
+    assert read[0] < len(html) / 4
+
+
+def test_scrape_in_streaming_mode(tmp_path, standin_server):
+    html = synthetic_article(sections=10, images=0)
+    standin_server.routes['/wiki/India'] = (200, {'Content-Type': 'text/html'}, html)
+    client = HttpClient()
+
+    def get(url, **kwargs):
+        return client.get(url.replace('https://en.wikipedia.org', standin_server.url), **kwargs)
+
+    result = scrape_enhanced_wikipedia('India', get=get, output_dir=str(tmp_path), verbose=False,
+                                       image_cache=False, page_cache=False, streaming=True)
+    assert result['sections'] == parse_article(html)['sections']
+    assert os.path.exists(result['pdf_file']) and os.path.exists(result['csv_file'])
+
+
+def test_stream_uses_the_first_reflist_and_infobox():
+    def img(name):
+        return f'<img src="//upload.wikimedia.org/{name}.png" width="40">'
+
+    # The first infobox sits inside a wrapper div; only its first five images count
+    first_infobox = '<table class="infobox"><tr><td>' + ''.join(img(f'a{i}') for i in range(7)) + '</td></tr></table>'
+    second_infobox = '<table class="infobox"><tr><td>' + ''.join(img(f'b{i}') for i in range(3)) + '</td></tr></table>'
+    html = ('<html><body><h1 id="firstHeading">Lists</h1><div id="mw-content-text"><div class="mw-parser-output">'
+            f'<div class="wrapper">{first_infobox}</div>'
+            '<p>Intro.<sup class="reference"><a href="#cite_note-1">[1]</a></sup></p>'
+            f'<h2>Notes</h2>{second_infobox}<p>Body.</p>'
+            '<div class="reflist"><ol><li id="cite_note-1">First list note</li></ol></div>'
+            '<h2>Sources</h2><p>More.</p>'
+            '<div class="reflist"><ol><li id="cite_note-2">Second list note '
+            '<a class="external" href="https://example.org">link</a></li></ol></div>'
+            '</div></div></body></html>').encode()
+    expected = parse_article(html)
+    streamed = collect_article(iter_article_events(chunked(html, 64)))
+    assert expected['references'] == ['First list note']
+    assert len(expected['images']) == 5
+    assert streamed['references'] == expected['references']
+    assert streamed['ref_urls'] == expected['ref_urls']
+    assert streamed['images'] == expected['images']
+    assert streamed['sections'] == expected['sections']
+
+
+def test_streaming_cannot_be_cache_only():
+    result = scrape_enhanced_wikipedia('India', get=lambda url, **kwargs: None, verbose=False,
+                                       streaming=True, cache_only=True, extract_only=True)
+    assert 'cache_only' in result['error']
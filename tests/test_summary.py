@@ -0,0 +1,72 @@
+import csv
+import json
+
+import pytest
+
+from benchmarks.corpus import synthetic_article
+from enhanced_wikipedia_scraper import parse_article
+from scraper.batch import scrape_batch
+from scraper.summary import SummaryWriter, first_sentence, summary_rows
+
+
+def legacy_first_sentence(content):
+    sentence = content.split('.')[0] + '.'
+    return sentence[:97] + '...' if len(sentence) > 100 else sentence
+
+
+@pytest.mark.parametrize('content', ['Short one. Then more.', 'No full stop', 'x' * 99, 'x' * 100, 'x' * 98 + '.',
+                                     'x' * 99 + '. after', 'y' * 500 + '. after', ''])
+def test_first_sentence_matches_split(content):
+    assert first_sentence(content) == legacy_first_sentence(content)
+
+
+SECTIONS = [
+    {'heading': ('h1', 'Introduction'), 'level': 1, 'content': 'First paragraph.\n\nSecond paragraph.'},
+    {'heading': ('h2', 'History'), 'level': 2, 'content': 'Old. Older.'},
+    {'heading': ('h3', 'Ancient'), 'level': 3, 'content': 'Very old. Indeed.'},
+]
+
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl'])
+def test_writer_streams_a_row_per_section(tmp_path, extension):
+    path = str(tmp_path / f'summaries.{extension}')
+    with SummaryWriter(path) as writer:
+        writer.write_article('India', 'India', 'https://en.wikipedia.org/wiki/India', SECTIONS)
+        writer.write_article('Nepal', 'Nepal', 'https://en.wikipedia.org/wiki/Nepal', SECTIONS[1:])
+
+    with open(path, encoding='utf-8') as file:
+        if extension == 'csv':
+            rows = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file]
+    assert [(row['topic'], row['heading'], row['summary']) for row in rows] == [
+        ('India', 'Introduction', 'First paragraph.'), ('India', 'History', 'Old.'),
+        ('India', 'Ancient', 'Very old.'), ('Nepal', 'History', 'Old.'), ('Nepal', 'Ancient', 'Very old.')]
+    assert writer.rows == 5
+
+
+def test_parquet_is_optional(tmp_path):
+    pyarrow = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'summaries.parquet')
+    with SummaryWriter(path) as writer:
+        writer.write_article('India', 'India', 'https://en.wikipedia.org/wiki/India', SECTIONS)
+    assert pyarrow.read_table(path).column('summary').to_pylist() == ['First paragraph.', 'Old.', 'Very old.']
+
+
+def test_batch_writes_one_summary_file(tmp_path):
+    html = synthetic_article(sections=6, images=0)
+    sections = parse_article(html)['sections']
+
+    def scrape(topic, **kwargs):
+        from enhanced_wikipedia_scraper import render_article
+        data = {**parse_article(html), 'url': f'https://en.wikipedia.org/wiki/{topic}'}
+        return render_article(topic, data, image_cache=False, **kwargs)
+
+    path = str(tmp_path / 'summaries.csv')
+    with SummaryWriter(path) as writer:
+        results = scrape_batch(['India', 'Nepal'], output_dir=str(tmp_path), scrape=scrape, summary_writer=writer)
+    assert [r['result']['csv_file'] for r in results] == [path, path]
+    assert not list(tmp_path.glob('*_wikipedia_summary.csv'))
+    with open(path, encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 2 * len(list(summary_rows('India', 'India', '', sections)))
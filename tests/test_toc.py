@@ -0,0 +1,42 @@
+import re
+
+from reportlab.platypus import SimpleDocTemplate, PageBreak
+
+from enhanced_wikipedia_scraper import get_styles
+from scraper.toc import SectionIndex, outline_level
+
+
+def build(tmp_path, mode):
+    styles = get_styles()
+    path = str(tmp_path / f'{mode}.pdf')
+    doc = SimpleDocTemplate(path, pageCompression=0)
+    index = SectionIndex(mode, styles['toc_levels'])
+    sections = []
+    for i, level in enumerate([1, 2, 3, 4, 2]):
+        sections += [index.heading(f'Section {i}', level, styles['h2']), PageBreak()]
+    index.build(doc, index.flowables() + [PageBreak()] + sections)
+    with open(path, 'rb') as file:
+        return index, file.read()
+
+
+def test_one_pass_toc_fills_in_page_numbers(tmp_path):
+    index, pdf = build(tmp_path, 'forms')
+    assert list(index.pages.values()) == [2, 3, 4, 5, 6]
+    # Each page number form holds the page its section landed on
+    assert re.findall(rb'\((\d+)\) Tj', pdf) == [b'2', b'3', b'4', b'5', b'6']
+    assert b'/Outlines' in pdf
+
+
+def test_one_pass_matches_multibuild_pages(tmp_path):
+    forms, _ = build(tmp_path, 'forms')
+    multibuild, _ = build(tmp_path, 'multibuild')
+    assert forms.pages == multibuild.pages
+
+
+def test_outline_never_skips_a_level():
+    levels = []
+    previous = -1
+    for level in [1, 2, 4, 3, 2]:
+        previous = outline_level(level, previous)
+        levels.append(previous)
+    assert levels == [0, 0, 1, 1, 0]
@@ -0,0 +1,53 @@
+import json
+from urllib.parse import urlsplit, parse_qs
+
+from scraper.http_client import HttpClient
+from scraper.wikipedia_api import SummaryClient
+
+
+def stub_api(server, missing=()):
+    # Minimal MediaWiki query API: normalizes the first letter, follows one
+    # redirect and returns an extract for every other title
+    def api(handler):
+        params = parse_qs(urlsplit(handler.path).query)
+        assert int(params['exlimit'][0]) <= 20
+        query = {'normalized': [], 'redirects': [], 'pages': []}
+        for title in params['titles'][0].split('|'):
+            name = title[0].upper() + title[1:]
+            if name != title:
+                query['normalized'].append({'from': title, 'to': name})
+            if name == 'Bharat':
+                query['redirects'].append({'from': name, 'to': 'India'})
+                name = 'India'
+            if name in missing:
+                query['pages'].append({'title': name, 'missing': True})
+            else:
+                query['pages'].append({'title': name, 'extract': f'{name} is a topic.',
+                                       'fullurl': f'https://en.wikipedia.org/wiki/{name}'})
+        return 200, {'Content-Type': 'application/json'}, json.dumps({'query': query}).encode()
+    server.routes['/w/api.php'] = api
+
+
+def test_titles_are_batched_into_multi_title_queries(standin_server):
+    stub_api(standin_server, missing=('Nowhere',))
+    client = SummaryClient(get=HttpClient().get, api_url=f'{standin_server.url}/w/api.php')
+    titles = [f'Topic {i}' for i in range(45)] + ['bharat', 'Nowhere']
+    results = client.summaries(titles)
+    assert list(results) == titles
+    assert len(standin_server.requests) == 3
+    assert results['Topic 7']['summary'] == 'Topic 7 is a topic.'
+    assert results['bharat']['title'] == 'India'
+    assert results['Nowhere'] == {'error': 'Page not found'}
+
+
+def test_results_are_cached_until_the_ttl_expires(standin_server):
+    stub_api(standin_server)
+    client = SummaryClient(get=HttpClient().get, api_url=f'{standin_server.url}/w/api.php', ttl=3600)
+    client.summaries(['India', 'Nepal'])
+    assert client.summary('Nepal')['title'] == 'Nepal'
+    assert len(standin_server.requests) == 1
+
+    expired = SummaryClient(get=HttpClient().get, api_url=f'{standin_server.url}/w/api.php', ttl=0)
+    expired.summary('India')
+    expired.summary('India')
+    assert len(standin_server.requests) == 3